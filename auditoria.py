@@ -0,0 +1,264 @@
+"""
+Registro de auditoria das caixas em SQLite.
+
+O StateManager emite eventos tipados por caixa (início, camada completa,
+divisor verificado, alarme, caixa completa ou abortada), cada um com o ID
+da caixa e o timestamp do relógio da máquina de estados. Os eventos são
+anexados à tabela `eventos` por uma thread de fundo, em lotes, sem I/O no
+loop de frames. A tabela `caixas` resume cada caixa (início, fim, resultado,
+total de itens, alarmes) e é atualizada na mesma transação, de forma que
+consultas como "caixas abortadas entre duas datas" usam só índices.
+
+Consulta pela linha de comando: consultar_auditoria.py.
+"""
+
+import json
+import os
+import queue
+import sqlite3
+import threading
+from pathlib import Path
+
+from config import CAMINHO_AUDITORIA
+from logger_config import get_siac_logger
+
+# Tipos de evento
+EVENTO_CAIXA_INICIADA = 'caixa_iniciada'
+EVENTO_CAMADA_COMPLETA = 'camada_completa'
+EVENTO_DIVISOR_VERIFICADO = 'divisor_verificado'
+EVENTO_ALARME = 'alarme'
+EVENTO_CAIXA_COMPLETA = 'caixa_completa'
+EVENTO_CAIXA_ABORTADA = 'caixa_abortada'
+EVENTOS = (EVENTO_CAIXA_INICIADA, EVENTO_CAMADA_COMPLETA, EVENTO_DIVISOR_VERIFICADO,
+           EVENTO_ALARME, EVENTO_CAIXA_COMPLETA, EVENTO_CAIXA_ABORTADA)
+
+# Resultado de cada caixa na tabela `caixas`
+RESULTADO_EM_ANDAMENTO = 'em_andamento'
+RESULTADOS = (RESULTADO_EM_ANDAMENTO, 'completa', 'abortada')
+_RESULTADO_POR_EVENTO = {EVENTO_CAIXA_COMPLETA: 'completa', EVENTO_CAIXA_ABORTADA: 'abortada'}
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS eventos (
+    id INTEGER PRIMARY KEY,
+    timestamp REAL NOT NULL,
+    origem TEXT NOT NULL,
+    caixa_id TEXT,
+    tipo TEXT NOT NULL,
+    camada INTEGER,
+    dados TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_eventos_timestamp ON eventos (timestamp);
+CREATE INDEX IF NOT EXISTS idx_eventos_tipo_timestamp ON eventos (tipo, timestamp);
+CREATE INDEX IF NOT EXISTS idx_eventos_caixa ON eventos (caixa_id);
+
+CREATE TABLE IF NOT EXISTS caixas (
+    caixa_id TEXT PRIMARY KEY,
+    origem TEXT NOT NULL,
+    inicio REAL NOT NULL,
+    fim REAL,
+    resultado TEXT NOT NULL,
+    camada_final INTEGER,
+    total_itens INTEGER,
+    alarmes INTEGER NOT NULL DEFAULT 0,
+    motivo TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_caixas_inicio ON caixas (inicio);
+CREATE INDEX IF NOT EXISTS idx_caixas_resultado_inicio ON caixas (resultado, inicio);
+"""
+
+
+def _conectar(caminho):
+    conexao = sqlite3.connect(caminho, timeout=10.0)
+    # WAL: leitores (consultar_auditoria.py) não bloqueiam a escrita
+    conexao.execute("PRAGMA journal_mode=WAL")
+    conexao.execute("PRAGMA synchronous=NORMAL")
+    return conexao
+
+
+def converter_para_json(valor):
+    """`default` do json.dumps para os dados dos eventos (auditoria e alarmes publicados)."""
+    # Escalares NumPy (ex.: contagens vindas de arrays) viram tipos Python
+    return valor.item() if hasattr(valor, 'item') else str(valor)
+
+
+class RegistroAuditoria:
+    """
+    Grava os eventos de auditoria de uma origem (câmera) em um banco SQLite.
+
+    `registrar` só enfileira o evento; uma thread de fundo grava os eventos
+    pendentes em uma única transação. Várias instâncias (uma por câmera)
+    podem apontar para o mesmo banco.
+    """
+    def __init__(self, caminho=CAMINHO_AUDITORIA, origem='principal'):
+        """
+        Args:
+            caminho: Arquivo do banco SQLite (criado se não existir).
+            origem: Identificação da câmera/instância gravada em cada evento.
+        """
+        self.logger = get_siac_logger("AUDITORIA")
+        self.caminho = caminho
+        self.origem = origem
+        diretorio = os.path.dirname(caminho)
+        if diretorio:
+            os.makedirs(diretorio, exist_ok=True)
+
+        # Cria o esquema já no construtor, para que erros de caminho apareçam na inicialização
+        conexao = _conectar(caminho)
+        try:
+            conexao.executescript(_ESQUEMA)
+        finally:
+            conexao.close()
+
+        self.total_eventos = 0
+        self._fila = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._escrever, name=f"siac-auditoria-{origem}", daemon=True)
+        self._thread.start()
+        self.logger.info(f"Auditoria de caixas em: {caminho} (origem: {origem})")
+
+    def registrar(self, tipo, caixa_id, timestamp, camada=None, dados=None):
+        """
+        Enfileira um evento de auditoria.
+
+        Args:
+            tipo: Um dos tipos em EVENTOS.
+            caixa_id: ID da caixa a que o evento se refere.
+            timestamp: Instante do evento (relógio da máquina de estados).
+            camada: Camada atual no momento do evento.
+            dados: Dicionário opcional com detalhes do evento (gravado em JSON).
+        """
+        self.total_eventos += 1
+        self._fila.put((timestamp, self.origem, caixa_id, tipo, camada, dados))
+
+    def fechar(self):
+        """Grava os eventos pendentes e encerra a thread de escrita."""
+        if self._thread.is_alive():
+            self._fila.put(None)
+            self._thread.join()
+            self.logger.info(f"Auditoria encerrada: {self.total_eventos} eventos registrados")
+
+    def _escrever(self):
+        conexao = _conectar(self.caminho)
+        try:
+            while True:
+                lote = [self._fila.get()]
+                while True:
+                    try:
+                        lote.append(self._fila.get_nowait())
+                    except queue.Empty:
+                        break
+
+                eventos = [evento for evento in lote if evento is not None]
+                if eventos:
+                    self._gravar(conexao, eventos)
+                if len(eventos) < len(lote):
+                    break
+        finally:
+            conexao.close()
+
+    def _gravar(self, conexao, eventos):
+        try:
+            with conexao:
+                conexao.executemany(
+                    "INSERT INTO eventos (timestamp, origem, caixa_id, tipo, camada, dados) VALUES (?, ?, ?, ?, ?, ?)",
+                    [(timestamp, origem, caixa_id, tipo, camada,
+                      json.dumps(dados, ensure_ascii=False, default=converter_para_json) if dados else None)
+                     for timestamp, origem, caixa_id, tipo, camada, dados in eventos]
+                )
+                for evento in eventos:
+                    self._atualizar_caixa(conexao, *evento)
+        except sqlite3.Error as e:
+            self.logger.error(f"Falha ao gravar {len(eventos)} eventos de auditoria: {e}")
+
+    @staticmethod
+    def _atualizar_caixa(conexao, timestamp, origem, caixa_id, tipo, camada, dados):
+        if caixa_id is None:
+            return
+        if tipo == EVENTO_CAIXA_INICIADA:
+            conexao.execute(
+                "INSERT OR IGNORE INTO caixas (caixa_id, origem, inicio, resultado) VALUES (?, ?, ?, ?)",
+                (caixa_id, origem, timestamp, RESULTADO_EM_ANDAMENTO)
+            )
+        elif tipo == EVENTO_ALARME:
+            conexao.execute("UPDATE caixas SET alarmes = alarmes + 1 WHERE caixa_id = ?", (caixa_id,))
+        elif tipo in _RESULTADO_POR_EVENTO:
+            dados = dados or {}
+            conexao.execute(
+                "UPDATE caixas SET fim = ?, resultado = ?, camada_final = ?, total_itens = ?, motivo = ? WHERE caixa_id = ?",
+                (timestamp, _RESULTADO_POR_EVENTO[tipo], camada, dados.get('total_itens'), dados.get('motivo'), caixa_id)
+            )
+
+
+def _conectar_leitura(caminho):
+    if not os.path.exists(caminho):
+        raise FileNotFoundError(f"Banco de auditoria não encontrado: {caminho}")
+    conexao = sqlite3.connect(f"{Path(caminho).resolve().as_uri()}?mode=ro", uri=True)
+    conexao.row_factory = sqlite3.Row
+    return conexao
+
+
+def _consultar(caminho, tabela, coluna_tempo, filtros, desde, ate, limite):
+    condicoes, parametros = [], []
+    for coluna, valor in filtros:
+        if valor is not None:
+            condicoes.append(f"{coluna} = ?")
+            parametros.append(valor)
+    if desde is not None:
+        condicoes.append(f"{coluna_tempo} >= ?")
+        parametros.append(desde)
+    if ate is not None:
+        condicoes.append(f"{coluna_tempo} < ?")
+        parametros.append(ate)
+
+    sql = f"SELECT * FROM {tabela}"
+    if condicoes:
+        sql += " WHERE " + " AND ".join(condicoes)
+    sql += f" ORDER BY {coluna_tempo}"
+    if limite:
+        sql += " LIMIT ?"
+        parametros.append(int(limite))
+
+    conexao = _conectar_leitura(caminho)
+    try:
+        return [dict(linha) for linha in conexao.execute(sql, parametros)]
+    finally:
+        conexao.close()
+
+
+def consultar_caixas(caminho=CAMINHO_AUDITORIA, desde=None, ate=None, resultado=None, origem=None, limite=None):
+    """
+    Lista as caixas iniciadas no intervalo [desde, ate), em ordem de início.
+
+    Args:
+        caminho: Arquivo do banco de auditoria.
+        desde, ate: Timestamps (segundos) dos limites do intervalo; None = aberto.
+        resultado: Filtra por resultado ('em_andamento', 'completa' ou 'abortada').
+        origem: Filtra pela câmera/instância.
+        limite: Número máximo de linhas.
+
+    Returns:
+        Lista de dicionários com as colunas da tabela `caixas`.
+    """
+    return _consultar(caminho, 'caixas', 'inicio', (('resultado', resultado), ('origem', origem)),
+                      desde, ate, limite)
+
+
+def consultar_eventos(caminho=CAMINHO_AUDITORIA, desde=None, ate=None, tipo=None, caixa_id=None, origem=None, limite=None):
+    """
+    Lista os eventos no intervalo [desde, ate), em ordem de timestamp.
+
+    Args:
+        caminho: Arquivo do banco de auditoria.
+        desde, ate: Timestamps (segundos) dos limites do intervalo; None = aberto.
+        tipo: Filtra pelo tipo de evento (ver EVENTOS).
+        caixa_id: Filtra pelos eventos de uma caixa.
+        origem: Filtra pela câmera/instância.
+        limite: Número máximo de linhas.
+
+    Returns:
+        Lista de dicionários com as colunas da tabela `eventos` (`dados` já decodificado).
+    """
+    eventos = _consultar(caminho, 'eventos', 'timestamp',
+                         (('tipo', tipo), ('caixa_id', caixa_id), ('origem', origem)), desde, ate, limite)
+    for evento in eventos:
+        evento['dados'] = json.loads(evento['dados']) if evento['dados'] else {}
+    return eventos
@@ -0,0 +1,325 @@
+"""
+Backends de inferência para os modelos YOLO do SIAC.
+
+O backend 'ultralytics' carrega os pesos .pt diretamente (PyTorch). Os
+backends 'onnxruntime' e 'openvino' usam artefatos exportados a partir dos
+mesmos pesos, guardados ao lado deles e identificados pelo hash do arquivo
+.pt, e reproduzem o pré/pós-processamento da ultralytics (letterbox, filtro
+de confiança e NMS por classe) apenas com NumPy e OpenCV.
+"""
+
+import abc
+import argparse
+import glob
+import hashlib
+import os
+import shutil
+import cv2
+import numpy as np
+
+from config import MODELOS, BACKEND_INFERENCIA, TAMANHO_IMAGEM_INFERENCIA, PRECISAO_INFERENCIA
+from logger_config import get_siac_logger
+
+BACKENDS_DISPONIVEIS = ('ultralytics', 'onnxruntime', 'openvino')
+PRECISOES_DISPONIVEIS = ('fp32', 'int8')
+# Sufixo dos artefatos quantizados (ex.: item_detector.<hash>.int8.onnx)
+VARIANTE_INT8 = '.int8'
+
+logger = get_siac_logger("BACKENDS")
+
+
+def hash_pesos(caminho_pesos, tamanho_bloco=1 << 20):
+    """Retorna os 16 primeiros caracteres do SHA-256 do arquivo de pesos."""
+    sha = hashlib.sha256()
+    with open(caminho_pesos, 'rb') as arquivo:
+        for bloco in iter(lambda: arquivo.read(tamanho_bloco), b''):
+            sha.update(bloco)
+    return sha.hexdigest()[:16]
+
+
+def caminho_artefato(caminho_pesos, formato, variante=''):
+    """
+    Caminho do artefato exportado para um arquivo de pesos, ao lado dele e
+    identificado pelo hash dos pesos (ex.: item_detector.<hash>.onnx).
+
+    Args:
+        caminho_pesos: Caminho do arquivo .pt.
+        formato: 'onnx' ou 'openvino'.
+        variante: Sufixo opcional da variante (ex.: '.int8').
+    """
+    base = os.path.splitext(caminho_pesos)[0]
+    identificador = f"{base}.{hash_pesos(caminho_pesos)}{variante}"
+    if formato == 'onnx':
+        return f"{identificador}.onnx"
+    if formato == 'openvino':
+        return f"{identificador}_openvino_model"
+    raise ValueError(f"Formato de exportação inválido: {formato}")
+
+
+def exportar_modelo(caminho_pesos, formato, imgsz=TAMANHO_IMAGEM_INFERENCIA):
+    """
+    Exporta os pesos .pt para ONNX ou OpenVINO IR, reaproveitando o artefato
+    em cache se os pesos não mudaram.
+
+    Returns:
+        Caminho do artefato exportado (arquivo .onnx ou diretório OpenVINO).
+    """
+    destino = caminho_artefato(caminho_pesos, formato)
+    if os.path.exists(destino):
+        logger.info(f"Artefato {formato} em cache: {destino}")
+        return destino
+
+    # A ultralytics (e o PyTorch) só são necessários para exportar
+    from ultralytics import YOLO
+
+    logger.info(f"Exportando {caminho_pesos} para {formato} (imgsz={imgsz})")
+    gerado = YOLO(caminho_pesos).export(format=formato, imgsz=imgsz, dynamic=True)
+    shutil.move(str(gerado), destino)
+    logger.info(f"Artefato {formato} salvo em: {destino}")
+    return destino
+
+
+def carregar_modelo(caminho_pesos, backend=BACKEND_INFERENCIA, imgsz=TAMANHO_IMAGEM_INFERENCIA,
+                    precisao=PRECISAO_INFERENCIA):
+    """
+    Carrega um modelo no backend escolhido. Todos os backends expõem
+    `predict(source, conf, verbose)` com resultados no formato usado pelo Detector.
+
+    Args:
+        caminho_pesos: Caminho do arquivo .pt.
+        backend: 'ultralytics', 'onnxruntime' ou 'openvino'.
+        imgsz: Tamanho da imagem de entrada (backends exportados).
+        precisao: 'fp32' ou 'int8'. A variante INT8 é gerada por
+            `quantizar_modelos.py` e sempre roda no ONNX Runtime.
+    """
+    if backend not in BACKENDS_DISPONIVEIS:
+        raise ValueError(f"Backend de inferência inválido: {backend}. Opções: {', '.join(BACKENDS_DISPONIVEIS)}")
+    if precisao not in PRECISOES_DISPONIVEIS:
+        raise ValueError(f"Precisão de inferência inválida: {precisao}. Opções: {', '.join(PRECISOES_DISPONIVEIS)}")
+
+    if precisao == 'int8':
+        caminho_int8 = caminho_artefato(caminho_pesos, 'onnx', VARIANTE_INT8)
+        if not os.path.exists(caminho_int8):
+            raise FileNotFoundError(
+                f"Variante INT8 não encontrada: {caminho_int8}. Gere-a com 'python quantizar_modelos.py'"
+            )
+        if backend != 'onnxruntime':
+            logger.warning(f"Variante INT8 usa o backend ONNX Runtime (backend configurado: {backend})")
+        return ModeloOnnxRuntime(caminho_int8, imgsz)
+
+    if backend == 'ultralytics':
+        from ultralytics import YOLO
+        return YOLO(caminho_pesos)
+
+    if backend == 'openvino':
+        try:
+            return ModeloOpenVino(exportar_modelo(caminho_pesos, 'openvino', imgsz), imgsz)
+        except ImportError:
+            logger.warning("OpenVINO não está instalado. Usando ONNX Runtime")
+
+    return ModeloOnnxRuntime(exportar_modelo(caminho_pesos, 'onnx', imgsz), imgsz)
+
+
+class Caixa:
+    """Uma detecção, com a mesma interface de acesso de `ultralytics.engine.results.Boxes`."""
+    def __init__(self, linha):
+        self.xyxy = linha[None, :4]
+        self.conf = linha[4:5]
+        self.cls = linha[5]
+
+
+class Caixas:
+    """Conjunto de detecções de uma imagem; `data` é um array Nx6 (x1, y1, x2, y2, conf, cls)."""
+    def __init__(self, data):
+        self.data = data
+
+    def __iter__(self):
+        return (Caixa(linha) for linha in self.data)
+
+    def __len__(self):
+        return len(self.data)
+
+
+class Resultado:
+    """Resultado da inferência para uma imagem (equivalente ao `Results` da ultralytics)."""
+    def __init__(self, data, orig_shape):
+        self.boxes = Caixas(data)
+        self.orig_shape = orig_shape
+
+
+class ModeloExportado(abc.ABC):
+    """
+    Base dos backends exportados: pré-processamento (letterbox), pós-
+    processamento (filtro de confiança, NMS por classe e reescala das caixas)
+    e divisão em lotes. As subclasses implementam apenas `_inferir`.
+    """
+    stride = 32
+
+    def __init__(self, caminho, imgsz=TAMANHO_IMAGEM_INFERENCIA):
+        self.caminho = caminho
+        self.imgsz = imgsz
+
+    def predict(self, source, conf=0.25, iou=0.7, imgsz=None, max_det=300, verbose=False):
+        """
+        Executa a inferência em uma imagem ou lista de imagens BGR.
+
+        Returns:
+            Lista de `Resultado`, um por imagem.
+        """
+        imagens = source if isinstance(source, (list, tuple)) else [source]
+        if not imagens:
+            return []
+
+        tensor = self.preparar_entrada(imagens, imgsz or self.imgsz)
+        saida = self._inferir(tensor)
+        forma_entrada = tensor.shape[2:]
+        return [
+            Resultado(self._pos_processar(predicao, conf, iou, max_det, forma_entrada, imagem.shape[:2]), imagem.shape[:2])
+            for predicao, imagem in zip(saida, imagens)
+        ]
+
+    @classmethod
+    def preparar_entrada(cls, imagens, tamanho, minimo=None):
+        """
+        Converte imagens BGR no tensor de entrada do modelo (NCHW, RGB, float32 em [0, 1]).
+        Método de classe: também serve à calibração, sem um modelo carregado.
+
+        Args:
+            imagens: Lista de imagens BGR.
+            tamanho: Lado do letterbox.
+            minimo: Usar o letterbox mínimo (múltiplo do stride). Se None, segue a
+                regra da ultralytics: apenas quando todas as imagens têm o mesmo formato.
+        """
+        if minimo is None:
+            minimo = len({imagem.shape for imagem in imagens}) == 1
+        preparadas = [cls._letterbox(imagem, tamanho, minimo) for imagem in imagens]
+
+        tensor = np.stack(preparadas)[..., ::-1].transpose(0, 3, 1, 2)  # BGR→RGB, NHWC→NCHW
+        return np.ascontiguousarray(tensor, dtype=np.float32) / 255.0
+
+    @abc.abstractmethod
+    def _inferir(self, tensor):
+        """Executa o modelo sobre o tensor NCHW e retorna a saída (N, 4 + classes, âncoras)."""
+
+    @classmethod
+    def _letterbox(cls, imagem, tamanho, minimo):
+        altura, largura = imagem.shape[:2]
+        r = min(tamanho / altura, tamanho / largura)
+        nova_largura, nova_altura = int(round(largura * r)), int(round(altura * r))
+        dw, dh = tamanho - nova_largura, tamanho - nova_altura
+        if minimo:
+            dw, dh = dw % cls.stride, dh % cls.stride
+        dw, dh = dw / 2, dh / 2
+
+        if (largura, altura) != (nova_largura, nova_altura):
+            imagem = cv2.resize(imagem, (nova_largura, nova_altura), interpolation=cv2.INTER_LINEAR)
+        topo, base = int(round(dh - 0.1)), int(round(dh + 0.1))
+        esquerda, direita = int(round(dw - 0.1)), int(round(dw + 0.1))
+        return cv2.copyMakeBorder(imagem, topo, base, esquerda, direita, cv2.BORDER_CONSTANT, value=(114, 114, 114))
+
+    def _pos_processar(self, predicao, conf, iou, max_det, forma_entrada, forma_original):
+        # Saída YOLOv8: (4 + classes, N) → (N, 4 + classes)
+        predicao = predicao.T
+        pontuacoes = predicao[:, 4:]
+        classes = pontuacoes.argmax(1)
+        confiancas = pontuacoes[np.arange(len(classes)), classes]
+
+        mascara = confiancas > conf
+        if not mascara.any():
+            return np.zeros((0, 6), dtype=np.float32)
+        caixas = _xywh_para_xyxy(predicao[mascara, :4])
+        confiancas, classes = confiancas[mascara], classes[mascara]
+
+        # NMS por classe: desloca as caixas de cada classe para que não se sobreponham
+        deslocamento = classes[:, None].astype(np.float32) * 7680
+        mantidas = _nms(caixas + deslocamento, confiancas, iou)[:max_det]
+
+        deteccoes = np.concatenate(
+            [caixas[mantidas], confiancas[mantidas, None], classes[mantidas, None].astype(np.float32)], axis=1
+        )
+        deteccoes[:, :4] = _reescalar_caixas(deteccoes[:, :4], forma_entrada, forma_original)
+        return deteccoes
+
+
+class ModeloOnnxRuntime(ModeloExportado):
+    """Executa um modelo exportado em ONNX com o ONNX Runtime (CPU)."""
+    def __init__(self, caminho, imgsz=TAMANHO_IMAGEM_INFERENCIA):
+        super().__init__(caminho, imgsz)
+        import onnxruntime as ort
+
+        self.sessao = ort.InferenceSession(caminho, providers=['CPUExecutionProvider'])
+        self.nome_entrada = self.sessao.get_inputs()[0].name
+        logger.info(f"Modelo ONNX Runtime carregado: {caminho}")
+
+    def _inferir(self, tensor):
+        return self.sessao.run(None, {self.nome_entrada: tensor})[0]
+
+
+class ModeloOpenVino(ModeloExportado):
+    """Executa um modelo exportado em OpenVINO IR (CPU)."""
+    def __init__(self, caminho, imgsz=TAMANHO_IMAGEM_INFERENCIA):
+        super().__init__(caminho, imgsz)
+        import openvino as ov
+
+        arquivos_xml = glob.glob(os.path.join(caminho, '*.xml'))
+        if not arquivos_xml:
+            raise FileNotFoundError(f"Modelo OpenVINO (.xml) não encontrado em: {caminho}")
+
+        self.modelo = ov.Core().compile_model(arquivos_xml[0], 'CPU')
+        logger.info(f"Modelo OpenVINO carregado: {arquivos_xml[0]}")
+
+    def _inferir(self, tensor):
+        return self.modelo(tensor)[0]
+
+
+def _xywh_para_xyxy(caixas):
+    xyxy = np.empty_like(caixas)
+    xyxy[:, :2] = caixas[:, :2] - caixas[:, 2:] / 2
+    xyxy[:, 2:] = caixas[:, :2] + caixas[:, 2:] / 2
+    return xyxy
+
+
+def _nms(caixas, pontuacoes, limite_iou):
+    """NMS guloso; retorna os índices mantidos em ordem decrescente de pontuação."""
+    areas = (caixas[:, 2] - caixas[:, 0]) * (caixas[:, 3] - caixas[:, 1])
+    ordem = pontuacoes.argsort()[::-1]
+    mantidas = []
+    while ordem.size:
+        atual = ordem[0]
+        mantidas.append(atual)
+        resto = ordem[1:]
+        x1 = np.maximum(caixas[atual, 0], caixas[resto, 0])
+        y1 = np.maximum(caixas[atual, 1], caixas[resto, 1])
+        x2 = np.minimum(caixas[atual, 2], caixas[resto, 2])
+        y2 = np.minimum(caixas[atual, 3], caixas[resto, 3])
+        intersecao = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+        iou = intersecao / (areas[atual] + areas[resto] - intersecao)
+        ordem = resto[iou <= limite_iou]
+    return np.array(mantidas, dtype=np.int64)
+
+
+def _reescalar_caixas(caixas, forma_entrada, forma_original):
+    """Desfaz o letterbox: leva as caixas do tamanho de entrada para o frame original."""
+    ganho = min(forma_entrada[0] / forma_original[0], forma_entrada[1] / forma_original[1])
+    pad_x = round((forma_entrada[1] - forma_original[1] * ganho) / 2 - 0.1)
+    pad_y = round((forma_entrada[0] - forma_original[0] * ganho) / 2 - 0.1)
+
+    caixas = caixas.copy()
+    caixas[:, [0, 2]] = ((caixas[:, [0, 2]] - pad_x) / ganho).clip(0, forma_original[1])
+    caixas[:, [1, 3]] = ((caixas[:, [1, 3]] - pad_y) / ganho).clip(0, forma_original[0])
+    return caixas
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Exporta os modelos de produção para ONNX e/ou OpenVINO IR.")
+    parser.add_argument('--formatos', type=str, nargs='+', default=['onnx', 'openvino'], help="Formatos a exportar.")
+    parser.add_argument('--imgsz', type=int, default=TAMANHO_IMAGEM_INFERENCIA, help="Tamanho da imagem de entrada.")
+
+    args = parser.parse_args()
+
+    for nome, caminho in MODELOS.items():
+        for formato in args.formatos:
+            try:
+                print(f"[INFO] {nome} ({formato}): {exportar_modelo(caminho, formato, args.imgsz)}")
+            except Exception as e:
+                print(f"[ERRO] Falha ao exportar {nome} para {formato}: {e}")
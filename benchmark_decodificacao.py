@@ -0,0 +1,77 @@
+import argparse
+import time
+import cv2
+import numpy as np
+
+from fonte_video import FonteVideo, BACKENDS_DECODIFICACAO
+from logger_config import init_siac_logging
+from utils.videos_teste import DIRETORIO_VIDEOS_TESTE, listar_videos
+
+
+def consumir(cap, max_frames, processamento_ms):
+    """
+    Lê até `max_frames` frames simulando `processamento_ms` de trabalho por
+    frame (detecção + estado). Retorna (frames, tempo total em s, esperas em
+    `read` em ms).
+    """
+    esperas_ms = []
+    inicio_total = time.perf_counter()
+    while len(esperas_ms) < max_frames:
+        inicio = time.perf_counter()
+        ret, frame = cap.read()
+        if not ret:
+            break
+        esperas_ms.append((time.perf_counter() - inicio) * 1000)
+        if processamento_ms:
+            time.sleep(processamento_ms / 1000.0)
+    return len(esperas_ms), time.perf_counter() - inicio_total, esperas_ms
+
+
+def imprimir_linha(nome, frames, duracao, esperas_ms, resolucao):
+    esperas = np.array(esperas_ms) if esperas_ms else np.zeros(1)
+    print(f"{nome:<28} | {resolucao:>10} | {frames:>6} | {frames / duracao if duracao else 0.0:>8.1f} | "
+          f"{np.percentile(esperas, 50):>8.2f} | {np.percentile(esperas, 95):>8.2f}")
+
+
+def executar_benchmark(diretorio, max_frames, processamento_ms, backend, threads, lado_maximo):
+    videos = listar_videos(diretorio)
+    if not videos:
+        print(f"[ERRO] Nenhum vídeo encontrado em: {diretorio}")
+        return
+
+    print(f"-- Decodificação: até {max_frames} frames por vídeo, {processamento_ms} ms de processamento simulado por frame --")
+    print(f"{'Fonte':<28} | {'Resolução':>10} | {'Frames':>6} | {'FPS':>8} | {'p50 read':>8} | {'p95 read':>8}")
+    for caminho in videos:
+        print(f"[INFO] {caminho}")
+        cap = cv2.VideoCapture(caminho)
+        resolucao = f"{int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))}x{int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))}"
+        try:
+            imprimir_linha('cv2.VideoCapture', *consumir(cap, max_frames, processamento_ms), resolucao)
+        finally:
+            cap.release()
+
+        configuracoes = [('FonteVideo', None)]
+        if lado_maximo:
+            configuracoes.append((f'FonteVideo (lado <= {lado_maximo})', lado_maximo))
+        for nome, lado in configuracoes:
+            cap = FonteVideo(caminho, backend=backend, threads=threads, lado_maximo=lado)
+            resolucao = f"{int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))}x{int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))}"
+            try:
+                imprimir_linha(nome, *consumir(cap, max_frames, processamento_ms), resolucao)
+            finally:
+                cap.release()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Compara a leitura com cv2.VideoCapture e com a FonteVideo (decodificação em thread de fundo).")
+    parser.add_argument('--videos', type=str, default=DIRETORIO_VIDEOS_TESTE, help="Diretório com os vídeos de teste.")
+    parser.add_argument('--max_frames', type=int, default=300, help="Número máximo de frames lidos por vídeo.")
+    parser.add_argument('--processamento_ms', type=float, default=20.0, help="Trabalho simulado por frame, em ms (0 = só decodificação).")
+    parser.add_argument('--backend', type=str, default='opencv', choices=BACKENDS_DECODIFICACAO, help="Backend de decodificação da FonteVideo.")
+    parser.add_argument('--threads', type=int, default=0, help="Threads de decodificação do FFmpeg (0 = padrão do backend).")
+    parser.add_argument('--lado_maximo', type=int, default=640, help="Também mede a redução na decodificação para este maior lado (0 = não mede).")
+
+    args = parser.parse_args()
+
+    init_siac_logging(log_level="WARNING", enable_file_logging=False)
+    executar_benchmark(args.videos, args.max_frames, args.processamento_ms, args.backend, args.threads, args.lado_maximo)
@@ -0,0 +1,184 @@
+import argparse
+import json
+import os
+import time
+from datetime import datetime
+import cv2
+import numpy as np
+
+# Desabilita o sync da ultralytics para evitar downloads
+os.environ['ULTRALYTICS_SYNC'] = 'False'
+
+from detector import Detector
+from logger_config import init_siac_logging
+from main import SiacApp
+import metricas
+from utils.videos_teste import DIRETORIO_VIDEOS_TESTE, listar_videos
+
+# Estágios registrados em LATENCIA_ESTAGIO pelo Detector e pelo SiacApp, mais a
+# decodificação e a exibição, medidas aqui. 'deteccao' inclui as predições e o
+# pós-processamento; 'frame' é o processamento completo de um frame.
+ESTAGIOS = ('decodificacao', 'predicao_roi', 'predicao_itens', 'deteccao',
+            'filtro_roi', 'estado', 'desenho', 'frame', 'exibicao')
+
+
+class Cronometro:
+    """
+    Acumula as latências (ms) de cada estágio. Enquanto ativo (`with`),
+    recebe cada observação de `metricas.LATENCIA_ESTAGIO`, ou seja, os
+    tempos medidos pelo próprio código de produção.
+    """
+    def __init__(self):
+        self.latencias = {estagio: [] for estagio in ESTAGIOS}
+
+    def __enter__(self):
+        histograma = metricas.LATENCIA_ESTAGIO
+        observar = histograma.observar
+
+        def observar_e_guardar(valor, estagio):
+            observar(valor, estagio)
+            self.registrar(estagio, valor * 1000)
+
+        histograma.observar = observar_e_guardar
+        return self
+
+    def __exit__(self, *excecao):
+        del metricas.LATENCIA_ESTAGIO.observar
+
+    def registrar(self, estagio, valor_ms):
+        self.latencias.setdefault(estagio, []).append(valor_ms)
+
+    def resumo(self):
+        """Retorna p50/p95/p99, média e vazão (frames/s) de cada estágio medido."""
+        resumo = {}
+        for estagio, valores in self.latencias.items():
+            if not valores:
+                continue
+            valores = np.array(valores)
+            media = float(valores.mean())
+            resumo[estagio] = {
+                'amostras': len(valores),
+                'media_ms': round(media, 3),
+                'p50_ms': round(float(np.percentile(valores, 50)), 3),
+                'p95_ms': round(float(np.percentile(valores, 95)), 3),
+                'p99_ms': round(float(np.percentile(valores, 99)), 3),
+                'vazao_fps': round(1000 / media, 1) if media > 0 else None
+            }
+        return resumo
+
+
+def medir_video(app, caminho, max_frames, exibir):
+    """
+    Processa até `max_frames` frames do vídeo com `SiacApp.processar_frame`
+    (rastreador/intervalo da ROI, portão de movimento e opções de predição
+    da configuração) e retorna as latências por estágio. Os estágios pulados
+    em um frame (ex.: predição de ROI com a ROI rastreada) não têm amostra.
+    """
+    cronometro = Cronometro()
+    cap = cv2.VideoCapture(caminho)
+    try:
+        ret, frame = cap.read()
+        if ret:
+            app.detector.detectar_objetos(frame)  # Aquecimento, fora das medições
+        with cronometro:
+            while ret and len(cronometro.latencias['frame']) < max_frames:
+                inicio = time.perf_counter()
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                cronometro.registrar('decodificacao', (time.perf_counter() - inicio) * 1000)
+                frame_desenhado = app.processar_frame(frame)
+                if exibir and frame_desenhado is not None:
+                    inicio = time.perf_counter()
+                    cv2.imshow('SIAC - Benchmark', frame_desenhado)
+                    cv2.waitKey(1)
+                    cronometro.registrar('exibicao', (time.perf_counter() - inicio) * 1000)
+    finally:
+        cap.release()
+    return cronometro
+
+
+def executar_benchmark(diretorio, max_frames, exibir, caminho_saida):
+    """Mede a latência por estágio em cada vídeo e salva o relatório em JSON."""
+    videos = listar_videos(diretorio)
+    if not videos:
+        print(f"[ERRO] Nenhum vídeo encontrado em: {diretorio}")
+        return None
+
+    # Mesma configuração da produção: os números são comparáveis antes/depois de uma mudança
+    detector = Detector()
+    app = SiacApp(detector=detector, headless=not exibir, controle_carga=False, renderizacao_assincrona=False)
+    geral = Cronometro()
+    relatorio = {
+        'data': datetime.now().isoformat(timespec='seconds'),
+        'configuracao': {
+            'backend': detector.backend,
+            'precisao': detector.precisao,
+            'recorte_roi': detector.recorte_roi,
+            'rastreamento_roi': detector.rastreador_roi is not None,
+            'intervalo_roi': detector.intervalo_roi,
+            'portao_movimento': app.portao_movimento is not None,
+            'exibicao': exibir,
+            'max_frames': max_frames
+        },
+        'videos': {}
+    }
+
+    print(f"-- Latência por estágio: {len(videos)} vídeo(s), até {max_frames} frames cada --")
+    for video in videos:
+        cronometro = medir_video(app, video, max_frames, exibir)
+        resumo = cronometro.resumo()
+        relatorio['videos'][os.path.basename(video)] = resumo
+        for estagio, valores in cronometro.latencias.items():
+            geral.latencias.setdefault(estagio, []).extend(valores)
+        print(f"\n[VÍDEO] {os.path.basename(video)}")
+        imprimir_resumo(resumo)
+
+    if exibir:
+        cv2.destroyAllWindows()
+
+    relatorio['geral'] = geral.resumo()
+    print("\n[GERAL]")
+    imprimir_resumo(relatorio['geral'])
+
+    with open(caminho_saida, 'w', encoding='utf-8') as arquivo:
+        json.dump(relatorio, arquivo, indent=2, ensure_ascii=False)
+    print(f"\n[INFO] Relatório salvo em: {caminho_saida}")
+    return relatorio
+
+
+def imprimir_resumo(resumo):
+    print(f"{'Estágio':>18} | {'p50 (ms)':>9} | {'p95 (ms)':>9} | {'p99 (ms)':>9} | {'Vazão (FPS)':>11}")
+    for estagio, valores in resumo.items():
+        print(f"{estagio:>18} | {valores['p50_ms']:>9.2f} | {valores['p95_ms']:>9.2f} | {valores['p99_ms']:>9.2f} | {valores['vazao_fps'] or 0:>11.1f}")
+
+
+def comparar(caminho_anterior, relatorio):
+    """Imprime a variação do p50/p95 de cada estágio em relação a um relatório anterior."""
+    with open(caminho_anterior, encoding='utf-8') as arquivo:
+        anterior = json.load(arquivo)['geral']
+
+    print(f"\n-- Comparação com {caminho_anterior} --")
+    print(f"{'Estágio':>18} | {'p50 antes':>9} | {'p50 agora':>9} | {'p95 antes':>9} | {'p95 agora':>9}")
+    for estagio, valores in relatorio['geral'].items():
+        if estagio not in anterior:
+            continue
+        antes = anterior[estagio]
+        print(f"{estagio:>18} | {antes['p50_ms']:>9.2f} | {valores['p50_ms']:>9.2f} | {antes['p95_ms']:>9.2f} | {valores['p95_ms']:>9.2f}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Mede a latência de cada estágio do pipeline nos vídeos de teste.")
+    parser.add_argument('--videos', type=str, default=DIRETORIO_VIDEOS_TESTE, help="Diretório com os vídeos de teste.")
+    parser.add_argument('--max_frames', type=int, default=300, help="Número máximo de frames processados por vídeo.")
+    parser.add_argument('--headless', action='store_true', help="Não exibe os frames (omite o estágio de exibição).")
+    parser.add_argument('--saida', type=str, default=None, help="Arquivo JSON do relatório (padrão: benchmark_estagios_<data>.json).")
+    parser.add_argument('--comparar', type=str, default=None, help="Relatório JSON anterior para comparação.")
+
+    args = parser.parse_args()
+
+    init_siac_logging(log_level="WARNING", enable_file_logging=False)
+    saida = args.saida or f"benchmark_estagios_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    relatorio = executar_benchmark(args.videos, args.max_frames, not args.headless, saida)
+    if relatorio and args.comparar:
+        comparar(args.comparar, relatorio)
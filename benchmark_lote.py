@@ -0,0 +1,79 @@
+import argparse
+import os
+import time
+
+# Desabilita o sync da ultralytics para evitar downloads
+os.environ['ULTRALYTICS_SYNC'] = 'False'
+
+from config import TAMANHO_MAXIMO_LOTE
+from detector import Detector
+from logger_config import init_siac_logging
+from utils.videos_teste import DIRETORIO_VIDEOS_TESTE, listar_videos, carregar_frames
+
+
+def medir_fps(detector, frames, tamanho_lote, repeticoes):
+    """
+    Mede a vazão (frames/segundo) de `Detector.detectar_lote` para um
+    tamanho de lote, repetindo a passada completa sobre os frames.
+    """
+    detector.tamanho_maximo_lote = tamanho_lote
+
+    # Aquecimento: a primeira chamada inclui inicialização dos modelos
+    detector.detectar_lote(frames[:tamanho_lote])
+
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        detector.detectar_lote(frames)
+    duracao = time.perf_counter() - inicio
+
+    return (len(frames) * repeticoes) / duracao if duracao > 0 else 0.0
+
+
+def executar_benchmark(diretorio, tamanhos_lote, max_frames, repeticoes):
+    """
+    Executa o benchmark de inferência em lote sobre os vídeos do diretório
+    e imprime uma tabela de FPS por tamanho de lote.
+    """
+    videos = listar_videos(diretorio)
+    if not videos:
+        print(f"[ERRO] Nenhum vídeo encontrado em: {diretorio}")
+        return
+
+    detector = Detector()
+    tamanho_original = detector.tamanho_maximo_lote
+
+    print(f"-- Benchmark de inferência em lote: {len(videos)} vídeo(s), até {max_frames} frames cada --")
+    for video in videos:
+        frames = carregar_frames(video, max_frames)
+        if not frames:
+            continue
+
+        print(f"\n[VÍDEO] {os.path.basename(video)} ({len(frames)} frames)")
+        print(f"{'Lote':>6} | {'FPS':>8} | {'Ganho':>6}")
+        fps_base = None
+        for tamanho_lote in tamanhos_lote:
+            fps = medir_fps(detector, frames, tamanho_lote, repeticoes)
+            if fps_base is None:
+                fps_base = fps
+            ganho = fps / fps_base if fps_base else 0.0
+            print(f"{tamanho_lote:>6} | {fps:>8.1f} | {ganho:>5.2f}x")
+
+    detector.tamanho_maximo_lote = tamanho_original
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark de FPS por tamanho de lote em Detector.detectar_lote.")
+    parser.add_argument('--videos', type=str, default=DIRETORIO_VIDEOS_TESTE, help="Diretório com os vídeos de teste.")
+    parser.add_argument('--lotes', type=int, nargs='+', default=[1, 2, 4, TAMANHO_MAXIMO_LOTE], help="Tamanhos de lote a medir.")
+    parser.add_argument('--max_frames', type=int, default=64, help="Número máximo de frames carregados por vídeo.")
+    parser.add_argument('--repeticoes', type=int, default=3, help="Número de passadas completas por tamanho de lote.")
+
+    args = parser.parse_args()
+
+    init_siac_logging(log_level="WARNING", enable_file_logging=False)
+    executar_benchmark(
+        diretorio=args.videos,
+        tamanhos_lote=args.lotes,
+        max_frames=args.max_frames,
+        repeticoes=args.repeticoes
+    )
@@ -0,0 +1,82 @@
+import argparse
+import math
+import time
+import numpy as np
+
+from config import DISTANCIA_MINIMA_ITEM_NOVO
+from logger_config import init_siac_logging
+from state_manager import StateManager
+
+
+def verificar_itens_novos_referencia(itens_atuais, itens_camada_anterior, distancia_minima):
+    """Implementação anterior (laços aninhados com math.sqrt), usada como referência."""
+    novos = []
+    for x1, y1, x2, y2 in (item[:4] for item in itens_atuais):
+        centro_atual = ((x1 + x2) / 2, (y1 + y2) / 2)
+        eh_novo = True
+        for ax1, ay1, ax2, ay2 in (item[:4] for item in itens_camada_anterior):
+            centro_anterior = ((ax1 + ax2) / 2, (ay1 + ay2) / 2)
+            distancia = math.sqrt((centro_atual[0] - centro_anterior[0]) ** 2 + (centro_atual[1] - centro_anterior[1]) ** 2)
+            if distancia < distancia_minima:
+                eh_novo = False
+                break
+        novos.append(eh_novo)
+    return np.array(novos, dtype=bool)
+
+
+def gerar_camadas(itens_por_camada, gerador, largura=1920, altura=1080, lado=40):
+    """
+    Gera as caixas (Nx6) de duas camadas: metade da segunda camada repete
+    posições da primeira com pequeno deslocamento, a outra metade é nova.
+    """
+    def caixas(centros):
+        centros = np.floor(centros)
+        return np.column_stack((centros - lado / 2, centros + lado / 2,
+                                np.full(len(centros), 0.9), np.zeros(len(centros)))).astype(np.float32)
+
+    centros_1 = gerador.uniform((0, 0), (largura, altura), size=(itens_por_camada, 2))
+    repetidos = centros_1[:itens_por_camada // 2] + gerador.normal(0, DISTANCIA_MINIMA_ITEM_NOVO / 2, size=(itens_por_camada // 2, 2))
+    novos = gerador.uniform((0, 0), (largura, altura), size=(itens_por_camada - len(repetidos), 2))
+    return caixas(centros_1), caixas(np.vstack((repetidos, novos)))
+
+
+def medir(funcao, repeticoes):
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        resultado = funcao()
+    return (time.perf_counter() - inicio) / repeticoes * 1000, resultado
+
+
+def executar_benchmark(perfis, repeticoes, semente):
+    """Compara a verificação de itens novos antiga e a indexada em cada perfil de itens por camada."""
+    gerador = np.random.default_rng(semente)
+    state_manager = StateManager()
+
+    print(f"-- Memória espacial: distância mínima {DISTANCIA_MINIMA_ITEM_NOVO}px, {repeticoes} repetições --")
+    print(f"{'Itens/camada':>12} | {'Referência (ms)':>15} | {'Índice (ms)':>11} | {'Ganho':>7} | {'Novos':>7} | Decisões")
+    for itens_por_camada in perfis:
+        camada_1, camada_2 = gerar_camadas(itens_por_camada, gerador)
+
+        state_manager._resetar_sistema()
+        state_manager.camada_atual = 1
+        state_manager._memorizar_itens_camada(camada_1)
+        state_manager.camada_atual = 2
+
+        tempo_ref, novos_ref = medir(lambda: verificar_itens_novos_referencia(camada_2, camada_1, DISTANCIA_MINIMA_ITEM_NOVO), repeticoes)
+        tempo_idx, novos_idx = medir(lambda: state_manager._verificar_itens_novos(camada_2), repeticoes)
+
+        iguais = np.array_equal(camada_2[novos_ref], novos_idx)
+        print(f"{itens_por_camada:>12} | {tempo_ref:>15.3f} | {tempo_idx:>11.3f} | {tempo_ref / tempo_idx:>6.1f}x | "
+              f"{len(novos_idx):>7} | {'idênticas' if iguais else 'DIFERENTES'}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Compara a verificação de itens novos com laços aninhados e com o índice em grade.")
+    parser.add_argument('--perfis', type=int, nargs='+', default=[12, 50, 200, 1000], help="Quantidades de itens por camada.")
+    parser.add_argument('--repeticoes', type=int, default=20, help="Repetições por medição.")
+    parser.add_argument('--semente', type=int, default=0, help="Semente da geração das camadas.")
+
+    args = parser.parse_args()
+
+    init_siac_logging(log_level="WARNING", enable_file_logging=False)
+    executar_benchmark(args.perfis, args.repeticoes, args.semente)
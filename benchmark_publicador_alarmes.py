@@ -0,0 +1,167 @@
+import argparse
+import json
+import shutil
+import socket
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from logger_config import init_siac_logging
+from publicador_alarmes import PublicadorAlarmes, TransporteHttp, TransporteUdp
+
+
+class GatewayHttpLocal:
+    """
+    Servidor HTTP local no lugar do gateway da linha. Com `travado`, cada
+    requisição demora `atraso` segundos e é recusada (503), como um gateway
+    sobrecarregado.
+    """
+    def __init__(self, atraso):
+        self.atraso = atraso
+        self.travado = False
+        self.recebidos = set()
+        self._lock = threading.Lock()
+        gateway = self
+
+        class _Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                corpo = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                if gateway.travado:
+                    time.sleep(gateway.atraso)
+                    try:
+                        self.send_error(503)
+                    except OSError:
+                        pass  # O cliente já desistiu por timeout
+                    return
+                with gateway._lock:
+                    gateway.recebidos.update(evento['dados']['sequencia'] for evento in json.loads(corpo))
+                self.send_response(204)
+                self.end_headers()
+
+            def log_message(self, formato, *args):
+                pass
+
+        self.servidor = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+        self.servidor.daemon_threads = True
+        threading.Thread(target=self.servidor.serve_forever, daemon=True).start()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.servidor.server_address[1]}/siac/eventos"
+
+    def encerrar(self):
+        self.servidor.shutdown()
+        self.servidor.server_close()
+
+
+class ReceptorUdpLocal:
+    """Recebe os datagramas do TransporteUdp e guarda as sequências recebidas."""
+    def __init__(self):
+        self.recebidos = set()
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.socket.bind(('127.0.0.1', 0))
+        self.socket.settimeout(0.2)
+        self._ativo = True
+        threading.Thread(target=self._receber, daemon=True).start()
+
+    @property
+    def porta(self):
+        return self.socket.getsockname()[1]
+
+    def _receber(self):
+        while self._ativo:
+            try:
+                dados, _ = self.socket.recvfrom(65536)
+            except socket.timeout:
+                continue
+            self.recebidos.add(json.loads(dados)['dados']['sequencia'])
+
+    def encerrar(self):
+        self._ativo = False
+        self.socket.close()
+
+
+def percentil(valores, fracao):
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(fracao * len(ordenados)))]
+
+
+def publicar_medindo(publicador, quantidade, intervalo):
+    """Publica `quantidade` alarmes e retorna a latência de cada chamada, em µs."""
+    latencias_us = []
+    for sequencia in range(quantidade):
+        inicio = time.perf_counter()
+        publicador.registrar('alarme', f"caixa-{sequencia}", time.time(), 1,
+                             {'alarme': 'caixa_removida_incompleta', 'sequencia': sequencia})
+        latencias_us.append((time.perf_counter() - inicio) * 1e6)
+        if intervalo:
+            time.sleep(intervalo)
+    return latencias_us
+
+
+def aguardar_entrega(recebidos, quantidade, limite_s):
+    fim = time.monotonic() + limite_s
+    while len(recebidos) < quantidade and time.monotonic() < fim:
+        time.sleep(0.05)
+
+
+def imprimir_linha(cenario, latencias_us, publicador, recebidos, quantidade):
+    m = publicador.metricas()
+    print(f"{cenario:<22} | {percentil(latencias_us, 0.5):>8.1f} | {percentil(latencias_us, 0.99):>8.1f} | "
+          f"{max(latencias_us):>9.1f} | {m['enviados']:>8} | {m['transbordados']:>11} | "
+          f"{len(recebidos):>9} | {quantidade - len(recebidos):>8}")
+
+
+def executar_benchmark(quantidade, tamanho_fila, atraso, intervalo):
+    diretorio = tempfile.mkdtemp(prefix='siac_alarmes_')
+    opcoes = dict(tamanho_fila=tamanho_fila, tamanho_lote=50, intervalo_lote=0.1, tentativas=3,
+                  backoff_inicial=0.1, backoff_maximo=1.0, diretorio_transbordo=diretorio)
+    print(f"-- Publicador de alarmes: {quantidade} eventos, fila de {tamanho_fila}, gateway travado com {atraso}s por requisição --")
+    print(f"{'Cenário':<22} | {'p50 (µs)':>8} | {'p99 (µs)':>8} | {'máx (µs)':>9} | {'Enviados':>8} | "
+          f"{'Transbordo':>11} | {'Recebidos':>9} | {'Perdidos':>8}")
+    try:
+        # HTTP saudável
+        gateway = GatewayHttpLocal(atraso)
+        publicador = PublicadorAlarmes(TransporteHttp(gateway.url, timeout=0.5), origem='http_saudavel', **opcoes)
+        latencias = publicar_medindo(publicador, quantidade, intervalo)
+        aguardar_entrega(gateway.recebidos, quantidade, 30)
+        imprimir_linha('http_saudavel', latencias, publicador, gateway.recebidos, quantidade)
+        publicador.fechar()
+        gateway.encerrar()
+
+        # HTTP travado durante a publicação; o gateway volta depois e o transbordo é reenviado
+        gateway = GatewayHttpLocal(atraso)
+        gateway.travado = True
+        publicador = PublicadorAlarmes(TransporteHttp(gateway.url, timeout=0.5), origem='http_travado', **opcoes)
+        latencias = publicar_medindo(publicador, quantidade, intervalo)
+        imprimir_linha('http_travado', latencias, publicador, gateway.recebidos, quantidade)
+        gateway.travado = False
+        aguardar_entrega(gateway.recebidos, quantidade, 60)
+        imprimir_linha('http_apos_recuperacao', latencias, publicador, gateway.recebidos, quantidade)
+        publicador.fechar()
+        gateway.encerrar()
+
+        # UDP
+        receptor = ReceptorUdpLocal()
+        publicador = PublicadorAlarmes(TransporteUdp('127.0.0.1', receptor.porta), origem='udp', **opcoes)
+        latencias = publicar_medindo(publicador, quantidade, intervalo)
+        aguardar_entrega(receptor.recebidos, quantidade, 30)
+        imprimir_linha('udp', latencias, publicador, receptor.recebidos, quantidade)
+        publicador.fechar()
+        receptor.encerrar()
+    finally:
+        shutil.rmtree(diretorio, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Mede a latência de publicação de alarmes com um gateway local saudável, travado e via UDP.")
+    parser.add_argument('--eventos', type=int, default=2000, help="Eventos publicados por cenário.")
+    parser.add_argument('--fila', type=int, default=200, help="Tamanho da fila em memória do publicador.")
+    parser.add_argument('--atraso', type=float, default=3.0, help="Atraso (s) de cada requisição com o gateway travado.")
+    parser.add_argument('--intervalo', type=float, default=0.0, help="Intervalo (s) entre publicações (0 = rajada).")
+
+    args = parser.parse_args()
+
+    init_siac_logging(log_level="ERROR", enable_file_logging=False)
+    executar_benchmark(args.eventos, args.fila, args.atraso, args.intervalo)
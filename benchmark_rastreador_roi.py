@@ -0,0 +1,97 @@
+import argparse
+import os
+import time
+import numpy as np
+
+# Desabilita o sync da ultralytics para evitar downloads
+os.environ['ULTRALYTICS_SYNC'] = 'False'
+
+from detector import Detector, roi_maior_area
+from logger_config import init_siac_logging
+from roi_tracker import RastreadorROI
+from utils.videos_teste import DIRETORIO_VIDEOS_TESTE, listar_videos, carregar_frames
+
+
+def iou(a, b):
+    """Interseção sobre união entre duas caixas [x1, y1, x2, y2] (0 se alguma for None)."""
+    if a is None or b is None:
+        return 0.0
+    ix1, iy1 = max(a[0], b[0]), max(a[1], b[1])
+    ix2, iy2 = min(a[2], b[2]), min(a[3], b[3])
+    intersecao = max(0, ix2 - ix1) * max(0, iy2 - iy1)
+    uniao = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - intersecao
+    return intersecao / uniao if uniao > 0 else 0.0
+
+
+def executar_modo(detector, frames, rastreador):
+    """
+    Executa `detectar_objetos` em todos os frames com o rastreador indicado
+    (None para rodar o modelo de ROI em todos os frames).
+
+    Returns:
+        Tupla (FPS, lista de ROIs ativas por frame).
+    """
+    detector.rastreador_roi = rastreador
+    detector.detectar_objetos(frames[0])  # Aquecimento
+    if rastreador is not None:
+        rastreador.reiniciar(frames[0], None)
+
+    rois = []
+    inicio = time.perf_counter()
+    for frame in frames:
+        rois.append(roi_maior_area(detector.detectar_objetos(frame)['caixas']))
+    duracao = time.perf_counter() - inicio
+    return len(frames) / duracao if duracao > 0 else 0.0, rois
+
+
+def estabilidade(rois):
+    """Presença da ROI e IoU médio entre ROIs de frames consecutivos (quanto maior, menos tremida)."""
+    presenca = float(np.mean([roi is not None for roi in rois])) * 100
+    pares = [iou(a, b) for a, b in zip(rois, rois[1:]) if a is not None and b is not None]
+    return presenca, float(np.mean(pares)) if pares else 0.0
+
+
+def executar_benchmark(diretorio, max_frames, intervalo):
+    """Compara FPS e estabilidade da ROI com e sem rastreamento para cada vídeo do diretório."""
+    videos = listar_videos(diretorio)
+    if not videos:
+        print(f"[ERRO] Nenhum vídeo encontrado em: {diretorio}")
+        return
+
+    detector = Detector()
+    rastreador_original = detector.rastreador_roi
+
+    print(f"-- Rastreamento da ROI (detecção a cada {intervalo} frames): {len(videos)} vídeo(s) --")
+    for video in videos:
+        frames = carregar_frames(video, max_frames)
+        if not frames:
+            continue
+
+        fps_base, rois_base = executar_modo(detector, frames, None)
+        rastreador = RastreadorROI(intervalo_deteccao=intervalo)
+        fps_rastreio, rois_rastreio = executar_modo(detector, frames, rastreador)
+
+        concordancia = float(np.mean([iou(a, b) for a, b in zip(rois_base, rois_rastreio)]))
+        metricas = rastreador.metricas()
+
+        print(f"\n[VÍDEO] {os.path.basename(video)} ({len(frames)} frames)")
+        print(f"{'Modo':>12} | {'FPS':>7} | {'ROI presente':>12} | {'IoU consecutivo':>15}")
+        for nome, fps, rois in (("Sempre ROI", fps_base, rois_base), ("Rastreada", fps_rastreio, rois_rastreio)):
+            presenca, iou_consecutivo = estabilidade(rois)
+            print(f"{nome:>12} | {fps:>7.1f} | {presenca:>11.1f}% | {iou_consecutivo:>15.3f}")
+        print(f"Ganho de FPS: {fps_rastreio / fps_base:.2f}x | IoU médio vs. detecção completa: {concordancia:.3f} | "
+              f"Frames rastreados: {metricas['percentual_rastreado']:.1%} | Falhas: {metricas['falhas_rastreamento']}")
+
+    detector.rastreador_roi = rastreador_original
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Mede FPS e estabilidade da ROI com e sem o rastreador de ROI.")
+    parser.add_argument('--videos', type=str, default=DIRETORIO_VIDEOS_TESTE, help="Diretório com os vídeos de teste.")
+    parser.add_argument('--max_frames', type=int, default=300, help="Número máximo de frames carregados por vídeo.")
+    parser.add_argument('--intervalo', type=int, default=10, help="Frames entre duas detecções completas da ROI.")
+
+    args = parser.parse_args()
+
+    init_siac_logging(log_level="WARNING", enable_file_logging=False)
+    executar_benchmark(diretorio=args.videos, max_frames=args.max_frames, intervalo=args.intervalo)
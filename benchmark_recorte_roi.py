@@ -0,0 +1,84 @@
+import argparse
+import os
+import time
+import numpy as np
+
+# Desabilita o sync da ultralytics para evitar downloads
+os.environ['ULTRALYTICS_SYNC'] = 'False'
+
+from detector import Detector, roi_maior_area, filtrar_centro_na_roi
+from logger_config import init_siac_logging
+from utils.videos_teste import DIRETORIO_VIDEOS_TESTE, listar_videos, carregar_frames
+
+
+def contar_itens_na_roi(resultado):
+    """Conta os itens cujo centro está dentro da ROI de maior área (como o SiacApp)."""
+    roi = roi_maior_area(resultado['caixas'])
+    if roi is None:
+        return 0
+    return len(filtrar_centro_na_roi(resultado['itens'], roi))
+
+
+def medir_modo(detector, frames, recorte_roi):
+    """
+    Executa `detectar_objetos` em todos os frames no modo indicado.
+
+    Returns:
+        Tupla (latências em ms, contagem de itens na ROI por frame).
+    """
+    detector.recorte_roi = recorte_roi
+    detector.detectar_objetos(frames[0])  # Aquecimento
+
+    latencias = []
+    contagens = []
+    for frame in frames:
+        inicio = time.perf_counter()
+        resultado = detector.detectar_objetos(frame)
+        latencias.append((time.perf_counter() - inicio) * 1000)
+        contagens.append(contar_itens_na_roi(resultado))
+    return np.array(latencias), np.array(contagens)
+
+
+def executar_benchmark(diretorio, max_frames):
+    """
+    Compara a latência por frame entre a inferência de itens no frame
+    inteiro e no recorte da ROI, para cada vídeo do diretório.
+    """
+    videos = listar_videos(diretorio)
+    if not videos:
+        print(f"[ERRO] Nenhum vídeo encontrado em: {diretorio}")
+        return
+
+    detector = Detector()
+    modo_original = detector.recorte_roi
+
+    print(f"-- Comparação frame inteiro x recorte da ROI: {len(videos)} vídeo(s), até {max_frames} frames cada --")
+    for video in videos:
+        frames = carregar_frames(video, max_frames)
+        if not frames:
+            continue
+
+        lat_inteiro, cont_inteiro = medir_modo(detector, frames, recorte_roi=False)
+        lat_recorte, cont_recorte = medir_modo(detector, frames, recorte_roi=True)
+        concordancia = float(np.mean(cont_inteiro == cont_recorte)) * 100
+
+        print(f"\n[VÍDEO] {os.path.basename(video)} ({len(frames)} frames)")
+        print(f"{'Modo':>14} | {'Média (ms)':>10} | {'p95 (ms)':>9} | {'Itens/frame':>11}")
+        for nome, latencias, contagens in (("Frame inteiro", lat_inteiro, cont_inteiro),
+                                           ("Recorte ROI", lat_recorte, cont_recorte)):
+            print(f"{nome:>14} | {latencias.mean():>10.1f} | {np.percentile(latencias, 95):>9.1f} | {contagens.mean():>11.2f}")
+        print(f"Ganho de latência: {lat_inteiro.mean() / lat_recorte.mean():.2f}x | "
+              f"Contagens iguais em {concordancia:.1f}% dos frames")
+
+    detector.recorte_roi = modo_original
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Compara a latência da inferência de itens no frame inteiro e no recorte da ROI.")
+    parser.add_argument('--videos', type=str, default=DIRETORIO_VIDEOS_TESTE, help="Diretório com os vídeos de teste.")
+    parser.add_argument('--max_frames', type=int, default=200, help="Número máximo de frames carregados por vídeo.")
+
+    args = parser.parse_args()
+
+    init_siac_logging(log_level="WARNING", enable_file_logging=False)
+    executar_benchmark(diretorio=args.videos, max_frames=args.max_frames)
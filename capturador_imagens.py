@@ -2,11 +2,17 @@ import cv2
 import os
 import datetime
 
+from config import DEDUPLICACAO_DATASET
+from deduplicacao import FiltroDuplicatas, formatar_resumo, salvar_resumo
+
 def capturar_imagens():
     """
     Abre a webcam para capturar imagens para o dataset.
     - Pressione a BARRA DE ESPAÇO para salvar o frame atual.
     - Pressione 'q' para sair.
+
+    Com DEDUPLICACAO_DATASET, frames quase idênticos a uma imagem já salva
+    (nesta sessão ou antes, na pasta de saída) são descartados.
     """
     # --- Configuração ---
     ID_CAMERA = 0
@@ -17,6 +23,11 @@ def capturar_imagens():
     os.makedirs(PASTA_SAIDA, exist_ok=True)
     print(f"[INFO] Imagens serão salvas em: {os.path.abspath(PASTA_SAIDA)}")
 
+    filtro = None
+    if DEDUPLICACAO_DATASET:
+        filtro = FiltroDuplicatas()
+        print(f"[INFO] Deduplicação ativa: {filtro.indexar_diretorio(PASTA_SAIDA)} imagens existentes indexadas.")
+
     cap = cv2.VideoCapture(ID_CAMERA)
     if not cap.isOpened():
         print("[ERRO] Não foi possível abrir a câmera. Verifique o ID da câmera.")
@@ -40,19 +51,32 @@ def capturar_imagens():
             print("\n[INFO] Encerrando o capturador.")
             break
         elif key == ord(' '): # Barra de espaço
+            if filtro is not None:
+                aceita, distancia = filtro.verificar(frame)
+                if not aceita:
+                    print(f"[DUPLICATA] Frame descartado: a {distancia} bits de uma imagem já salva.")
+                    continue
+
             # Gera um nome de arquivo único com base no timestamp
             timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S_%f")[:-3]
             nome_arquivo = f"capture_{timestamp}.jpg"
             caminho_completo = os.path.join(PASTA_SAIDA, nome_arquivo)
             
             # Salva o frame
-            cv2.imwrite(caminho_completo, frame)
+            salvo = cv2.imwrite(caminho_completo, frame)
+            if filtro is not None and salvo:
+                filtro.registrar_bytes(os.path.getsize(caminho_completo))
             capturas += 1
             print(f"[CAPTURA {capturas}] Imagem salva: {nome_arquivo}")
 
     cap.release()
     cv2.destroyAllWindows()
     print(f"\n[INFO] Sessão finalizada. Total de {capturas} imagens capturadas.")
+    if filtro is not None and filtro.avaliadas:
+        resumo = filtro.resumo()
+        caminho_resumo = os.path.join(PASTA_SAIDA, f"resumo_deduplicacao_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+        salvar_resumo(resumo, caminho_resumo)
+        print(f"[INFO] Deduplicação: {formatar_resumo(resumo)}. Resumo em '{caminho_resumo}'")
 
 if __name__ == "__main__":
     capturar_imagens()
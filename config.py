@@ -26,13 +26,152 @@ MODELOS = {
     'item_detector': 'modelos_producao/item_detector.pt',
     'roi_detector': 'modelos_producao/roi_detector.pt'
 }
+# Backend de inferência: 'ultralytics' (pesos .pt com PyTorch), 'onnxruntime' ou 'openvino'.
+# Os backends exportados geram (uma vez) artefatos ao lado dos pesos, identificados pelo hash do .pt.
+BACKEND_INFERENCIA = 'ultralytics'
+# Tamanho da imagem de entrada usado na exportação e nos backends exportados.
+TAMANHO_IMAGEM_INFERENCIA = 640
+# Precisão dos modelos: 'fp32' ou 'int8' (variantes geradas por quantizar_modelos.py, via ONNX Runtime).
+PRECISAO_INFERENCIA = 'fp32'
 # Limite de confiança para as detecções do modelo.
 CONFIDENCIA_LIMITE = 0.4
 # Configurações específicas para detecção de divisores
 CONFIDENCIA_DIVISOR = 0.3  # Confiança mais baixa para divisores
+# Classes do modelo de itens
+CLASSE_ITEM = 0
+CLASSE_DIVISOR = 1
+# Número máximo de frames por chamada aos modelos em Detector.detectar_lote
+TAMANHO_MAXIMO_LOTE = 8
+# Se True, o modelo de itens roda apenas sobre um recorte da ROI de maior área
+# (em vez do frame inteiro); as coordenadas são convertidas de volta para o frame.
+INFERENCIA_RECORTE_ROI = False
+# Margem do recorte, como fração da largura/altura da ROI
+MARGEM_RECORTE_ROI = 0.1
+
+# --- Configurações do Rastreamento da ROI ---
+# Se True, o modelo de ROI roda apenas a cada INTERVALO_DETECCAO_ROI frames (ou quando
+# o rastreamento perde confiança); nos demais frames a caixa é propagada por template matching.
+RASTREAMENTO_ROI = False
+INTERVALO_DETECCAO_ROI = 10
+# Correlação mínima do template matching para aceitar a ROI rastreada
+CONFIANCA_MINIMA_RASTREAMENTO = 0.7
+# Fator de redução do frame usado no rastreamento
+ESCALA_RASTREAMENTO_ROI = 0.25
+# Margem da janela de busca, como fração do tamanho da ROI
+MARGEM_BUSCA_RASTREAMENTO = 0.25
+
+# --- Configurações do Portão de Movimento ---
+# Se True, o SiacApp reutiliza o último resultado de detectar_objetos enquanto a região
+# da última ROI (reduzida e em tons de cinza) não mudar em relação ao frame da última inferência.
+PORTAO_MOVIMENTO = False
+ESCALA_PORTAO_MOVIMENTO = 0.25
+# Diferença de intensidade (0-255) para um pixel contar como alterado
+LIMIAR_PIXEL_MOVIMENTO = 25
+# Fração de pixels alterados a partir da qual a inferência volta a rodar
+LIMIAR_MOVIMENTO = 0.01
+# Máximo de frames consecutivos reutilizando o mesmo resultado
+IDADE_MAXIMA_REUSO = 15
 DEBUG_DIVISORES = False    # Ativar logs detalhados de divisores (desativado para reduzir spam)
 DEBUG_DIVISORES_VERBOSE = False  # Logs muito detalhados apenas quando necessário
 
+# --- Configurações de Logging ---
+# Se True, os handlers de console e arquivo rodam em uma thread de fundo
+# (QueueHandler/QueueListener): o loop de frames só enfileira o registro.
+LOG_ASSINCRONO = True
+# Tamanho máximo de logs/siac_AAAAMMDD.log antes da rotação; as partes
+# rotacionadas são comprimidas (.gz) e mantidas até LOG_QUANTIDADE_BACKUPS.
+LOG_TAMANHO_MAXIMO_MB = 20
+LOG_QUANTIDADE_BACKUPS = 10
+
+# --- Configurações de Auditoria ---
+# Eventos por caixa (início, camada completa, divisor verificado, alarme,
+# caixa completa/abortada) gravados em SQLite; consulta: consultar_auditoria.py.
+AUDITORIA_HABILITADA = True
+CAMINHO_AUDITORIA = 'logs/auditoria.db'
+
+# --- Configurações de Publicação de Alarmes ---
+# Se True, os eventos em EVENTOS_PUBLICADOS são enviados ao gateway da linha (CLP/MES)
+# por uma thread de fundo, sem bloquear a máquina de estados (ver publicador_alarmes.py).
+PUBLICACAO_ALARMES = False
+# Transporte: 'http' (POST de um array JSON), 'mqtt' (requer paho-mqtt) ou 'udp'
+TRANSPORTE_ALARMES = 'http'
+URL_ALARMES_HTTP = 'http://127.0.0.1:8080/siac/eventos'
+HOST_ALARMES = '127.0.0.1'
+PORTA_ALARMES_UDP = 9510
+PORTA_ALARMES_MQTT = 1883
+TOPICO_ALARMES_MQTT = 'siac/eventos'
+EVENTOS_PUBLICADOS = ('alarme', 'caixa_completa', 'caixa_abortada')
+# Timeout de cada envio, em segundos
+TIMEOUT_ALARMES = 2.0
+# Eventos aguardando envio em memória; além disso vão para o transbordo em disco
+TAMANHO_FILA_ALARMES = 1000
+TAMANHO_LOTE_ALARMES = 50
+INTERVALO_LOTE_ALARMES = 1.0
+# Tentativas por lote e limites da espera exponencial entre elas, em segundos
+TENTATIVAS_ALARMES = 5
+BACKOFF_INICIAL_ALARMES = 0.5
+BACKOFF_MAXIMO_ALARMES = 30.0
+DIRETORIO_TRANSBORDO_ALARMES = 'logs/alarmes_pendentes'
+
+# --- Configurações de Execução ---
+# Modo de execução do loop principal: 'sequencial' ou 'pipeline'
+# (captura, detecção, estado e renderização em estágios paralelos).
+MODO_EXECUCAO = 'sequencial'
+# Tamanho máximo de cada fila entre estágios do pipeline.
+TAMANHO_FILA_PIPELINE = 4
+# Política da fila de frames capturados quando cheia: 'descartar_antigo' ou 'bloquear'.
+POLITICA_DESCARTE_PIPELINE = 'descartar_antigo'
+# Se True, roda sem janela (servidores sem display): não desenha os frames,
+# não chama cv2.imshow e encerra por SIGINT/SIGTERM em vez da tecla 'q'.
+MODO_HEADLESS = False
+# Se True (e fora do modo headless), o desenho e a janela rodam em uma thread própria
+# a no máximo FPS_RENDERIZACAO quadros por segundo; a detecção não espera pela exibição.
+RENDERIZACAO_ASSINCRONA = False
+FPS_RENDERIZACAO = 10
+
+# --- Configurações de Decodificação de Vídeo ---
+# A FonteVideo decodifica em uma thread de fundo com buffer circular de frames pré-alocados.
+# Backend: 'opencv' (cv2.VideoCapture) ou 'pyav' (PyAV/FFmpeg; requer o pacote av e não abre câmeras por índice).
+BACKEND_DECODIFICACAO = 'opencv'
+# Threads de decodificação do FFmpeg (0 = padrão do backend).
+THREADS_DECODIFICACAO = 0
+# Frames no buffer circular entre a decodificação e o loop principal.
+TAMANHO_BUFFER_DECODIFICACAO = 4
+# Se definido (ex.: TAMANHO_IMAGEM_INFERENCIA), reduz os frames já na decodificação para que o
+# maior lado não passe deste valor. A ROI e as distâncias em pixels da máquina de estados
+# (ex.: DISTANCIA_MINIMA_ITEM_NOVO) passam a valer na resolução reduzida.
+LADO_MAXIMO_DECODIFICACAO = None
+
+# --- Configurações do Controle de Carga ---
+# Se True, o loop sequencial compara o tempo de processamento por frame com o orçamento
+# e desce/sobe um nível de degradação por vez (ver controle_carga.py).
+CONTROLE_CARGA = False
+# Tempo alvo de processamento por frame capturado, em ms (nos níveis com pular_frames,
+# cada frame processado pode levar orcamento x pular_frames)
+ORCAMENTO_FRAME_MS = 66.0
+# Número de frames processados usados em cada decisão
+JANELA_CONTROLE_CARGA = 30
+# Volta um nível quando a média fica abaixo desta fração do orçamento
+MARGEM_RETORNO_CARGA = 0.6
+# Níveis do normal ao mais degradado: imgsz da inferência (None = padrão do backend),
+# intervalo do modelo de ROI (em frames) e processamento de 1 a cada N frames capturados.
+NIVEIS_DEGRADACAO = [
+    {'nome': 'normal', 'imgsz': None, 'intervalo_roi': 1, 'pular_frames': 1},
+    {'nome': 'imgsz_reduzido', 'imgsz': 480, 'intervalo_roi': 1, 'pular_frames': 1},
+    {'nome': 'roi_espacada', 'imgsz': 480, 'intervalo_roi': 5, 'pular_frames': 1},
+    {'nome': 'meio_quadro', 'imgsz': 480, 'intervalo_roi': 5, 'pular_frames': 2},
+    {'nome': 'minimo', 'imgsz': 320, 'intervalo_roi': 10, 'pular_frames': 3},
+]
+# Frames por arquivo na gravação de detecções (--gravar), usada para reprodução sem inferência.
+FRAMES_POR_PARTE_GRAVACAO = 9000
+
+# --- Configurações de Métricas ---
+# Endpoint HTTP local (/metrics, formato Prometheus) com latências por estágio,
+# inferências, frames descartados e tempo em cada estado.
+METRICAS_HABILITADAS = True
+HOST_METRICAS = '127.0.0.1'
+PORTA_METRICAS = 9108
+
 # --- Configurações de Estabilização e Memória ---
 # Número de frames consecutivos para uma detecção ser considerada "estável".
 TAMANHO_BUFFER_ESTABILIZACAO = 5
@@ -70,6 +209,17 @@ TEMPO_CARENCIA_PERDA_CAIXA = 3.0      # Carência antes de resetar por perda de
 # Sistema para evitar recontagem de itens entre camadas
 USAR_MEMORIA_ESPACIAL = True
 
+# --- Configurações de Deduplicação do Dataset ---
+# O extrator de frames e o capturador de imagens descartam imagens quase idênticas
+# a uma já aceita (hash perceptual por diferença de brilho, ver deduplicacao.py).
+DEDUPLICACAO_DATASET = True
+# Lado da grade do hash: LADO_HASH_DEDUP² bits por imagem.
+LADO_HASH_DEDUP = 16
+# Distância de Hamming (em bits) até a qual uma imagem é considerada duplicata.
+DISTANCIA_MAXIMA_DEDUP = 10
+# Tempo médio de rotulagem por imagem, para estimar o trabalho evitado (segundos).
+SEGUNDOS_ROTULAGEM_IMAGEM = 30
+
 # --- Constantes de Desenho e UI ---
 # Cores usadas para desenhar os elementos na tela (formato BGR).
 CORES = {
@@ -0,0 +1,65 @@
+import argparse
+import json
+import time
+from datetime import datetime
+
+from auditoria import EVENTOS, RESULTADOS, consultar_caixas, consultar_eventos
+from config import CAMINHO_AUDITORIA
+
+
+def _timestamp(texto):
+    """Converte 'AAAA-MM-DD' ou 'AAAA-MM-DD HH:MM[:SS]' (hora local) em timestamp."""
+    return datetime.fromisoformat(texto).timestamp()
+
+
+def _hora(timestamp):
+    return datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d %H:%M:%S') if timestamp is not None else '-'
+
+
+def imprimir_caixas(caixas):
+    print(f"{'Caixa':<24} | {'Origem':<10} | {'Início':<19} | {'Fim':<19} | {'Resultado':<12} | "
+          f"{'Camada':>6} | {'Itens':>5} | {'Alarmes':>7} | Motivo")
+    for caixa in caixas:
+        print(f"{caixa['caixa_id']:<24} | {caixa['origem']:<10} | {_hora(caixa['inicio']):<19} | {_hora(caixa['fim']):<19} | "
+              f"{caixa['resultado']:<12} | {caixa['camada_final'] if caixa['camada_final'] is not None else '-':>6} | "
+              f"{caixa['total_itens'] if caixa['total_itens'] is not None else '-':>5} | {caixa['alarmes']:>7} | "
+              f"{caixa['motivo'] or ''}")
+
+
+def imprimir_eventos(eventos):
+    print(f"{'Horário':<19} | {'Origem':<10} | {'Caixa':<24} | {'Evento':<18} | {'Camada':>6} | Dados")
+    for evento in eventos:
+        print(f"{_hora(evento['timestamp']):<19} | {evento['origem']:<10} | {evento['caixa_id'] or '-':<24} | "
+              f"{evento['tipo']:<18} | {evento['camada'] if evento['camada'] is not None else '-':>6} | "
+              f"{json.dumps(evento['dados'], ensure_ascii=False)}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Consulta o registro de auditoria das caixas (caixas por resultado, eventos por tipo ou caixa).")
+    parser.add_argument('consulta', type=str, choices=['caixas', 'eventos'], help="Tabela consultada.")
+    parser.add_argument('--banco', type=str, default=CAMINHO_AUDITORIA, help="Arquivo do banco de auditoria.")
+    parser.add_argument('--desde', type=_timestamp, default=None, help="Início do intervalo (ex.: 2024-05-14 ou '2024-05-14 08:00').")
+    parser.add_argument('--ate', type=_timestamp, default=None, help="Fim do intervalo, exclusivo (ex.: 2024-05-15).")
+    parser.add_argument('--resultado', type=str, default=None, choices=RESULTADOS, help="[caixas] Filtra pelo resultado.")
+    parser.add_argument('--tipo', type=str, default=None, choices=EVENTOS, help="[eventos] Filtra pelo tipo de evento.")
+    parser.add_argument('--caixa', type=str, default=None, help="[eventos] Lista os eventos de uma caixa.")
+    parser.add_argument('--origem', type=str, default=None, help="Filtra pela câmera/instância.")
+    parser.add_argument('--limite', type=int, default=None, help="Número máximo de linhas.")
+    parser.add_argument('--json', action='store_true', help="Imprime o resultado em JSON.")
+
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    if args.consulta == 'caixas':
+        linhas = consultar_caixas(args.banco, args.desde, args.ate, args.resultado, args.origem, args.limite)
+    else:
+        linhas = consultar_eventos(args.banco, args.desde, args.ate, args.tipo, args.caixa, args.origem, args.limite)
+    duracao_ms = (time.perf_counter() - inicio) * 1000
+
+    if args.json:
+        print(json.dumps(linhas, indent=2, ensure_ascii=False))
+    elif args.consulta == 'caixas':
+        imprimir_caixas(linhas)
+    else:
+        imprimir_eventos(linhas)
+    print(f"[INFO] {len(linhas)} registros em {duracao_ms:.1f} ms")
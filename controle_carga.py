@@ -0,0 +1,100 @@
+from collections import deque
+
+from config import (
+    NIVEIS_DEGRADACAO, ORCAMENTO_FRAME_MS, JANELA_CONTROLE_CARGA, MARGEM_RETORNO_CARGA
+)
+from logger_config import get_siac_logger
+import metricas
+
+
+class ControladorCarga:
+    """
+    Mantém o tempo de processamento por frame dentro de um orçamento,
+    descendo ou subindo um nível de degradação por vez.
+
+    Cada nível (ver NIVEIS_DEGRADACAO) define o `imgsz` da inferência, de
+    quantos em quantos frames o modelo de ROI roda e de quantos em quantos
+    frames capturados um é processado. A decisão usa a média de uma janela de
+    frames; depois de cada mudança a janela recomeça, para que o novo nível
+    seja medido antes da próxima decisão.
+
+    O orçamento vale por frame capturado: em um nível que processa um a cada
+    `pular_frames` frames, cada frame processado pode levar
+    `orcamento_ms * pular_frames` sem atrasar a captura.
+    """
+    def __init__(self, niveis=NIVEIS_DEGRADACAO, orcamento_ms=ORCAMENTO_FRAME_MS,
+                 janela=JANELA_CONTROLE_CARGA, margem_retorno=MARGEM_RETORNO_CARGA):
+        """
+        Args:
+            niveis: Lista de níveis, do normal (índice 0) ao mais degradado.
+            orcamento_ms: Tempo alvo de processamento por frame, em ms.
+            janela: Número de frames processados usados em cada decisão.
+            margem_retorno: Fração do orçamento abaixo da qual o controlador
+                volta um nível (histerese).
+        """
+        self.logger = get_siac_logger("CONTROLE_CARGA")
+        self.niveis = niveis
+        self.orcamento_ms = orcamento_ms
+        self.margem_retorno = margem_retorno
+        self.tempos_ms = deque(maxlen=max(1, int(janela)))
+        self.indice_nivel = 0
+        metricas.NIVEL_DEGRADACAO.definir(0)
+
+    @property
+    def nivel(self):
+        return self.niveis[self.indice_nivel]
+
+    @property
+    def degradado(self):
+        return self.indice_nivel > 0
+
+    def registrar(self, tempo_ms):
+        """
+        Registra o tempo de processamento de um frame e, com a janela cheia,
+        decide se o nível muda.
+
+        Returns:
+            True se o nível mudou (a configuração deve ser reaplicada).
+        """
+        self.tempos_ms.append(tempo_ms)
+        if len(self.tempos_ms) < self.tempos_ms.maxlen:
+            return False
+
+        media_ms = sum(self.tempos_ms) / len(self.tempos_ms)
+        if media_ms > self._orcamento_por_processado(self.indice_nivel) and self.indice_nivel < len(self.niveis) - 1:
+            self._mudar_nivel(self.indice_nivel + 1, media_ms)
+            return True
+        # Volta só se o frame processado couber, com folga, no orçamento do nível anterior
+        if self.indice_nivel > 0 and media_ms < self._orcamento_por_processado(self.indice_nivel - 1) * self.margem_retorno:
+            self._mudar_nivel(self.indice_nivel - 1, media_ms)
+            return True
+        return False
+
+    def _orcamento_por_processado(self, indice_nivel):
+        """Tempo disponível por frame processado no nível (o orçamento é por frame capturado)."""
+        return self.orcamento_ms * self.niveis[indice_nivel]['pular_frames']
+
+    def aplicar(self, detector):
+        """Aplica ao Detector o `imgsz` e o intervalo do modelo de ROI do nível atual."""
+        detector.imgsz = self.nivel['imgsz']
+        detector.intervalo_roi = self.nivel['intervalo_roi']
+
+    def processar_frame(self, indice_frame):
+        """Indica se o frame capturado de índice `indice_frame` deve ser processado no nível atual."""
+        return indice_frame % self.nivel['pular_frames'] == 0
+
+    def _mudar_nivel(self, novo_indice, media_ms):
+        direcao = 'degradar' if novo_indice > self.indice_nivel else 'restaurar'
+        anterior = self.nivel['nome']
+        self.indice_nivel = novo_indice
+        self.tempos_ms.clear()
+
+        mensagem = (f"Nível de carga: {anterior} -> {self.nivel['nome']} "
+                    f"(média {media_ms:.1f}ms por frame processado, orçamento {self.orcamento_ms}ms por frame capturado)")
+        if direcao == 'degradar':
+            self.logger.warning(mensagem)
+        else:
+            self.logger.info(mensagem)
+
+        metricas.NIVEL_DEGRADACAO.definir(novo_indice)
+        metricas.MUDANCAS_NIVEL_DEGRADACAO.incrementar(direcao)
@@ -0,0 +1,161 @@
+"""
+Filtro de imagens quase duplicadas para a montagem do dataset.
+
+Usado pelo extrator de frames e pelo capturador de imagens: cada imagem
+recebe um hash perceptual por diferença de brilho (dHash) e só é aceita se
+estiver a mais de uma distância de Hamming configurável de todas as imagens
+já aceitas. Trechos parados da linha viram uma imagem só, em vez de
+milhares quase iguais para enviar, rotular e treinar.
+"""
+
+import glob
+import json
+import os
+import cv2
+import numpy as np
+
+from config import LADO_HASH_DEDUP, DISTANCIA_MAXIMA_DEDUP, SEGUNDOS_ROTULAGEM_IMAGEM
+
+# Bits ligados em cada valor de byte, para a contagem da distância de Hamming
+_BITS_POR_BYTE = np.array([bin(valor).count('1') for valor in range(256)], dtype=np.uint16)
+
+
+def hash_perceptual(imagem, lado=LADO_HASH_DEDUP):
+    """
+    Retorna o dHash da imagem: reduzida para (lado + 1) x lado em tons de
+    cinza, cada bit indica se um pixel é mais claro que o vizinho à direita.
+    O resultado é um array de lado² / 64 palavras uint64.
+    """
+    reduzida = cv2.resize(imagem, (lado + 1, lado), interpolation=cv2.INTER_AREA)
+    if reduzida.ndim == 3:
+        reduzida = cv2.cvtColor(reduzida, cv2.COLOR_BGR2GRAY)
+    bits = (reduzida[:, 1:] > reduzida[:, :-1]).ravel()
+    return np.packbits(bits).view('>u8').astype(np.uint64)
+
+
+class FiltroDuplicatas:
+    """
+    Índice em memória dos hashes das imagens aceitas. A consulta compara o
+    hash com todo o índice de uma vez (XOR + contagem de bits vetorizados),
+    o que cobre dezenas de milhares de imagens em poucos milissegundos.
+    """
+    def __init__(self, distancia_maxima=DISTANCIA_MAXIMA_DEDUP, lado_hash=LADO_HASH_DEDUP):
+        """
+        Args:
+            distancia_maxima: Distância de Hamming (bits) até a qual uma
+                imagem é duplicata de uma já aceita.
+            lado_hash: Lado da grade do hash (lado² bits, múltiplo de 64).
+        """
+        if (lado_hash * lado_hash) % 64:
+            raise ValueError(f"lado_hash deve gerar um múltiplo de 64 bits: {lado_hash}")
+        self.distancia_maxima = int(distancia_maxima)
+        self.lado_hash = int(lado_hash)
+
+        # Hashes aceitos, com capacidade dobrada quando enche
+        self._hashes = np.empty((256, lado_hash * lado_hash // 64), dtype=np.uint64)
+        self._total = 0
+
+        # Métricas
+        self.avaliadas = 0
+        self.rejeitadas = 0
+        self.bytes_aceitos = 0
+        self.imagens_com_bytes = 0
+
+    def __len__(self):
+        return self._total
+
+    def distancia_minima(self, hash_imagem):
+        """Menor distância de Hamming entre o hash e o índice (None se vazio)."""
+        if self._total == 0:
+            return None
+        diferencas = np.bitwise_xor(self._hashes[:self._total], hash_imagem)
+        bits = _BITS_POR_BYTE[diferencas.view(np.uint8)].reshape(self._total, -1).sum(axis=1)
+        return int(bits.min())
+
+    def verificar(self, imagem):
+        """
+        Avalia a imagem e a adiciona ao índice se for nova.
+
+        Returns:
+            (aceita, distância mínima para o índice ou None se o índice estava vazio).
+        """
+        return self.verificar_hash(hash_perceptual(imagem, self.lado_hash))
+
+    def verificar_hash(self, hash_imagem):
+        """
+        Como `verificar`, a partir do hash já calculado (ex.: por um processo
+        que consulta um índice mantido em outro).
+        """
+        distancia = self.distancia_minima(hash_imagem)
+        self.avaliadas += 1
+        if distancia is not None and distancia <= self.distancia_maxima:
+            self.rejeitadas += 1
+            return False, distancia
+        self.adicionar(hash_imagem)
+        return True, distancia
+
+    def adicionar(self, hash_imagem):
+        """Adiciona um hash ao índice sem avaliá-lo (ex.: imagens já no dataset)."""
+        if self._total == len(self._hashes):
+            self._hashes = np.concatenate((self._hashes, np.empty_like(self._hashes)))
+        self._hashes[self._total] = hash_imagem
+        self._total += 1
+
+    def indexar_diretorio(self, diretorio):
+        """Adiciona ao índice as imagens (.jpg, .jpeg, .png) já salvas no diretório. Retorna quantas."""
+        caminhos = []
+        for extensao in ("*.jpg", "*.jpeg", "*.png"):
+            caminhos.extend(glob.glob(os.path.join(diretorio, extensao)))
+        indexadas = 0
+        for caminho in caminhos:
+            imagem = cv2.imread(caminho, cv2.IMREAD_GRAYSCALE)
+            if imagem is not None:
+                self.adicionar(hash_perceptual(imagem, self.lado_hash))
+                indexadas += 1
+        return indexadas
+
+    def registrar_bytes(self, tamanho, imagens=1):
+        """
+        Registra o tamanho (bytes) de `imagens` imagens aceitas e salvas, para
+        estimar o espaço evitado.
+        """
+        if tamanho and imagens:
+            self.bytes_aceitos += int(tamanho)
+            self.imagens_com_bytes += int(imagens)
+
+    def resumo(self):
+        """Contagens do filtro, com o espaço e o tempo de rotulagem evitados estimados."""
+        return resumo_deduplicacao(self.avaliadas, self.rejeitadas, self.bytes_aceitos, self.imagens_com_bytes,
+                                   self.distancia_maxima, self.lado_hash)
+
+
+def resumo_deduplicacao(avaliadas, rejeitadas, bytes_aceitos, imagens_com_bytes, distancia_maxima, lado_hash):
+    """
+    Monta o resumo da deduplicação. O espaço evitado é estimado pelo tamanho
+    médio das imagens aceitas (as rejeitadas nem são codificadas).
+    """
+    tamanho_medio = bytes_aceitos / imagens_com_bytes if imagens_com_bytes else 0.0
+    return {
+        'avaliadas': avaliadas,
+        'aceitas': avaliadas - rejeitadas,
+        'rejeitadas': rejeitadas,
+        'taxa_rejeicao': rejeitadas / avaliadas if avaliadas else 0.0,
+        'distancia_maxima': distancia_maxima,
+        'lado_hash': lado_hash,
+        'bytes_aceitos': bytes_aceitos,
+        'bytes_evitados_estimados': int(rejeitadas * tamanho_medio),
+        'horas_rotulagem_evitadas_estimadas': rejeitadas * SEGUNDOS_ROTULAGEM_IMAGEM / 3600.0
+    }
+
+
+def salvar_resumo(resumo, caminho):
+    """Grava o resumo da deduplicação em JSON."""
+    with open(caminho, 'w', encoding='utf-8') as arquivo:
+        json.dump(resumo, arquivo, indent=2, ensure_ascii=False)
+
+
+def formatar_resumo(resumo):
+    """Linha de texto com o essencial do resumo, para os scripts."""
+    return (f"{resumo['rejeitadas']} de {resumo['avaliadas']} imagens descartadas como duplicatas "
+            f"({resumo['taxa_rejeicao']:.0%}), ~{resumo['bytes_evitados_estimados'] / 1e6:.1f} MB e "
+            f"~{resumo['horas_rotulagem_evitadas_estimadas']:.1f} h de rotulagem evitados")
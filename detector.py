@@ -1,16 +1,65 @@
-from ultralytics import YOLO
-from config import MODELOS, CONFIDENCIA_LIMITE, CONFIDENCIA_DIVISOR, DEBUG_DIVISORES, DEBUG_DIVISORES_VERBOSE
+from config import (
+    MODELOS, BACKEND_INFERENCIA, PRECISAO_INFERENCIA, CONFIDENCIA_LIMITE, CONFIDENCIA_DIVISOR, CLASSE_ITEM, CLASSE_DIVISOR,
+    TAMANHO_MAXIMO_LOTE, INFERENCIA_RECORTE_ROI, MARGEM_RECORTE_ROI, RASTREAMENTO_ROI,
+    DEBUG_DIVISORES, DEBUG_DIVISORES_VERBOSE
+)
+from backends import carregar_modelo
 from logger_config import get_siac_logger, SiacLogger
+from roi_tracker import RastreadorROI
+import metricas
 import os
 import time
+import numpy as np
+
+# Colunas do array de detecções Nx6: x1, y1, x2, y2, confiança, classe
+COLUNA_CONFIANCA = 4
+COLUNA_CLASSE = 5
+
+
+def deteccoes_vazias():
+    """Array de detecções Nx6 sem nenhuma linha."""
+    return np.empty((0, 6), dtype=np.float32)
+
+
+def roi_maior_area(rois):
+    """De um array Nx6 de ROIs, retorna a linha da ROI de maior área (ou None)."""
+    if len(rois) == 0:
+        return None
+    rois = np.asarray(rois)
+    areas = (rois[:, 2] - rois[:, 0]) * (rois[:, 3] - rois[:, 1])
+    return rois[int(np.argmax(areas))]
+
+
+def filtrar_centro_na_roi(deteccoes, roi):
+    """Retorna as linhas de `deteccoes` (Nx6) cujo centro está dentro da ROI."""
+    if len(deteccoes) == 0:
+        return deteccoes
+    deteccoes = np.asarray(deteccoes)
+    centro_x = (deteccoes[:, 0] + deteccoes[:, 2]) / 2
+    centro_y = (deteccoes[:, 1] + deteccoes[:, 3]) / 2
+    rx1, ry1, rx2, ry2 = roi[:4]
+    dentro = (rx1 < centro_x) & (centro_x < rx2) & (ry1 < centro_y) & (centro_y < ry2)
+    return deteccoes[dentro]
+
 
 class Detector:
     """
     Encapsula a lógica de detecção de objetos com os modelos YOLO.
     """
-    def __init__(self):
+    def __init__(self, tamanho_maximo_lote=TAMANHO_MAXIMO_LOTE, recorte_roi=INFERENCIA_RECORTE_ROI,
+                 rastreamento_roi=RASTREAMENTO_ROI, backend=BACKEND_INFERENCIA, precisao=PRECISAO_INFERENCIA):
         """
         Carrega os modelos de detecção de ROI e de itens.
+
+        Args:
+            tamanho_maximo_lote: Número máximo de frames por chamada aos
+                modelos em `detectar_lote`.
+            recorte_roi: Se True, o modelo de itens roda apenas sobre um
+                recorte (com margem) da ROI de maior área, em vez do frame inteiro.
+            rastreamento_roi: Se True, o modelo de ROI roda apenas de tempos em
+                tempos em `detectar_objetos`; nos demais frames a ROI é rastreada.
+            backend: Backend de inferência ('ultralytics', 'onnxruntime' ou 'openvino').
+            precisao: Precisão dos modelos ('fp32' ou 'int8').
         """
         self.logger = get_siac_logger("DETECTOR")
         
@@ -19,6 +68,22 @@ class Detector:
         self.intervalo_log_divisores = 5  # Log a cada 5 segundos
         self.ultimo_status_divisores = None
         
+        self.tamanho_maximo_lote = max(1, int(tamanho_maximo_lote))
+        self.recorte_roi = recorte_roi
+        self.rastreador_roi = RastreadorROI() if rastreamento_roi else None
+        self.backend = backend
+        self.precisao = precisao
+
+        # Ajustes de carga (ver controle_carga.py): imgsz da inferência (None = padrão
+        # do backend) e de quantos em quantos frames o modelo de ROI roda
+        self.imgsz = None
+        self.intervalo_roi = 1
+        self._caixas_anteriores = None
+        self._frames_sem_roi = 0
+
+        # Limite usado na inferência: o menor entre os limites por classe
+        self.confianca_minima = min(CONFIDENCIA_LIMITE, CONFIDENCIA_DIVISOR)
+        
         self.logger.info("Iniciando carregamento dos modelos de detecção")
         
         try:
@@ -31,16 +96,19 @@ class Detector:
             if not os.path.exists(item_model_path):
                 raise FileNotFoundError(f"Modelo de itens não encontrado: {item_model_path}")
             
+            self.logger.info(f"Backend de inferência: {backend} ({precisao})")
             self.logger.info(f"Carregando modelo ROI: {roi_model_path}")
-            self.roi_model = YOLO(roi_model_path)
+            self.roi_model = carregar_modelo(roi_model_path, backend, precisao=precisao)
             
             self.logger.info(f"Carregando modelo de itens: {item_model_path}")
-            self.item_model = YOLO(item_model_path)
+            self.item_model = carregar_modelo(item_model_path, backend, precisao=precisao)
             
             self.logger.info("Todos os modelos de detecção carregados com sucesso")
             self.logger.info(f"Confiança mínima configurada: {CONFIDENCIA_LIMITE}")
             self.logger.info(f"Confiança para divisores: {CONFIDENCIA_DIVISOR}")
             self.logger.info(f"Debug de divisores: {'Ativado' if DEBUG_DIVISORES else 'Desativado'}")
+            self.logger.info(f"Inferência de itens: {'Recorte da ROI' if self.recorte_roi else 'Frame inteiro'}")
+            self.logger.info(f"Rastreamento da ROI: {'Ativado' if self.rastreador_roi else 'Desativado'}")
             
         except Exception as e:
             SiacLogger.log_error_with_context(self.logger, e, "Carregamento dos modelos")
@@ -54,91 +122,265 @@ class Detector:
             frame: O frame do vídeo a ser processado.
 
         Returns:
-            Um dicionário contendo as listas de bounding boxes para cada classe:
-            {'caixas': [], 'itens': [], 'divisores': []}
+            Um dicionário com um array Nx6 (x1, y1, x2, y2, confiança, classe)
+            por grupo: 'caixas', 'itens', 'divisores' e 'divisores_baixa_confianca'.
         """
         try:
-            # 1. Detectar a ROI (caixas)
-            self.logger.debug("Executando detecção de ROI")
-            deteccoes_roi = self.roi_model.predict(source=frame, conf=CONFIDENCIA_LIMITE, verbose=False)[0]
-            caixas_detectadas = [list(map(int, box.xyxy[0].tolist())) for box in deteccoes_roi.boxes]
+            # 1. Detectar (ou rastrear) a ROI (caixas)
+            caixas_detectadas = self._detectar_caixas(frame)
+
+            # 2. Detectar Itens e Divisores em uma única inferência, no menor limite
+            # configurado; os limites por classe são aplicados no pós-processamento
+            imagem_itens, deslocamento = self._imagem_para_itens(frame, caixas_detectadas)
+            if imagem_itens is None:
+                return self._montar_resultado(caixas_detectadas, None)
 
-            # 2. Detectar Itens e Divisores com configurações específicas
             self.logger.debug("Executando detecção de itens e divisores")
+            inicio = time.perf_counter()
+            deteccoes_itens = self.item_model.predict(source=imagem_itens, conf=self.confianca_minima, verbose=False, **self._opcoes_predicao())[0]
+            metricas.LATENCIA_ESTAGIO.observar(time.perf_counter() - inicio, 'predicao_itens')
+            metricas.INFERENCIAS.incrementar('itens')
+
+            return self._montar_resultado(caixas_detectadas, deteccoes_itens, deslocamento)
             
-            # Detectar com confiança padrão primeiro
-            deteccoes_itens = self.item_model.predict(source=frame, conf=CONFIDENCIA_LIMITE, verbose=False)[0]
-            # Detectar divisores com confiança mais baixa
-            deteccoes_divisores = self.item_model.predict(source=frame, conf=CONFIDENCIA_DIVISOR, verbose=False)[0]
-            
-            itens_detectados = []
-            divisores_detectados = []
-            divisores_baixa_confianca = []
-
-            # Processar detecções com confiança padrão
-            for box in deteccoes_itens.boxes:
-                coords = list(map(int, box.xyxy[0].tolist()))
-                confianca = float(box.conf[0])
-                
-                # Classe 0 é 'item', Classe 1 é 'divisor'
-                if int(box.cls) == 0:
-                    itens_detectados.append(coords)
-                    self.logger.debug(f"Item detectado com confiança {confianca:.2f}: {coords}")
-                elif int(box.cls) == 1:
-                    divisores_detectados.append(coords)
-                    if DEBUG_DIVISORES_VERBOSE:
-                        self.logger.info(f"Divisor detectado (alta confiança) {confianca:.2f}: {coords}")
+        except Exception as e:
+            SiacLogger.log_error_with_context(self.logger, e, "Detecção de objetos")
+            # Em caso de erro, retorna detecções vazias
+            return self._resultado_vazio()
+
+    def detectar_lote(self, frames):
+        """
+        Executa a detecção em uma lista de frames, chamando cada modelo uma
+        única vez por lote (até `tamanho_maximo_lote` frames por chamada).
+        Os frames podem vir de fontes diferentes, então o rastreamento da ROI
+        não é aplicado aqui.
+
+        Args:
+            frames: Lista de frames a serem processados.
+
+        Returns:
+            Lista com um dicionário por frame, na mesma ordem e no mesmo
+            formato de `detectar_objetos`.
+        """
+        resultados = []
+        for inicio in range(0, len(frames), self.tamanho_maximo_lote):
+            lote = frames[inicio:inicio + self.tamanho_maximo_lote]
+            try:
+                self.logger.debug("Executando detecção em lote de %d frames", len(lote))
+                inicio_predicao = time.perf_counter()
+                deteccoes_roi = self.roi_model.predict(source=lote, conf=CONFIDENCIA_LIMITE, verbose=False, **self._opcoes_predicao())
+                # Latência do lote inteiro; as inferências contam um frame cada
+                metricas.LATENCIA_ESTAGIO.observar(time.perf_counter() - inicio_predicao, 'predicao_roi')
+                metricas.INFERENCIAS.incrementar('roi', valor=len(lote))
+                caixas_por_frame = [self._extrair_caixas(deteccoes) for deteccoes in deteccoes_roi]
+
+                # Frames sem ROI no modo de recorte não passam pelo modelo de itens
+                entradas = [self._imagem_para_itens(frame, caixas) for frame, caixas in zip(lote, caixas_por_frame)]
+                imagens_itens = [imagem for imagem, _ in entradas if imagem is not None]
+                deteccoes_itens = iter([])
+                if imagens_itens:
+                    inicio_predicao = time.perf_counter()
+                    deteccoes_itens = iter(self.item_model.predict(source=imagens_itens, conf=self.confianca_minima,
+                                                                   verbose=False, **self._opcoes_predicao()))
+                    metricas.LATENCIA_ESTAGIO.observar(time.perf_counter() - inicio_predicao, 'predicao_itens')
+                    metricas.INFERENCIAS.incrementar('itens', valor=len(imagens_itens))
+
+                for caixas, (imagem, deslocamento) in zip(caixas_por_frame, entradas):
+                    itens = next(deteccoes_itens) if imagem is not None else None
+                    resultados.append(self._montar_resultado(caixas, itens, deslocamento))
+
+            except Exception as e:
+                SiacLogger.log_error_with_context(self.logger, e, "Detecção em lote")
+                # Em caso de erro, retorna detecções vazias para os frames do lote
+                resultados.extend(self._resultado_vazio() for _ in lote)
+
+        return resultados
+
+    def _detectar_caixas(self, frame):
+        """
+        Obtém as caixas de ROI do frame. Com o rastreamento ativado, reutiliza
+        a última ROI propagada pelo rastreador enquanto ele mantiver confiança,
+        e só executa o modelo de ROI quando necessário.
+
+        Returns:
+            Array Nx6 das caixas. A confiança de uma ROI rastreada é a
+            correlação do template matching.
+        """
+        if self.rastreador_roi is not None and not self.rastreador_roi.precisa_detectar():
+            roi_rastreada = self.rastreador_roi.rastrear(frame)
+            if roi_rastreada is not None:
+                metricas.ROI_RASTREADA.incrementar()
+                return np.array([[*roi_rastreada, self.rastreador_roi.ultima_confianca, 0]], dtype=np.float32)
+
+        if self.intervalo_roi > 1 and self._caixas_anteriores is not None and self._frames_sem_roi < self.intervalo_roi - 1:
+            self._frames_sem_roi += 1
+            return self._caixas_anteriores
+
+        self.logger.debug("Executando detecção de ROI")
+        inicio = time.perf_counter()
+        deteccoes_roi = self.roi_model.predict(source=frame, conf=CONFIDENCIA_LIMITE, verbose=False, **self._opcoes_predicao())[0]
+        metricas.LATENCIA_ESTAGIO.observar(time.perf_counter() - inicio, 'predicao_roi')
+        metricas.INFERENCIAS.incrementar('roi')
+        caixas_detectadas = self._extrair_caixas(deteccoes_roi)
+        self._caixas_anteriores = caixas_detectadas
+        self._frames_sem_roi = 0
+
+        if self.rastreador_roi is not None:
+            roi = roi_maior_area(caixas_detectadas)
+            self.rastreador_roi.reiniciar(frame, None if roi is None else roi[:4].astype(int).tolist())
+        return caixas_detectadas
+
+    def _extrair_caixas(self, deteccoes_roi):
+        """Converte o resultado do modelo de ROI no array Nx6 de caixas."""
+        return self._para_array(deteccoes_roi)
+
+    @staticmethod
+    def _para_array(deteccoes, deslocamento=(0, 0)):
+        """
+        Converte `deteccoes.boxes.data` (tensor ou array Nx6) em um array
+        float32 com as coordenadas truncadas para pixels inteiros e
+        deslocadas de volta para o espaço do frame.
+        """
+        dados = deteccoes.boxes.data
+        if hasattr(dados, 'cpu'):
+            dados = dados.cpu().numpy()
+        dados = np.array(dados, dtype=np.float32).reshape(-1, 6)
+        dados[:, :4] = np.floor(dados[:, :4])
+        dx, dy = deslocamento
+        if dx or dy:
+            dados[:, [0, 2]] += dx
+            dados[:, [1, 3]] += dy
+        return dados
+
+    def _opcoes_predicao(self):
+        return {'imgsz': self.imgsz} if self.imgsz else {}
+
+    @staticmethod
+    def _resultado_vazio():
+        return {
+            'caixas': deteccoes_vazias(),
+            'itens': deteccoes_vazias(),
+            'divisores': deteccoes_vazias(),
+            'divisores_baixa_confianca': deteccoes_vazias()
+        }
+
+    def _imagem_para_itens(self, frame, caixas_detectadas):
+        """
+        Define a imagem que será enviada ao modelo de itens.
+
+        No modo normal é o próprio frame. No modo de recorte é a ROI de maior
+        área expandida por MARGEM_RECORTE_ROI (limitada às bordas do frame);
+        sem ROI detectada, o modelo de itens não precisa rodar.
+
+        Returns:
+            Tupla (imagem ou None, deslocamento (x, y) do recorte no frame).
+        """
+        if not self.recorte_roi:
+            return frame, (0, 0)
+
+        roi = roi_maior_area(caixas_detectadas)
+        if roi is None:
+            return None, (0, 0)
+
+        altura, largura = frame.shape[:2]
+        x1, y1, x2, y2 = map(int, roi[:4])
+        margem_x = int((x2 - x1) * MARGEM_RECORTE_ROI)
+        margem_y = int((y2 - y1) * MARGEM_RECORTE_ROI)
+        x1, y1 = max(0, x1 - margem_x), max(0, y1 - margem_y)
+        x2, y2 = min(largura, x2 + margem_x), min(altura, y2 + margem_y)
+
+        if x2 <= x1 or y2 <= y1:
+            return None, (0, 0)
+        return frame[y1:y2, x1:x2], (x1, y1)
+
+    def _montar_resultado(self, caixas_detectadas, deteccoes_itens, deslocamento=(0, 0)):
+        """
+        Converte os resultados dos dois modelos para um frame no dicionário
+        de detecções usado pelo restante do sistema.
+
+        Args:
+            caixas_detectadas: Array Nx6 das caixas de ROI do frame.
+            deteccoes_itens: Resultado do modelo de itens (None se não executado).
+            deslocamento: Posição (x, y) da imagem de itens dentro do frame.
+
+        Returns:
+            Dicionário no formato de `detectar_objetos`.
+        """
+        if deteccoes_itens is None:
+            itens_detectados = divisores_detectados = divisores_baixa_confianca = deteccoes_vazias()
+        else:
+            itens_detectados, divisores_detectados, divisores_baixa_confianca = self._separar_por_classe(
+                deteccoes_itens, deslocamento
+            )
+
+        # Log inteligente sobre divisores (evita spam)
+        if DEBUG_DIVISORES:
+            current_time = time.time()
+            total_divisores_candidatos = len(divisores_detectados) + len(divisores_baixa_confianca)
+            status_atual = f"alta:{len(divisores_detectados)},baixa:{len(divisores_baixa_confianca)}"
             
-            # Processar detecções de divisores com confiança baixa
-            for box in deteccoes_divisores.boxes:
-                coords = list(map(int, box.xyxy[0].tolist()))
-                confianca = float(box.conf[0])
+            # Só loga se o status mudou OU se passou tempo suficiente
+            if (status_atual != self.ultimo_status_divisores or 
+                current_time - self.ultimo_log_divisores > self.intervalo_log_divisores):
                 
-                if int(box.cls) == 1 and confianca < CONFIDENCIA_LIMITE:
-                    # Divisor com confiança baixa, não adicionado à lista principal
-                    divisores_baixa_confianca.append((coords, confianca))
-                    if DEBUG_DIVISORES_VERBOSE:
-                        self.logger.warning(f"Divisor detectado (baixa confiança) {confianca:.2f}: {coords}")
-            
-            # Log inteligente sobre divisores (evita spam)
-            if DEBUG_DIVISORES:
-                current_time = time.time()
-                total_divisores_candidatos = len(divisores_detectados) + len(divisores_baixa_confianca)
-                status_atual = f"alta:{len(divisores_detectados)},baixa:{len(divisores_baixa_confianca)}"
+                if total_divisores_candidatos == 0:
+                    self.logger.warning("NENHUM DIVISOR detectado!")
+                else:
+                    self.logger.info(f"Divisores: {len(divisores_detectados)} (alta conf.) + {len(divisores_baixa_confianca)} (baixa conf.)")
                 
-                # Só loga se o status mudou OU se passou tempo suficiente
-                if (status_atual != self.ultimo_status_divisores or 
-                    current_time - self.ultimo_log_divisores > self.intervalo_log_divisores):
-                    
-                    if total_divisores_candidatos == 0:
-                        self.logger.warning("NENHUM DIVISOR detectado!")
-                    else:
-                        self.logger.info(f"Divisores: {len(divisores_detectados)} (alta conf.) + {len(divisores_baixa_confianca)} (baixa conf.)")
-                    
-                    self.ultimo_log_divisores = current_time
-                    self.ultimo_status_divisores = status_atual
-
-            # Log do resultado final
-            total_deteccoes = len(caixas_detectadas) + len(itens_detectados) + len(divisores_detectados)
-            if total_deteccoes > 0:
-                self.logger.debug(f"Detecção concluída - ROI: {len(caixas_detectadas)}, Itens: {len(itens_detectados)}, Divisores: {len(divisores_detectados)}")
-            
-            # Log específico para debug de divisores (apenas se verboso)
-            if DEBUG_DIVISORES_VERBOSE and len(divisores_baixa_confianca) > 0:
-                self.logger.info(f"Divisores com baixa confiança disponíveis: {len(divisores_baixa_confianca)}")
-
-            return {
-                'caixas': caixas_detectadas,
-                'itens': itens_detectados,
-                'divisores': divisores_detectados,
-                'divisores_baixa_confianca': divisores_baixa_confianca  # Para debug
-            }
-            
-        except Exception as e:
-            SiacLogger.log_error_with_context(self.logger, e, "Detecção de objetos")
-            # Em caso de erro, retorna listas vazias
-            return {
-                'caixas': [],
-                'itens': [],
-                'divisores': []
-            }
\ No newline at end of file
+                self.ultimo_log_divisores = current_time
+                self.ultimo_status_divisores = status_atual
+
+        # Log do resultado final
+        total_deteccoes = len(caixas_detectadas) + len(itens_detectados) + len(divisores_detectados)
+        if total_deteccoes > 0:
+            self.logger.debug("Detecção concluída - ROI: %d, Itens: %d, Divisores: %d",
+                              len(caixas_detectadas), len(itens_detectados), len(divisores_detectados))
+        
+        # Log específico para debug de divisores (apenas se verboso)
+        if DEBUG_DIVISORES_VERBOSE and len(divisores_baixa_confianca) > 0:
+            self.logger.info(f"Divisores com baixa confiança disponíveis: {len(divisores_baixa_confianca)}")
+
+        return {
+            'caixas': caixas_detectadas,
+            'itens': itens_detectados,
+            'divisores': divisores_detectados,
+            'divisores_baixa_confianca': divisores_baixa_confianca  # Para debug
+        }
+
+    def _separar_por_classe(self, deteccoes, deslocamento=(0, 0)):
+        """
+        Aplica os limites de confiança por classe sobre o resultado de uma
+        única inferência do modelo de itens.
+
+        Reproduz as duas passagens antigas (uma em CONFIDENCIA_LIMITE e outra
+        em CONFIDENCIA_DIVISOR): itens e divisores exigem confiança acima de
+        CONFIDENCIA_LIMITE, e divisores entre CONFIDENCIA_DIVISOR e
+        CONFIDENCIA_LIMITE vão para a lista de baixa confiança.
+
+        Args:
+            deteccoes: Resultado do YOLO (com o atributo `boxes`).
+            deslocamento: Posição (x, y) da imagem inferida dentro do frame,
+                somada às coordenadas para voltar ao espaço do frame.
+
+        Returns:
+            Tupla de arrays Nx6 (itens, divisores, divisores_baixa_confianca).
+        """
+        dados = self._para_array(deteccoes, deslocamento)
+        confianca = dados[:, COLUNA_CONFIANCA]
+        classe = dados[:, COLUNA_CLASSE]
+        acima_do_limite = confianca > CONFIDENCIA_LIMITE
+        eh_divisor = classe == CLASSE_DIVISOR
+
+        itens_detectados = dados[(classe == CLASSE_ITEM) & acima_do_limite]
+        divisores_detectados = dados[eh_divisor & acima_do_limite]
+        # Divisores com confiança baixa não entram na lista principal
+        divisores_baixa_confianca = dados[eh_divisor & (confianca > CONFIDENCIA_DIVISOR) & (confianca < CONFIDENCIA_LIMITE)]
+
+        if DEBUG_DIVISORES_VERBOSE:
+            for divisor in divisores_detectados:
+                self.logger.info(f"Divisor detectado (alta confiança) {divisor[COLUNA_CONFIANCA]:.2f}: {divisor[:4].astype(int).tolist()}")
+            for divisor in divisores_baixa_confianca:
+                self.logger.warning(f"Divisor detectado (baixa confiança) {divisor[COLUNA_CONFIANCA]:.2f}: {divisor[:4].astype(int).tolist()}")
+
+        return itens_detectados, divisores_detectados, divisores_baixa_confianca
@@ -1,43 +1,252 @@
-import cv2
+import argparse
+import multiprocessing
 import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+import cv2
+
+from config import DEDUPLICACAO_DATASET, DISTANCIA_MAXIMA_DEDUP
+from deduplicacao import FiltroDuplicatas, hash_perceptual, formatar_resumo, salvar_resumo
+from utils.videos_teste import listar_videos
 
 # --- Configurações ---
-VIDEO_SOURCE = r"c:\Users\ti-005\Desktop\pvcf_gpt\videos_test\WhatsApp Video 2025-07-08 at 14.06.58.mp4"
-OUTPUT_DIR = "dataset/images"
+OUTPUT_DIR = os.path.join("dataset", "images")
 FRAME_INTERVAL = 15 # Salvar um frame a cada 15 frames
+QUALIDADE_JPEG = 95
+THREADS_ESCRITA = 4
+# A partir deste intervalo, buscar (seek) o próximo frame salvo sai mais barato que
+# passar por todos os frames intermediários com grab()
+INTERVALO_MINIMO_BUSCA = 150
 # ---------------------
 
-def extrair_frames():
+
+def coletar_videos(entradas):
+    """Expande as entradas (arquivos de vídeo ou diretórios) em uma lista de vídeos."""
+    videos = []
+    for entrada in entradas:
+        if os.path.isdir(entrada):
+            videos.extend(listar_videos(entrada))
+        elif os.path.isfile(entrada):
+            videos.append(entrada)
+        else:
+            print(f"[AVISO] Entrada ignorada (não encontrada): {entrada}")
+    return videos
+
+
+def salvar_jpeg(caminho, frame, parametros):
+    """Codifica e grava o frame em JPEG. Retorna o tamanho do arquivo em bytes (0 em falha)."""
+    ok, dados = cv2.imencode('.jpg', frame, parametros)
+    if not ok:
+        return 0
+    dados.tofile(caminho)
+    return len(dados)
+
+
+class ConsultaDuplicatas:
     """
-    Extrai frames de um vídeo e os salva em um diretório de saída.
+    Consulta, a partir de um processo de extração, o índice único de
+    duplicatas mantido pelo processo principal (ver `extrair_frames`). O hash
+    é calculado no processo de extração; o principal só compara com o índice
+    e responde se o frame é novo.
     """
-    # Cria o diretório de saída se não existir
-    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    def __init__(self, pedidos, respostas, chave, lado_hash):
+        self.pedidos = pedidos
+        self.respostas = respostas
+        self.chave = chave
+        self.lado_hash = lado_hash
 
-    cap = cv2.VideoCapture(VIDEO_SOURCE)
-    if not cap.isOpened():
-        print(f"Erro: Não foi possível abrir o vídeo em '{VIDEO_SOURCE}'")
-        return
+    def __call__(self, frame):
+        self.pedidos.put((self.chave, hash_perceptual(frame, self.lado_hash)))
+        return self.respostas.get()
 
-    frame_count = 0
-    saved_count = 0
+
+def _responder_consultas(filtro, pedidos, respostas):
+    """Atende as consultas dos processos de extração até receber None."""
     while True:
-        ret, frame = cap.read()
-        if not ret:
-            print("[INFO] Fim do vídeo.")
+        pedido = pedidos.get()
+        if pedido is None:
             break
+        chave, hash_frame = pedido
+        respostas[chave].put(filtro.verificar_hash(hash_frame)[0])
+
+
+def extrair_video(caminho_video, diretorio_saida, intervalo=FRAME_INTERVAL, qualidade=QUALIDADE_JPEG,
+                  threads_escrita=THREADS_ESCRITA, modo_salto='auto', consulta_dedup=None):
+    """
+    Salva um frame a cada `intervalo` frames de um vídeo, descartando os
+    quase idênticos a uma imagem já aceita (de qualquer vídeo ou já no
+    diretório de saída), segundo `consulta_dedup`.
+
+    Os frames descartados não são convertidos para imagem: com grab() o
+    decodificador apenas avança, e com a busca (seek) os trechos entre os
+    frames salvos nem são lidos. A codificação JPEG e a escrita em disco
+    rodam em um pool de threads, enquanto esta thread segue decodificando.
+
+    Args:
+        modo_salto: 'grab', 'busca' ou 'auto' (busca a partir de
+            INTERVALO_MINIMO_BUSCA frames).
+        consulta_dedup: Função que recebe o frame e retorna se ele é novo
+            (ex.: ConsultaDuplicatas). None = sem deduplicação.
+
+    Returns:
+        Dicionário com o vídeo, frames percorridos, imagens salvas, bytes
+        gravados, duplicatas descartadas, duração (s) e a mensagem de erro,
+        se houver.
+    """
+    resumo = {'video': caminho_video, 'frames': 0, 'salvos': 0, 'bytes': 0, 'duplicatas': 0, 'duracao_s': 0.0,
+              'erro': None}
+    inicio = time.perf_counter()
+    cap = cv2.VideoCapture(caminho_video)
+    if not cap.isOpened():
+        resumo['erro'] = "Não foi possível abrir o vídeo"
+        return resumo
 
-        # Salva o frame no intervalo especificado
-        if frame_count % FRAME_INTERVAL == 0:
-            output_path = os.path.join(OUTPUT_DIR, f"frame_{saved_count:04d}.jpg")
-            cv2.imwrite(output_path, frame)
-            print(f"Salvo: {output_path}")
-            saved_count += 1
-        
-        frame_count += 1
+    intervalo = max(1, int(intervalo))
+    usar_busca = modo_salto == 'busca' or (modo_salto == 'auto' and intervalo >= INTERVALO_MINIMO_BUSCA)
+    prefixo = os.path.splitext(os.path.basename(caminho_video))[0]
+    parametros = [cv2.IMWRITE_JPEG_QUALITY, int(qualidade)]
+    total_video = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+
+    def concluir(futuro):
+        tamanho = futuro.result()
+        resumo['salvos'] += bool(tamanho)
+        resumo['bytes'] += tamanho
+
+    indice = 0
+    try:
+        with ThreadPoolExecutor(max_workers=threads_escrita) as escritores:
+            # Limita as escritas pendentes para não acumular frames na memória se o disco for lento
+            pendentes = deque()
+            while True:
+                if usar_busca:
+                    if total_video > 0 and indice >= total_video:
+                        break
+                    if indice > 0 and not cap.set(cv2.CAP_PROP_POS_FRAMES, indice):
+                        break
+                elif indice % intervalo:
+                    if not cap.grab():
+                        break
+                    indice += 1
+                    continue
+
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                if consulta_dedup is not None and not consulta_dedup(frame):
+                    resumo['duplicatas'] += 1
+                else:
+                    caminho_saida = os.path.join(diretorio_saida, f"{prefixo}_frame_{indice:06d}.jpg")
+                    pendentes.append(escritores.submit(salvar_jpeg, caminho_saida, frame, parametros))
+                    if len(pendentes) >= 2 * threads_escrita:
+                        concluir(pendentes.popleft())
+                indice += intervalo if usar_busca else 1
+
+            while pendentes:
+                concluir(pendentes.popleft())
+    except Exception as e:
+        resumo['erro'] = str(e)
+    finally:
+        cap.release()
+
+    resumo['frames'] = min(indice, total_video) if usar_busca and total_video > 0 else indice
+    resumo['duracao_s'] = time.perf_counter() - inicio
+    return resumo
+
+
+def extrair_frames(videos, diretorio_saida=OUTPUT_DIR, intervalo=FRAME_INTERVAL, processos=None,
+                   threads_escrita=THREADS_ESCRITA, qualidade=QUALIDADE_JPEG, modo_salto='auto',
+                   distancia_dedup=DISTANCIA_MAXIMA_DEDUP if DEDUPLICACAO_DATASET else None):
+    """
+    Extrai frames de vários vídeos em paralelo (um processo por vídeo) e os
+    salva em um diretório de saída. Com a deduplicação, um único índice no
+    processo principal, iniciado com as imagens já no diretório de saída,
+    decide quais frames de todos os vídeos são salvos; o resumo é gravado em
+    `resumo_deduplicacao_<data>.json` no diretório de saída.
+
+    Returns:
+        Lista com o resumo de cada vídeo (ver `extrair_video`).
+    """
+    os.makedirs(diretorio_saida, exist_ok=True)
+    processos = max(1, min(processos or os.cpu_count() or 1, len(videos)))
+    print(f"[INFO] Extraindo {len(videos)} vídeo(s) com {processos} processo(s) e {threads_escrita} thread(s) "
+          f"de escrita por vídeo, 1 frame a cada {intervalo}")
+
+    filtro = None
+    if distancia_dedup is not None:
+        filtro = FiltroDuplicatas(distancia_dedup)
+        indexadas = filtro.indexar_diretorio(diretorio_saida)
+        if indexadas:
+            print(f"[INFO] {indexadas} imagens já em '{diretorio_saida}' indexadas para a deduplicação")
+
+    inicio = time.perf_counter()
+    resumos = []
+    with multiprocessing.Manager() as gerenciador, ProcessPoolExecutor(max_workers=processos) as executor:
+        consultas = [None] * len(videos)
+        if filtro is not None:
+            pedidos = gerenciador.Queue()
+            respostas = [gerenciador.Queue() for _ in videos]
+            consultas = [ConsultaDuplicatas(pedidos, respostas[chave], chave, filtro.lado_hash)
+                         for chave in range(len(videos))]
+            servidor = threading.Thread(target=_responder_consultas, args=(filtro, pedidos, respostas), daemon=True)
+            servidor.start()
+
+        futuros = [executor.submit(extrair_video, video, diretorio_saida, intervalo, qualidade, threads_escrita,
+                                   modo_salto, consulta)
+                   for video, consulta in zip(videos, consultas)]
+        for futuro in as_completed(futuros):
+            resumo = futuro.result()
+            resumos.append(resumo)
+            if filtro is not None:
+                filtro.registrar_bytes(resumo['bytes'], resumo['salvos'])
+            if resumo['erro']:
+                print(f"[ERRO] {resumo['video']}: {resumo['erro']}")
+                continue
+            fps = resumo['frames'] / resumo['duracao_s'] if resumo['duracao_s'] > 0 else 0.0
+            duplicatas = f", {resumo['duplicatas']} duplicatas descartadas" if filtro is not None else ""
+            print(f"[INFO] {resumo['video']}: {resumo['salvos']} imagens de {resumo['frames']} frames "
+                  f"em {resumo['duracao_s']:.1f}s ({fps:.0f} frames/s{duplicatas})")
+
+        if filtro is not None:
+            pedidos.put(None)
+            servidor.join()
+
+    duracao = time.perf_counter() - inicio
+    total_frames = sum(resumo['frames'] for resumo in resumos)
+    total_salvos = sum(resumo['salvos'] for resumo in resumos)
+    print(f"\nExtração concluída. Total de {total_salvos} frames salvos em '{diretorio_saida}'.")
+    print(f"[INFO] {total_frames} frames percorridos em {duracao:.1f}s "
+          f"({total_frames / duracao if duracao > 0 else 0.0:.0f} frames/s, "
+          f"{total_salvos / duracao if duracao > 0 else 0.0:.1f} imagens/s)")
+
+    if filtro is not None:
+        resumo_dedup = filtro.resumo()
+        caminho_resumo = os.path.join(diretorio_saida, f"resumo_deduplicacao_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+        salvar_resumo(resumo_dedup, caminho_resumo)
+        print(f"[INFO] Deduplicação: {formatar_resumo(resumo_dedup)}. Resumo em '{caminho_resumo}'")
+    return resumos
 
-    cap.release()
-    print(f"\nExtração concluída. Total de {saved_count} frames salvos em '{OUTPUT_DIR}'.")
 
 if __name__ == "__main__":
-    extrair_frames()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Extrai frames de vídeos para o dataset, em paralelo.")
+    parser.add_argument('entradas', nargs='+', help="Arquivos de vídeo e/ou diretórios com vídeos.")
+    parser.add_argument('--saida', type=str, default=OUTPUT_DIR, help="Diretório das imagens extraídas.")
+    parser.add_argument('--intervalo', type=int, default=FRAME_INTERVAL, help="Salva um frame a cada N frames.")
+    parser.add_argument('--processos', type=int, default=None, help="Vídeos processados em paralelo (padrão: número de CPUs).")
+    parser.add_argument('--threads_escrita', type=int, default=THREADS_ESCRITA, help="Threads de codificação/escrita JPEG por vídeo.")
+    parser.add_argument('--qualidade', type=int, default=QUALIDADE_JPEG, help="Qualidade JPEG (0-100).")
+    parser.add_argument('--modo_salto', type=str, default='auto', choices=['auto', 'grab', 'busca'],
+                        help=f"Como pular os frames não salvos ('auto' busca a partir de intervalo {INTERVALO_MINIMO_BUSCA}).")
+    parser.add_argument('--distancia_dedup', type=int, default=DISTANCIA_MAXIMA_DEDUP, help="Distância de Hamming (bits) até a qual um frame é duplicata.")
+    parser.add_argument('--sem_dedup', action='store_true', default=not DEDUPLICACAO_DATASET, help="Salva todos os frames, sem descartar duplicatas.")
+
+    args = parser.parse_args()
+
+    videos = coletar_videos(args.entradas)
+    if not videos:
+        print("[ERRO] Nenhum vídeo encontrado nas entradas informadas.")
+    else:
+        extrair_frames(videos, args.saida, args.intervalo, args.processos, args.threads_escrita, args.qualidade,
+                       args.modo_salto, None if args.sem_dedup else args.distancia_dedup)
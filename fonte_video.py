@@ -0,0 +1,295 @@
+"""
+Fonte de vídeo com decodificação em thread de fundo.
+
+`FonteVideo` substitui `cv2.VideoCapture` nos loops do SIAC (mesmos
+`isOpened`, `read`, `get` e `release`): uma thread decodifica os frames
+(pelo OpenCV ou pelo PyAV/FFmpeg, com número de threads de decodificação
+configurável) em um buffer circular pré-alocado, opcionalmente já reduzidos
+para a resolução da inferência. O loop principal só recebe o próximo frame
+pronto, sem esperar pela decodificação.
+"""
+
+import queue
+import threading
+import time
+import cv2
+import numpy as np
+
+from config import (
+    BACKEND_DECODIFICACAO, THREADS_DECODIFICACAO, TAMANHO_BUFFER_DECODIFICACAO, LADO_MAXIMO_DECODIFICACAO
+)
+from logger_config import get_siac_logger
+import metricas
+
+BACKENDS_DECODIFICACAO = ('opencv', 'pyav')
+
+# Marcador de fim do vídeo no buffer de frames prontos
+_FIM = object()
+
+
+def fonte_ao_vivo(fonte):
+    """Indica se a fonte é uma câmera (índice) ou um stream de rede, em vez de um arquivo."""
+    return isinstance(fonte, int) or str(fonte).isdigit() or '://' in str(fonte)
+
+
+class _DecodificadorOpenCV:
+    """Decodifica com cv2.VideoCapture, escrevendo direto no frame de destino quando possível."""
+    def __init__(self, fonte, threads):
+        self.cap = None
+        if threads and not isinstance(fonte, int) and hasattr(cv2, 'CAP_PROP_N_THREADS'):
+            self.cap = cv2.VideoCapture(fonte, cv2.CAP_FFMPEG, [cv2.CAP_PROP_N_THREADS, int(threads)])
+        if self.cap is None or not self.cap.isOpened():
+            self.cap = cv2.VideoCapture(fonte)
+        self._bruto = None
+
+    def aberto(self):
+        return self.cap.isOpened()
+
+    def propriedades(self):
+        return {prop: self.cap.get(prop) for prop in
+                (cv2.CAP_PROP_FPS, cv2.CAP_PROP_FRAME_COUNT, cv2.CAP_PROP_FRAME_WIDTH, cv2.CAP_PROP_FRAME_HEIGHT)}
+
+    def ler(self, destino, tamanho):
+        """
+        Decodifica o próximo frame em `destino` (reduzido para `tamanho`, se
+        informado). Retorna (frame, posição em ms) ou (None, None) no fim.
+        O frame retornado é `destino`, a menos que o formato não coincida.
+        """
+        if tamanho is None:
+            ret, frame = self.cap.read(destino) if destino is not None else self.cap.read()
+        else:
+            ret, self._bruto = self.cap.read(self._bruto) if self._bruto is not None else self.cap.read()
+            frame = cv2.resize(self._bruto, tamanho, dst=destino, interpolation=cv2.INTER_AREA) if ret else None
+        if not ret:
+            return None, None
+        return frame, self.cap.get(cv2.CAP_PROP_POS_MSEC)
+
+    def fechar(self):
+        self.cap.release()
+
+
+class _DecodificadorPyAV:
+    """
+    Decodifica com PyAV (FFmpeg), com decodificação multi-thread do codec e
+    redução + conversão para BGR em um único passo (swscale).
+    """
+    def __init__(self, fonte, threads):
+        import av
+
+        self.container = av.open(str(fonte))
+        self.stream = self.container.streams.video[0]
+        self.stream.codec_context.thread_type = 'AUTO'
+        if threads:
+            self.stream.codec_context.thread_count = int(threads)
+        self._quadros = self.container.decode(self.stream)
+
+    def aberto(self):
+        return True
+
+    def propriedades(self):
+        return {
+            cv2.CAP_PROP_FPS: float(self.stream.average_rate) if self.stream.average_rate else 0.0,
+            cv2.CAP_PROP_FRAME_COUNT: float(self.stream.frames),
+            cv2.CAP_PROP_FRAME_WIDTH: float(self.stream.codec_context.width),
+            cv2.CAP_PROP_FRAME_HEIGHT: float(self.stream.codec_context.height)
+        }
+
+    def ler(self, destino, tamanho):
+        try:
+            quadro = next(self._quadros)
+        except StopIteration:
+            return None, None
+        if tamanho is not None:
+            quadro = quadro.reformat(width=tamanho[0], height=tamanho[1], format='bgr24')
+        imagem = quadro.to_ndarray(format='bgr24')
+        if destino is not None and destino.shape == imagem.shape:
+            np.copyto(destino, imagem)
+            imagem = destino
+        return imagem, (quadro.time or 0.0) * 1000.0
+
+    def fechar(self):
+        self.container.close()
+
+
+class FonteVideo:
+    """
+    Substituto de `cv2.VideoCapture` com decodificação em thread de fundo.
+
+    Os frames ficam em um buffer circular de `tamanho_buffer` arrays
+    alocados uma vez. O frame retornado por `read` é emprestado: continua
+    válido só até a próxima chamada de `read` (como em `cv2.VideoCapture.read`
+    com array de saída), quando o espaço volta para a decodificação. Quem
+    precisar guardar o frame por mais tempo deve copiá-lo (ver
+    `frames_reutilizados`).
+
+    Em arquivos, a decodificação espera por espaço livre e nenhum frame é
+    perdido. Em câmeras e streams, o frame pronto mais antigo é descartado
+    para que o loop sempre receba o frame mais recente possível.
+    """
+    # Os arrays retornados por `read` são reutilizados
+    frames_reutilizados = True
+
+    def __init__(self, fonte, backend=BACKEND_DECODIFICACAO, threads=THREADS_DECODIFICACAO,
+                 tamanho_buffer=TAMANHO_BUFFER_DECODIFICACAO, lado_maximo=LADO_MAXIMO_DECODIFICACAO,
+                 descartar_antigos=None):
+        """
+        Args:
+            fonte: Índice da câmera, caminho do vídeo ou URL do stream.
+            backend: 'opencv' ou 'pyav' (arquivos e streams; requer o pacote `av`).
+            threads: Threads de decodificação do FFmpeg (0 = padrão do backend).
+            tamanho_buffer: Número de frames no buffer circular (mínimo 2).
+            lado_maximo: Se informado, os frames são reduzidos na decodificação
+                para que o maior lado não passe deste valor.
+            descartar_antigos: Se True, descarta o frame pronto mais antigo
+                quando o buffer enche. Por padrão, True para câmeras e streams.
+        """
+        if backend not in BACKENDS_DECODIFICACAO:
+            raise ValueError(f"Backend de decodificação inválido: {backend}. Opções: {', '.join(BACKENDS_DECODIFICACAO)}")
+
+        self.logger = get_siac_logger("FONTE_VIDEO")
+        self.fonte = fonte
+        self.descartar_antigos = fonte_ao_vivo(fonte) if descartar_antigos is None else descartar_antigos
+        self.total_decodificados = 0
+        self.total_descartados = 0
+
+        self._decodificador = self._abrir(fonte, backend, threads)
+        self._aberto = self._decodificador is not None and self._decodificador.aberto()
+        if not self._aberto:
+            if self._decodificador is not None:
+                self._decodificador.fechar()
+            return
+
+        self._propriedades = self._decodificador.propriedades()
+        self._tamanho = self._tamanho_reduzido(lado_maximo)
+        if self._tamanho is not None:
+            self._propriedades[cv2.CAP_PROP_FRAME_WIDTH], self._propriedades[cv2.CAP_PROP_FRAME_HEIGHT] = map(float, self._tamanho)
+
+        # Buffer circular: índices livres para a decodificação e índices prontos para `read`
+        tamanho_buffer = max(2, int(tamanho_buffer))
+        self._frames = self._alocar_frames(tamanho_buffer)
+        self._livres = queue.Queue()
+        for indice in range(tamanho_buffer):
+            self._livres.put(indice)
+        self._prontos = queue.Queue()
+        self._emprestado = None
+        self._posicao_ms = 0.0
+        self._fim = False
+
+        self._parar = threading.Event()
+        self._thread = threading.Thread(target=self._decodificar, name="siac-decodificacao", daemon=True)
+        self._thread.start()
+
+        largura, altura = self._propriedades[cv2.CAP_PROP_FRAME_WIDTH], self._propriedades[cv2.CAP_PROP_FRAME_HEIGHT]
+        self.logger.info(f"Decodificação em thread de fundo ({backend}, {threads or 'auto'} threads, "
+                         f"{int(largura)}x{int(altura)}, buffer de {tamanho_buffer} frames)")
+
+    def isOpened(self):
+        return self._aberto
+
+    def read(self):
+        """Retorna (True, frame) com o próximo frame decodificado, ou (False, None) no fim."""
+        if not self._aberto or self._fim:
+            return False, None
+        if self._emprestado is not None:
+            self._livres.put(self._emprestado)
+            self._emprestado = None
+
+        elemento = self._prontos.get()
+        if elemento is _FIM:
+            self._fim = True
+            return False, None
+        indice, self._posicao_ms = elemento
+        self._emprestado = indice
+        return True, self._frames[indice]
+
+    def get(self, propriedade):
+        """
+        Propriedades lidas na abertura (FPS, número de frames, largura e altura
+        de saída) e CAP_PROP_POS_MSEC do último frame retornado por `read`.
+        """
+        if propriedade == cv2.CAP_PROP_POS_MSEC:
+            return self._posicao_ms
+        return self._propriedades.get(propriedade, 0.0) if self._aberto else 0.0
+
+    def release(self):
+        """Encerra a thread de decodificação (que fecha o decodificador)."""
+        if not self._aberto:
+            return
+        self._aberto = False
+        self._parar.set()
+        self._thread.join(timeout=2.0)
+        if self.total_descartados:
+            self.logger.info(f"Frames descartados na decodificação: {self.total_descartados} de {self.total_decodificados}")
+
+    def _abrir(self, fonte, backend, threads):
+        if backend == 'pyav':
+            if isinstance(fonte, int) or str(fonte).isdigit():
+                self.logger.warning("PyAV não abre câmeras por índice. Usando OpenCV")
+            else:
+                try:
+                    return _DecodificadorPyAV(fonte, threads)
+                except ImportError:
+                    self.logger.warning("PyAV não está instalado. Usando OpenCV")
+                except Exception as e:
+                    self.logger.error(f"Falha ao abrir a fonte com PyAV: {e}")
+                    return None
+        return _DecodificadorOpenCV(fonte, threads)
+
+    def _tamanho_reduzido(self, lado_maximo):
+        largura = int(self._propriedades[cv2.CAP_PROP_FRAME_WIDTH])
+        altura = int(self._propriedades[cv2.CAP_PROP_FRAME_HEIGHT])
+        if not lado_maximo or largura <= 0 or altura <= 0 or max(largura, altura) <= lado_maximo:
+            return None
+        escala = lado_maximo / max(largura, altura)
+        return max(1, round(largura * escala)), max(1, round(altura * escala))
+
+    def _alocar_frames(self, quantidade):
+        if self._tamanho is not None:
+            largura, altura = self._tamanho
+        else:
+            largura = int(self._propriedades[cv2.CAP_PROP_FRAME_WIDTH])
+            altura = int(self._propriedades[cv2.CAP_PROP_FRAME_HEIGHT])
+        if largura <= 0 or altura <= 0:
+            # Resolução desconhecida até o primeiro frame: o decodificador aloca cada espaço uma vez
+            return [None] * quantidade
+        return [np.empty((altura, largura, 3), dtype=np.uint8) for _ in range(quantidade)]
+
+    def _proximo_livre(self):
+        while not self._parar.is_set():
+            try:
+                # Em fontes ao vivo não espera: a câmera continua produzindo frames
+                return self._livres.get_nowait() if self.descartar_antigos else self._livres.get(timeout=0.1)
+            except queue.Empty:
+                if not self.descartar_antigos:
+                    continue
+            # Fonte ao vivo com o loop atrasado: reaproveita o frame pronto mais antigo
+            try:
+                indice, _ = self._prontos.get_nowait()
+            except queue.Empty:
+                self._parar.wait(0.001)
+                continue
+            self.total_descartados += 1
+            metricas.FRAMES_DESCARTADOS.incrementar('decodificacao')
+            return indice
+        return None
+
+    def _decodificar(self):
+        try:
+            while True:
+                indice = self._proximo_livre()
+                if indice is None:
+                    break
+                inicio = time.perf_counter()
+                frame, posicao_ms = self._decodificador.ler(self._frames[indice], self._tamanho)
+                if frame is None:
+                    break
+                metricas.LATENCIA_ESTAGIO.observar(time.perf_counter() - inicio, 'decodificacao')
+                # Normalmente o próprio espaço do buffer; outro array só se a resolução mudou
+                self._frames[indice] = frame
+                self.total_decodificados += 1
+                self._prontos.put((indice, posicao_ms))
+        except Exception as e:
+            self.logger.error(f"Falha na decodificação de {self.fonte}: {e}")
+        finally:
+            self._prontos.put(_FIM)
+            self._decodificador.fechar()
@@ -0,0 +1,176 @@
+"""
+Gravação e reprodução das detecções por frame.
+
+A gravação salva a saída de `Detector.detectar_objetos` de cada frame
+(caixas, classes, confianças e timestamp) em arquivos NumPy colunares
+(`parte_NNNN.npz`) dentro de um diretório. A reprodução lê esses arquivos
+e devolve os mesmos dicionários, permitindo rodar a filtragem pela ROI e a
+máquina de estados sem inferência.
+
+O `meta.json` é gravado ao abrir e atualizado a cada parte salva, e as
+partes são escritas em um arquivo temporário e renomeadas: uma gravação
+interrompida (SIGKILL, falta de memória, queda de energia) continua
+reproduzível até a última parte completa.
+"""
+
+import glob
+import json
+import os
+import numpy as np
+
+from config import FRAMES_POR_PARTE_GRAVACAO
+from logger_config import get_siac_logger
+
+# Tipos de detecção gravados na coluna 'tipo'
+TIPO_CAIXA = 0
+TIPO_ITEM = 1
+TIPO_DIVISOR = 2
+TIPO_DIVISOR_BAIXA_CONFIANCA = 3
+
+_CHAVES_POR_TIPO = (
+    (TIPO_CAIXA, 'caixas'), (TIPO_ITEM, 'itens'), (TIPO_DIVISOR, 'divisores'),
+    (TIPO_DIVISOR_BAIXA_CONFIANCA, 'divisores_baixa_confianca')
+)
+VERSAO_FORMATO = 2
+
+
+class GravadorDeteccoes:
+    """
+    Grava as detecções de cada frame em partes .npz com as colunas:
+    `timestamps` (por frame), e `frame`, `tipo` e `deteccoes` (Nx6: x1, y1,
+    x2, y2, confiança, classe) por detecção.
+    """
+    def __init__(self, diretorio, frames_por_parte=FRAMES_POR_PARTE_GRAVACAO):
+        """
+        Args:
+            diretorio: Diretório de saída da gravação.
+            frames_por_parte: Número de frames por arquivo .npz.
+        """
+        self.logger = get_siac_logger("GRAVADOR")
+        self.diretorio = diretorio
+        self.frames_por_parte = max(1, int(frames_por_parte))
+        os.makedirs(diretorio, exist_ok=True)
+
+        self.total_frames = 0
+        self.total_partes = 0
+        self._limpar_buffers()
+        self._salvar_meta(finalizada=False)
+        self.logger.info(f"Gravando detecções em: {diretorio}")
+
+    def registrar(self, timestamp, resultados):
+        """Adiciona as detecções de um frame (dicionário de `detectar_objetos`)."""
+        indice = len(self._timestamps)
+        for tipo, chave in _CHAVES_POR_TIPO:
+            deteccoes = resultados.get(chave)
+            if deteccoes is None or len(deteccoes) == 0:
+                continue
+            self._deteccoes.append(np.asarray(deteccoes, dtype=np.float32).reshape(-1, 6))
+            self._frames.append(np.full(len(deteccoes), indice, dtype=np.int32))
+            self._tipos.append(np.full(len(deteccoes), tipo, dtype=np.int8))
+
+        self._timestamps.append(timestamp)
+        self.total_frames += 1
+        if len(self._timestamps) >= self.frames_por_parte:
+            self._salvar_parte()
+
+    def fechar(self):
+        """Salva a parte pendente e os metadados da gravação."""
+        if self._timestamps:
+            self._salvar_parte()
+        self._salvar_meta(finalizada=True)
+        self.logger.info(f"Gravação finalizada: {self.total_frames} frames em {self.total_partes} parte(s)")
+
+    def _salvar_parte(self):
+        caminho = os.path.join(self.diretorio, f"parte_{self.total_partes:04d}.npz")
+        with open(caminho + '.tmp', 'wb') as arquivo:
+            np.savez_compressed(
+                arquivo,
+                timestamps=np.array(self._timestamps, dtype=np.float64),
+                frame=np.concatenate(self._frames) if self._frames else np.empty(0, dtype=np.int32),
+                tipo=np.concatenate(self._tipos) if self._tipos else np.empty(0, dtype=np.int8),
+                deteccoes=np.concatenate(self._deteccoes) if self._deteccoes else np.empty((0, 6), dtype=np.float32)
+            )
+        os.replace(caminho + '.tmp', caminho)
+        self.total_partes += 1
+        self._limpar_buffers()
+        self._salvar_meta(finalizada=False)
+
+    def _salvar_meta(self, finalizada):
+        # Contagens das partes já salvas; `finalizada` indica se fechar() foi chamado
+        caminho = os.path.join(self.diretorio, 'meta.json')
+        with open(caminho + '.tmp', 'w', encoding='utf-8') as arquivo:
+            json.dump({'versao': VERSAO_FORMATO, 'frames': self.total_frames - len(self._timestamps),
+                       'partes': self.total_partes, 'finalizada': finalizada}, arquivo)
+        os.replace(caminho + '.tmp', caminho)
+
+    def _limpar_buffers(self):
+        self._timestamps = []
+        self._frames = []
+        self._tipos = []
+        self._deteccoes = []
+
+
+class ReprodutorDeteccoes:
+    """
+    Lê uma gravação e devolve, frame a frame, (timestamp, resultados) no
+    formato de `Detector.detectar_objetos`.
+
+    Também pode substituir o Detector no SiacApp: `detectar_objetos` ignora
+    o frame e retorna as detecções do próximo frame gravado.
+    """
+    def __init__(self, diretorio):
+        self.diretorio = diretorio
+        self.partes = sorted(glob.glob(os.path.join(diretorio, 'parte_*.npz')))
+        if not self.partes:
+            raise FileNotFoundError(f"Nenhuma gravação de detecções encontrada em: {diretorio}")
+        self.meta = self._ler_meta(diretorio)
+        if not self.meta.get('finalizada', True):
+            get_siac_logger("REPRODUTOR").warning(
+                f"Gravação interrompida antes de fechar em {diretorio}: reproduzindo as "
+                f"{len(self.partes)} parte(s) completas ({self.meta.get('frames')} frames)")
+        self._iterador = None
+        self.timestamp_atual = 0.0
+
+    def __iter__(self):
+        for caminho in self.partes:
+            with np.load(caminho) as parte:
+                timestamps, frames = parte['timestamps'], parte['frame']
+                tipos, deteccoes = parte['tipo'], parte['deteccoes']
+
+            # As detecções estão ordenadas por frame: cada frame é uma fatia contígua
+            limites = np.searchsorted(frames, np.arange(len(timestamps) + 1))
+            for i, timestamp in enumerate(timestamps):
+                inicio, fim = limites[i], limites[i + 1]
+                yield float(timestamp), self._montar_resultado(tipos[inicio:fim], deteccoes[inicio:fim])
+
+    def detectar_objetos(self, frame=None):
+        """Retorna as detecções do próximo frame gravado (o frame é ignorado)."""
+        if self._iterador is None:
+            self._iterador = iter(self)
+        try:
+            self.timestamp_atual, resultados = next(self._iterador)
+        except StopIteration:
+            return self._montar_resultado(np.empty(0, dtype=np.int8), np.empty((0, 6), dtype=np.float32))
+        return resultados
+
+    @staticmethod
+    def _ler_meta(diretorio):
+        """Lê o meta.json e recusa gravações sem versão ou de outra versão do formato."""
+        caminho = os.path.join(diretorio, 'meta.json')
+        try:
+            with open(caminho, encoding='utf-8') as arquivo:
+                meta = json.load(arquivo)
+        except FileNotFoundError:
+            raise ValueError(f"Gravação sem meta.json: {diretorio}") from None
+        except json.JSONDecodeError as e:
+            raise ValueError(f"meta.json inválido em {diretorio}: {e}") from None
+
+        versao = meta.get('versao') if isinstance(meta, dict) else None
+        if versao != VERSAO_FORMATO:
+            raise ValueError(f"Versão do formato de gravação não suportada em {diretorio}: {versao} "
+                             f"(esperada {VERSAO_FORMATO}). Grave novamente com esta versão do SIAC.")
+        return meta
+
+    @staticmethod
+    def _montar_resultado(tipos, deteccoes):
+        return {chave: deteccoes[tipos == tipo] for tipo, chave in _CHAVES_POR_TIPO}
@@ -0,0 +1,94 @@
+"""
+Índice espacial em grade para consultas de vizinhança entre centros de caixas.
+
+Usado pela memória espacial do StateManager: os centros dos itens de cada
+camada são indexados uma vez e os itens atuais são consultados em lote,
+sem laços em Python por par de itens.
+"""
+
+import numpy as np
+
+# Deslocamentos da célula consultada e das 8 vizinhas
+_VIZINHANCA = np.array([(dx, dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1)], dtype=np.int64)
+# Multiplicador que combina (coluna, linha) da célula em uma única chave inteira
+_FATOR_CHAVE = np.int64(1 << 31)
+
+
+def centros_das_caixas(caixas):
+    """Retorna o array Nx2 dos centros de um array Nx4+ (ou lista) de caixas."""
+    caixas = np.asarray(caixas, dtype=np.float64)
+    if len(caixas) == 0:
+        return np.empty((0, 2))
+    return np.column_stack(((caixas[:, 0] + caixas[:, 2]) / 2, (caixas[:, 1] + caixas[:, 3]) / 2))
+
+
+class IndiceGrade:
+    """
+    Grade uniforme com células do tamanho da distância consultada: qualquer
+    ponto a menos dessa distância de uma consulta está na mesma célula ou em
+    uma das 8 vizinhas. As chaves das células ficam ordenadas, então cada
+    consulta em lote é um `searchsorted` por célula vizinha.
+    """
+    def __init__(self, centros, distancia):
+        """
+        Args:
+            centros: Array Nx2 dos pontos indexados.
+            distancia: Distância das consultas (também o lado da célula).
+        """
+        self.distancia = float(distancia)
+        centros = np.asarray(centros, dtype=np.float64).reshape(-1, 2)
+        if self.distancia <= 0 or len(centros) == 0:
+            self._chaves = np.empty(0, dtype=np.int64)
+            self._centros = np.empty((0, 2))
+            return
+
+        chaves = self._chaves_das_celulas(self._celulas(centros))
+        ordem = np.argsort(chaves, kind='stable')
+        self._chaves = chaves[ordem]
+        self._centros = centros[ordem]
+
+    def __len__(self):
+        return len(self._centros)
+
+    def possui_vizinho(self, consultas):
+        """
+        Indica, para cada ponto consultado, se algum ponto indexado está a uma
+        distância euclidiana estritamente menor que `distancia`.
+
+        Args:
+            consultas: Array Mx2 de pontos.
+
+        Returns:
+            Array booleano de tamanho M.
+        """
+        consultas = np.asarray(consultas, dtype=np.float64).reshape(-1, 2)
+        possui = np.zeros(len(consultas), dtype=bool)
+        if len(consultas) == 0 or len(self._centros) == 0:
+            return possui
+
+        # Chaves das 9 células de cada consulta: (M * 9,)
+        celulas = (self._celulas(consultas)[:, None, :] + _VIZINHANCA[None, :, :]).reshape(-1, 2)
+        chaves = self._chaves_das_celulas(celulas)
+        inicios = np.searchsorted(self._chaves, chaves, side='left')
+        fins = np.searchsorted(self._chaves, chaves, side='right')
+        contagens = fins - inicios
+        total = int(contagens.sum())
+        if total == 0:
+            return possui
+
+        # Expande cada faixa [inicio, fim) em pares (consulta, candidato)
+        indice_consulta = np.repeat(np.arange(len(chaves)) // len(_VIZINHANCA), contagens)
+        deslocamentos = np.arange(total) - np.repeat(np.cumsum(contagens) - contagens, contagens)
+        indice_candidato = np.repeat(inicios, contagens) + deslocamentos
+
+        diferencas = consultas[indice_consulta] - self._centros[indice_candidato]
+        distancias = np.sqrt(np.einsum('ij,ij->i', diferencas, diferencas))
+        possui[indice_consulta[distancias < self.distancia]] = True
+        return possui
+
+    def _celulas(self, pontos):
+        return np.floor(pontos / self.distancia).astype(np.int64)
+
+    @staticmethod
+    def _chaves_das_celulas(celulas):
+        return celulas[:, 0] * _FATOR_CHAVE + celulas[:, 1]
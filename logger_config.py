@@ -3,11 +3,51 @@ Configuração centralizada do sistema de logging para o projeto SIAC.
 Fornece loggers estruturados com diferentes níveis e formatação consistente.
 """
 
+import atexit
+import copy
+import gzip
 import logging
+import logging.handlers
 import os
+import queue
+import shutil
 from datetime import datetime
 from typing import Optional
 
+from config import LOG_ASSINCRONO, LOG_TAMANHO_MAXIMO_MB, LOG_QUANTIDADE_BACKUPS
+
+
+def _nomear_rotacionado(nome: str) -> str:
+    return nome + ".gz"
+
+
+def _rotacionar_comprimindo(origem: str, destino: str) -> None:
+    """Comprime a parte rotacionada do log em gzip e remove o original."""
+    with open(origem, 'rb') as entrada, gzip.open(destino, 'wb') as saida:
+        shutil.copyfileobj(entrada, saida)
+    os.remove(origem)
+
+
+class _QueueHandlerSemFormatacao(logging.handlers.QueueHandler):
+    """
+    QueueHandler que deixa a formatação completa (data, nível, layout) para
+    a thread de fundo. Na thread que registra só é feito o `msg % args` e o
+    texto da exceção, para que argumentos mutáveis (listas de detecções,
+    estado) sejam registrados com o valor do momento da chamada. Como só
+    roda para registros que passaram pelo nível, níveis desabilitados
+    continuam sem custo.
+    """
+    _formatador_excecao = logging.Formatter()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = record.exc_text or self._formatador_excecao.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
 class SiacLogger:
     """
     Classe para configuração e gerenciamento centralizado de logs do sistema SIAC.
@@ -16,15 +56,20 @@ class SiacLogger:
     _loggers = {}
     _log_dir = "logs"
     _initialized = False
+    _listener = None
     
     @classmethod
-    def setup_logging(cls, log_level: str = "INFO", enable_file_logging: bool = True) -> None:
+    def setup_logging(cls, log_level: str = "INFO", enable_file_logging: bool = True,
+                      async_logging: bool = LOG_ASSINCRONO) -> None:
         """
         Configura o sistema de logging global.
         
         Args:
             log_level: Nível de log (DEBUG, INFO, WARNING, ERROR, CRITICAL)
             enable_file_logging: Se True, salva logs em arquivo além do console
+                (com rotação por tamanho e compressão das partes antigas)
+            async_logging: Se True, a escrita em console/arquivo é feita por
+                uma thread de fundo; quem registra só enfileira o registro
         """
         if cls._initialized:
             return
@@ -47,9 +92,22 @@ class SiacLogger:
             log_filename = f"siac_{datetime.now().strftime('%Y%m%d')}.log"
             log_filepath = os.path.join(cls._log_dir, log_filename)
             
-            file_handler = logging.FileHandler(log_filepath, encoding='utf-8')
+            file_handler = logging.handlers.RotatingFileHandler(
+                log_filepath, maxBytes=int(LOG_TAMANHO_MAXIMO_MB * 1024 * 1024),
+                backupCount=LOG_QUANTIDADE_BACKUPS, encoding='utf-8'
+            )
+            file_handler.namer = _nomear_rotacionado
+            file_handler.rotator = _rotacionar_comprimindo
             file_handler.setFormatter(logging.Formatter(log_format, date_format))
             handlers.append(file_handler)
+
+        if async_logging:
+            # Os handlers reais passam para a thread do QueueListener
+            fila = queue.SimpleQueue()
+            cls._listener = logging.handlers.QueueListener(fila, *handlers, respect_handler_level=True)
+            cls._listener.start()
+            atexit.register(cls.shutdown_logging)
+            handlers = [_QueueHandlerSemFormatacao(fila)]
         
         # Configurar logging básico
         logging.basicConfig(
@@ -66,6 +124,14 @@ class SiacLogger:
         root_logger.info("Sistema de logging inicializado")
         root_logger.info(f"Nível de log: {log_level}")
         root_logger.info(f"Log em arquivo: {'Habilitado' if enable_file_logging else 'Desabilitado'}")
+        root_logger.info(f"Log assíncrono: {'Habilitado' if async_logging else 'Desabilitado'}")
+
+    @classmethod
+    def shutdown_logging(cls) -> None:
+        """Esvazia a fila do logging assíncrono e para a thread de escrita."""
+        if cls._listener is not None:
+            cls._listener.stop()
+            cls._listener = None
     
     @classmethod
     def get_logger(cls, name: str) -> logging.Logger:
@@ -96,7 +162,7 @@ class SiacLogger:
             items_count: Número de itens detectados
             divisors_count: Número de divisores detectados
         """
-        logger.debug(f"DETECÇÃO - ROI: {roi_count}, Itens: {items_count}, Divisores: {divisors_count}")
+        logger.debug("DETECÇÃO - ROI: %d, Itens: %d, Divisores: %d", roi_count, items_count, divisors_count)
     
     @classmethod
     def log_state_transition(cls, logger: logging.Logger, from_state: str, 
@@ -110,8 +176,7 @@ class SiacLogger:
             to_state: Novo estado
             reason: Motivo da transição (opcional)
         """
-        reason_text = f" - {reason}" if reason else ""
-        logger.info(f"TRANSIÇÃO DE ESTADO: {from_state} → {to_state}{reason_text}")
+        logger.info("TRANSIÇÃO DE ESTADO: %s → %s%s", from_state, to_state, f" - {reason}" if reason else "")
     
     @classmethod
     def log_layer_completion(cls, logger: logging.Logger, layer: int, 
@@ -153,18 +218,39 @@ class SiacLogger:
             fps: Frames por segundo
             processing_time: Tempo de processamento em ms
         """
-        logger.debug(f"PERFORMANCE - FPS: {fps:.1f}, Tempo: {processing_time:.1f}ms")
+        logger.debug("PERFORMANCE - FPS: %.1f, Tempo: %.1fms", fps, processing_time)
+    
+    @classmethod
+    def log_pipeline_metrics(cls, logger: logging.Logger, queue_metrics: dict) -> None:
+        """
+        Log estruturado para métricas das filas do pipeline.
+        
+        Args:
+            logger: Logger a ser usado
+            queue_metrics: Dicionário {nome_da_fila: métricas} com profundidade,
+                profundidade máxima, inseridos e descartados
+        """
+        if not logger.isEnabledFor(logging.DEBUG):
+            return
+        for name, metrics in queue_metrics.items():
+            logger.debug(
+                "FILA %s - Profundidade: %d (máx: %d), Inseridos: %d, Descartados: %d",
+                name, metrics['profundidade'], metrics['profundidade_maxima'],
+                metrics['inseridos'], metrics['descartados']
+            )
 
 # Função de conveniência para inicialização rápida
-def init_siac_logging(log_level: str = "INFO", enable_file_logging: bool = True) -> None:
+def init_siac_logging(log_level: str = "INFO", enable_file_logging: bool = True,
+                      async_logging: bool = LOG_ASSINCRONO) -> None:
     """
     Função de conveniência para inicializar o sistema de logging.
     
     Args:
         log_level: Nível de log (DEBUG, INFO, WARNING, ERROR, CRITICAL)
         enable_file_logging: Se True, salva logs em arquivo além do console
+        async_logging: Se True, a escrita é feita por uma thread de fundo
     """
-    SiacLogger.setup_logging(log_level, enable_file_logging)
+    SiacLogger.setup_logging(log_level, enable_file_logging, async_logging)
 
 # Função de conveniência para obter logger
 def get_siac_logger(name: str) -> logging.Logger:
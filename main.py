@@ -1,6 +1,8 @@
+import argparse
 import cv2
-import numpy as np
 import os
+import signal
+import threading
 import time
 
 # Desabilita o sync da ultralytics para evitar downloads
@@ -8,14 +10,52 @@ os.environ['ULTRALYTICS_SYNC'] = 'False'
 
 # Importa todas as configurações e constantes
 from config import *
-from detector import Detector
+from detector import Detector, roi_maior_area, filtrar_centro_na_roi, deteccoes_vazias
 from state_manager import StateManager
 from visualizer import Visualizer
 from logger_config import init_siac_logging, get_siac_logger, SiacLogger
+from pipeline import PipelineSiac
+from gravacao import GravadorDeteccoes
+from auditoria import RegistroAuditoria
+from publicador_alarmes import PublicadorAlarmes, criar_transporte
+from portao_movimento import PortaoMovimento
+from controle_carga import ControladorCarga
+from renderizador import RenderizadorAssincrono
+from fonte_video import FonteVideo
+import metricas
 
 class SiacApp:
     """Classe principal que orquestra o sistema SIAC."""
-    def __init__(self):
+    def __init__(self, detector=None, headless=MODO_HEADLESS, relogio=time.time, gravador=None, parametros_estado=None,
+                 portao_movimento=PORTAO_MOVIMENTO, controle_carga=CONTROLE_CARGA, auditoria=None,
+                 publicador=None, renderizacao_assincrona=RENDERIZACAO_ASSINCRONA, origem='principal'):
+        """
+        Args:
+            detector: Detector já carregado a ser compartilhado (ex.: entre
+                várias câmeras). Se None, carrega um Detector próprio.
+            headless: Se True, roda sem janela: não copia nem desenha os
+                frames e encerra por sinal (SIGINT/SIGTERM) em vez de tecla.
+            relogio: Relógio da máquina de estados (tempo de parede por padrão).
+            gravador: GravadorDeteccoes opcional que recebe as detecções de
+                cada frame para reprodução posterior sem inferência.
+            parametros_estado: Constantes da máquina de estados a sobrescrever
+                nesta instância (ver `state_manager.PARAMETROS_PADRAO`).
+            portao_movimento: Se True, reutiliza a detecção anterior enquanto
+                a região da ROI não mudar (ver `PortaoMovimento`); a máquina
+                de estados continua sendo atualizada em todos os frames.
+            controle_carga: Se True, o loop sequencial degrada a inferência
+                em níveis quando o tempo por frame passa do orçamento (ver
+                `ControladorCarga`).
+            auditoria: RegistroAuditoria opcional que recebe os eventos de
+                cada caixa (início, camadas, divisores, alarmes, resultado).
+            publicador: PublicadorAlarmes opcional que envia os alarmes ao
+                gateway da linha sem bloquear a máquina de estados.
+            renderizacao_assincrona: Se True (fora do modo headless), o
+                desenho e a janela rodam em uma thread própria com taxa
+                limitada (ver `RenderizadorAssincrono`).
+            origem: Nome da câmera nas métricas de estado (ex.: CAMERA_0 no
+                modo multi-câmera).
+        """
         # Inicializar sistema de logging
         init_siac_logging(log_level="INFO", enable_file_logging=True)
         self.logger = get_siac_logger("SIAC_APP")
@@ -23,9 +63,22 @@ class SiacApp:
         self.logger.info("Iniciando carregamento dos módulos do sistema SIAC")
         
         try:
-            self.detector = Detector()
-            self.state_manager = StateManager()
+            self.detector = detector if detector is not None else Detector()
+            self.state_manager = StateManager(relogio=relogio, parametros=parametros_estado,
+                                              auditoria=auditoria, publicador=publicador, origem=origem)
             self.visualizer = Visualizer()
+            self.headless = headless
+            self.gravador = gravador
+            self.auditoria = auditoria
+            self.publicador = publicador
+            self.portao_movimento = PortaoMovimento() if portao_movimento else None
+            self.controlador_carga = ControladorCarga() if controle_carga else None
+            self.renderizacao_assincrona = renderizacao_assincrona and not headless
+            self.renderizador = None  # Criado em `run` com a renderização assíncrona
+            # True quando a fonte reutiliza os arrays dos frames (FonteVideo): quem guarda o frame copia
+            self.frames_reutilizados = False
+            # Sinalizado por SIGINT/SIGTERM no modo headless
+            self.evento_parada = threading.Event()
             
             # Métricas de performance
             self.fps_counter = 0
@@ -38,125 +91,249 @@ class SiacApp:
             SiacLogger.log_error_with_context(self.logger, e, "Inicialização dos módulos")
             raise
 
-    def run(self, video_source=0):
+    def run(self, video_source=0, modo=MODO_EXECUCAO):
+        """
+        Executa o sistema sobre uma fonte de vídeo.
+
+        Args:
+            video_source: Índice da câmera ou caminho do arquivo de vídeo.
+            modo: 'sequencial' (um frame por vez no loop principal) ou
+                'pipeline' (captura, detecção, estado e renderização em
+                estágios paralelos ligados por filas limitadas).
+        """
         self.logger.info(f"Tentando abrir fonte de vídeo: {video_source}")
         
-        cap = cv2.VideoCapture(video_source)
+        cap = FonteVideo(video_source)
         if not cap.isOpened():
             self.logger.error(f"Falha ao abrir a fonte de vídeo: {video_source}")
             return
+        self.frames_reutilizados = cap.frames_reutilizados
 
-        self.logger.info("Fonte de vídeo aberta com sucesso. Iniciando processamento...")
-        self.logger.info("Pressione 'q' para encerrar o sistema")
+        self.logger.info(f"Fonte de vídeo aberta com sucesso. Iniciando processamento (modo: {modo}{', headless' if self.headless else ''})...")
         
         frame_count = 0
+        handlers_anteriores = self._instalar_sinais_parada() if self.headless else {}
+        if METRICAS_HABILITADAS:
+            metricas.iniciar_servidor_metricas(HOST_METRICAS, PORTA_METRICAS)
+        if self.renderizacao_assincrona:
+            self.renderizador = RenderizadorAssincrono(self.visualizer)
         
         try:
-            while True:
-                ret, frame = cap.read()
-                if not ret:
-                    self.logger.warning("Falha ao capturar frame ou fim do vídeo")
-                    break
-
-                start_time = time.time()
-                frame_processado = self.processar_frame(frame)
-                processing_time = (time.time() - start_time) * 1000  # em ms
-                
-                # Calcular FPS
-                frame_count += 1
-                self._update_fps_metrics()
-                
-                # Log de performance a cada 60 frames (reduzido para menos spam)
-                if frame_count % 60 == 0:
-                    SiacLogger.log_performance_metrics(self.logger, self.current_fps, processing_time)
-                
-                cv2.imshow('SIAC - Verificador de Caixas', frame_processado)
-
-                if cv2.waitKey(1) & 0xFF == ord('q'):
-                    self.logger.info("Comando de saída recebido pelo usuário")
-                    break
+            if modo == 'pipeline':
+                frame_count = PipelineSiac(self).executar(cap)
+            else:
+                frame_count = self._executar_sequencial(cap)
                     
         except Exception as e:
             SiacLogger.log_error_with_context(self.logger, e, "Loop principal de processamento")
         finally:
+            for sinal, handler in handlers_anteriores.items():
+                signal.signal(sinal, handler)
             cap.release()
-            cv2.destroyAllWindows()
+            if self.gravador is not None:
+                self.gravador.fechar()
+            if self.auditoria is not None:
+                self.auditoria.fechar()
+            if self.publicador is not None:
+                self.publicador.fechar()
+            if self.renderizador is not None:
+                self.renderizador.fechar()
+                self.renderizador = None
+            elif not self.headless:
+                cv2.destroyAllWindows()
             self.logger.info(f"Processamento finalizado. Total de frames processados: {frame_count}")
+            if self.portao_movimento is not None:
+                self.logger.info(f"Portão de movimento: {self.portao_movimento.metricas()}")
+
+    def _executar_sequencial(self, cap):
+        """Loop sequencial: captura, processa e exibe um frame por vez."""
+        if self.headless:
+            self.logger.info("Modo headless: envie SIGINT/SIGTERM para encerrar o sistema")
+        else:
+            self.logger.info("Pressione 'q' para encerrar o sistema")
+        frame_count = 0
+        indice_captura = -1
+
+        while not self.evento_parada.is_set():
+            ret, frame = cap.read()
+            if not ret:
+                self.logger.warning("Falha ao capturar frame ou fim do vídeo")
+                break
+
+            indice_captura += 1
+            if self.controlador_carga is not None and not self.controlador_carga.processar_frame(indice_captura):
+                metricas.FRAMES_DESCARTADOS.incrementar('controle_carga')
+                continue
+
+            start_time = time.time()
+            frame_processado = self.processar_frame(frame)
+            processing_time = (time.time() - start_time) * 1000  # em ms
+
+            if self.controlador_carga is not None and self.controlador_carga.registrar(processing_time):
+                self.controlador_carga.aplicar(self.detector)
+            
+            # Calcular FPS
+            frame_count += 1
+            self._update_fps_metrics()
+            
+            # Log de performance a cada 60 frames (reduzido para menos spam)
+            if frame_count % 60 == 0:
+                SiacLogger.log_performance_metrics(self.logger, self.current_fps, processing_time)
+            
+            if self.headless:
+                continue
+            if self.renderizador is not None:
+                # A exibição e a tecla 'q' ficam na thread de renderização
+                if self.renderizador.saida_solicitada.is_set():
+                    break
+                continue
+
+            inicio_exibicao = time.perf_counter()
+            cv2.imshow('SIAC - Verificador de Caixas', frame_processado)
+            tecla = cv2.waitKey(1) & 0xFF
+            metricas.LATENCIA_ESTAGIO.observar(time.perf_counter() - inicio_exibicao, 'exibicao')
+
+            if tecla == ord('q'):
+                self.logger.info("Comando de saída recebido pelo usuário")
+                break
+
+        return frame_count
 
-    def processar_frame(self, frame):
-        frame_desenhado = frame.copy()
+    def processar_frame(self, frame, resultados=None):
+        """
+        Processa um frame: detecção, filtragem pela ROI, máquina de estados e desenho.
+
+        Args:
+            frame: O frame a ser processado.
+            resultados: Detecções já calculadas para o frame (ex.: por
+                `Detector.detectar_lote`). Se None, executa a detecção.
+
+        Returns:
+            Frame com as visualizações desenhadas, no buffer de desenho
+            reutilizado a cada chamada (None no modo headless ou com a
+            renderização assíncrona, que desenha na própria thread).
+        """
+        inicio_frame = time.perf_counter()
+        frame_desenhado = None
 
         try:
-            # 1. Realizar detecção de todos os objetos
-            resultados = self.detector.detectar_objetos(frame)
-            todos_itens = resultados['itens']
-            todos_divisores = resultados['divisores']
-            rois_detectadas = resultados['caixas']
-            divisores_baixa_confianca = resultados.get('divisores_baixa_confianca', [])
-
-            # Log de detecções (apenas em modo DEBUG)
-            SiacLogger.log_detection_stats(
-                self.logger, 
-                len(rois_detectadas), 
-                len(todos_itens), 
-                len(todos_divisores)
-            )
-
-            # 2. Encontrar a ROI de maior área para ser a ROI ativa
-            roi_ativa = self._get_roi_maior_area(rois_detectadas)
-
-            # 3. Filtrar objetos que estão dentro da ROI ativa
-            itens_na_roi = []
-            divisores_na_roi = []
-            if roi_ativa:
-                itens_na_roi = self._filtrar_objetos_na_roi(todos_itens, roi_ativa)
-                divisores_na_roi = self._filtrar_objetos_na_roi(todos_divisores, roi_ativa)
+            # 1-3. Detectar objetos e filtrar os que estão na ROI ativa
+            roi_ativa, itens_na_roi, divisores_na_roi = self._detectar_na_roi(frame, resultados)
 
             # 4. Atualizar a máquina de estados com as detecções atuais
+            inicio = time.perf_counter()
             self.state_manager.atualizar_estado(roi_ativa, itens_na_roi, divisores_na_roi)
+            metricas.LATENCIA_ESTAGIO.observar(time.perf_counter() - inicio, 'estado')
 
             # 5. Obter o status REAL do sistema para a visualização
             status_visual = self.state_manager.get_status_visual()
 
             # 6. Desenhar as visualizações usando o Visualizer
-            self.visualizer.desenhar_visualizacoes(
-                frame_desenhado, 
-                roi_ativa, 
-                itens_na_roi, 
-                divisores_na_roi, 
-                status_visual
-            )
+            nivel_degradacao = None
+            if self.controlador_carga is not None and self.controlador_carga.degradado:
+                nivel_degradacao = self.controlador_carga.nivel['nome']
+            if self.renderizador is not None:
+                self.renderizador.publicar(frame, roi_ativa, itens_na_roi, divisores_na_roi, status_visual,
+                                           nivel_degradacao, copiar=self.frames_reutilizados)
+            elif not self.headless:
+                inicio = time.perf_counter()
+                frame_desenhado = self.visualizer.copiar_para_buffer(frame)
+                self.visualizer.desenhar_visualizacoes(
+                    frame_desenhado, 
+                    roi_ativa, 
+                    itens_na_roi, 
+                    divisores_na_roi, 
+                    status_visual
+                )
+                if nivel_degradacao is not None:
+                    self.visualizer.desenhar_nivel_degradacao(frame_desenhado, nivel_degradacao)
+                metricas.LATENCIA_ESTAGIO.observar(time.perf_counter() - inicio, 'desenho')
+
+            metricas.LATENCIA_ESTAGIO.observar(time.perf_counter() - inicio_frame, 'frame')
+            metricas.FRAMES_PROCESSADOS.incrementar()
             
         except Exception as e:
             SiacLogger.log_error_with_context(self.logger, e, "Processamento do frame")
-            # Em caso de erro, retorna o frame original
-            frame_desenhado = frame.copy()
+            # Em caso de erro, retorna o frame original (não é modificado pelo processamento)
+            frame_desenhado = None if self.headless or self.renderizador is not None else frame
 
         return frame_desenhado
 
+    def _instalar_sinais_parada(self):
+        """
+        Faz SIGINT/SIGTERM encerrarem o loop de forma ordenada (modo headless).
+
+        Returns:
+            Dicionário {sinal: handler anterior} para restauração.
+        """
+        def _ao_receber_sinal(sinal, _frame):
+            self.logger.info(f"Sinal {signal.Signals(sinal).name} recebido. Encerrando o sistema")
+            self.evento_parada.set()
+
+        handlers_anteriores = {}
+        for sinal in (signal.SIGINT, signal.SIGTERM):
+            handlers_anteriores[sinal] = signal.signal(sinal, _ao_receber_sinal)
+        return handlers_anteriores
+
+    def _detectar_na_roi(self, frame, resultados=None):
+        """
+        Executa a detecção no frame (se `resultados` não for fornecido) e
+        filtra os objetos pela ROI ativa.
+
+        Returns:
+            Tupla (roi_ativa, itens_na_roi, divisores_na_roi).
+        """
+        # 1. Realizar detecção de todos os objetos
+        if resultados is None and self.portao_movimento is not None:
+            resultados = self.portao_movimento.reutilizar(frame)
+            if resultados is None:
+                resultados = self._detectar(frame)
+                self.portao_movimento.atualizar(frame, resultados)
+        elif resultados is None:
+            resultados = self._detectar(frame)
+        if self.gravador is not None:
+            self.gravador.registrar(self.state_manager.relogio(), resultados)
+        todos_itens = resultados['itens']
+        todos_divisores = resultados['divisores']
+        rois_detectadas = resultados['caixas']
+        divisores_baixa_confianca = resultados.get('divisores_baixa_confianca', [])
+
+        # Log de detecções (apenas em modo DEBUG)
+        SiacLogger.log_detection_stats(
+            self.logger, 
+            len(rois_detectadas), 
+            len(todos_itens), 
+            len(todos_divisores)
+        )
+
+        # 2. Encontrar a ROI de maior área para ser a ROI ativa
+        roi_ativa = self._get_roi_maior_area(rois_detectadas)
+
+        # 3. Filtrar objetos que estão dentro da ROI ativa
+        itens_na_roi = deteccoes_vazias()
+        divisores_na_roi = deteccoes_vazias()
+        if roi_ativa is not None:
+            inicio = time.perf_counter()
+            itens_na_roi = self._filtrar_objetos_na_roi(todos_itens, roi_ativa)
+            divisores_na_roi = self._filtrar_objetos_na_roi(todos_divisores, roi_ativa)
+            metricas.LATENCIA_ESTAGIO.observar(time.perf_counter() - inicio, 'filtro_roi')
+
+        return roi_ativa, itens_na_roi, divisores_na_roi
+
+    def _detectar(self, frame):
+        inicio = time.perf_counter()
+        resultados = self.detector.detectar_objetos(frame)
+        metricas.LATENCIA_ESTAGIO.observar(time.perf_counter() - inicio, 'deteccao')
+        return resultados
+
     def _get_roi_maior_area(self, rois):
-        """De uma lista de ROIs, retorna a que tiver a maior área."""
-        if not rois:
-            return None
-        
-        areas = [(r[2] - r[0]) * (r[3] - r[1]) for r in rois]
-        maior_roi_idx = np.argmax(areas)
-        maior_area = areas[maior_roi_idx]
-        
-        # Log de área removido para evitar spam
-        return rois[maior_roi_idx]
+        """De um array Nx6 de ROIs, retorna a que tiver a maior área."""
+        # Mesma regra usada pelo Detector para o recorte da ROI
+        return roi_maior_area(rois)
 
     def _filtrar_objetos_na_roi(self, objetos, roi):
-        """Filtra uma lista de objetos, retornando apenas os que estão dentro da ROI."""
-        objetos_filtrados = []
-        rx1, ry1, rx2, ry2 = roi
-        for obj in objetos:
-            ox1, oy1, ox2, oy2 = obj
-            # Verifica se o centro do objeto está dentro da ROI
-            centro_x, centro_y = (ox1 + ox2) / 2, (oy1 + oy2) / 2
-            if rx1 < centro_x < rx2 and ry1 < centro_y < ry2:
-                objetos_filtrados.append(obj)
-        return objetos_filtrados
+        """Filtra um array Nx6 de objetos, retornando apenas os que têm o centro dentro da ROI."""
+        return filtrar_centro_na_roi(objetos, roi)
 
     def _update_fps_metrics(self):
         """Atualiza as métricas de FPS."""
@@ -169,9 +346,22 @@ class SiacApp:
             self.last_fps_time = current_time
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="SIAC - Verificador de Caixas.")
+    parser.add_argument('--source', type=str, default='0', help="Índice da câmera ou caminho do vídeo.")
+    parser.add_argument('--modo', type=str, default=MODO_EXECUCAO, choices=['sequencial', 'pipeline'], help="Modo de execução.")
+    parser.add_argument('--headless', action='store_true', default=MODO_HEADLESS, help="Executa sem janela (encerra por SIGINT/SIGTERM).")
+    parser.add_argument('--gravar', type=str, default=None, help="Diretório para gravar as detecções de cada frame.")
+    parser.add_argument('--controle_carga', action='store_true', default=CONTROLE_CARGA, help="Degrada a inferência quando o tempo por frame passa do orçamento.")
+    parser.add_argument('--renderizacao_assincrona', action='store_true', default=RENDERIZACAO_ASSINCRONA, help="Desenha e exibe em uma thread própria, a até FPS_RENDERIZACAO quadros por segundo.")
+
+    args = parser.parse_args()
+
     try:
-        app = SiacApp()
-        app.run(video_source=0)  # Use 0 para webcam ou 'caminho/para/video.mp4'
+        app = SiacApp(headless=args.headless, gravador=GravadorDeteccoes(args.gravar) if args.gravar else None,
+                      controle_carga=args.controle_carga, renderizacao_assincrona=args.renderizacao_assincrona,
+                      auditoria=RegistroAuditoria() if AUDITORIA_HABILITADA else None,
+                      publicador=PublicadorAlarmes(criar_transporte()) if PUBLICACAO_ALARMES else None)
+        app.run(video_source=int(args.source) if args.source.isdigit() else args.source, modo=args.modo)
     except KeyboardInterrupt:
         print("\nSistema interrompido pelo usuário")
     except Exception as e:
@@ -0,0 +1,188 @@
+"""
+Métricas de execução do SIAC no formato de texto do Prometheus.
+
+Os contadores, medidores e histogramas ficam em memória e são atualizados no
+caminho crítico com custo constante (uma busca binária e alguns incrementos
+sob um lock). Um servidor HTTP em thread de fundo expõe `/metrics` sem
+bloquear o loop de frames.
+"""
+
+import bisect
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from logger_config import get_siac_logger
+
+# Limites dos histogramas de latência, em segundos
+LIMITES_LATENCIA = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.15, 0.25, 0.5, 1.0)
+
+
+def _formatar_rotulos(nomes, valores, extra=None):
+    pares = list(zip(nomes, valores))
+    if extra:
+        pares.append(extra)
+    if not pares:
+        return ''
+    return '{' + ','.join(f'{nome}="{valor}"' for nome, valor in pares) + '}'
+
+
+class _Metrica:
+    tipo = None
+
+    def __init__(self, nome, ajuda, rotulos=()):
+        self.nome = nome
+        self.ajuda = ajuda
+        self.rotulos = tuple(rotulos)
+        self._lock = threading.Lock()
+        self._valores = {}
+
+    def formatar(self):
+        linhas = [f"# HELP {self.nome} {self.ajuda}", f"# TYPE {self.nome} {self.tipo}"]
+        with self._lock:
+            valores = dict(self._valores)
+        for chave, valor in sorted(valores.items()):
+            linhas.append(f"{self.nome}{_formatar_rotulos(self.rotulos, chave)} {valor}")
+        return linhas
+
+
+class Contador(_Metrica):
+    """Contador monotônico (ex.: frames processados, inferências)."""
+    tipo = 'counter'
+
+    def incrementar(self, *rotulos, valor=1):
+        with self._lock:
+            self._valores[rotulos] = self._valores.get(rotulos, 0) + valor
+
+
+class Medidor(_Metrica):
+    """Valor instantâneo (ex.: estado atual, profundidade de fila)."""
+    tipo = 'gauge'
+
+    def definir(self, valor, *rotulos):
+        with self._lock:
+            self._valores[rotulos] = valor
+
+
+class Histograma(_Metrica):
+    """Histograma cumulativo no formato do Prometheus (_bucket, _sum, _count)."""
+    tipo = 'histogram'
+
+    def __init__(self, nome, ajuda, rotulos=(), limites=LIMITES_LATENCIA):
+        super().__init__(nome, ajuda, rotulos)
+        self.limites = tuple(limites)
+
+    def observar(self, valor, *rotulos):
+        indice = bisect.bisect_left(self.limites, valor)
+        with self._lock:
+            serie = self._valores.get(rotulos)
+            if serie is None:
+                # Contagens por faixa (a última é +Inf), soma e total
+                serie = self._valores[rotulos] = [[0] * (len(self.limites) + 1), 0.0, 0]
+            serie[0][indice] += 1
+            serie[1] += valor
+            serie[2] += 1
+
+    def formatar(self):
+        linhas = [f"# HELP {self.nome} {self.ajuda}", f"# TYPE {self.nome} {self.tipo}"]
+        with self._lock:
+            valores = {chave: (list(faixas), soma, total) for chave, (faixas, soma, total) in self._valores.items()}
+        for chave, (faixas, soma, total) in sorted(valores.items()):
+            acumulado = 0
+            for limite, contagem in zip(self.limites + ('+Inf',), faixas):
+                acumulado += contagem
+                linhas.append(f"{self.nome}_bucket{_formatar_rotulos(self.rotulos, chave, ('le', limite))} {acumulado}")
+            linhas.append(f"{self.nome}_sum{_formatar_rotulos(self.rotulos, chave)} {soma}")
+            linhas.append(f"{self.nome}_count{_formatar_rotulos(self.rotulos, chave)} {total}")
+        return linhas
+
+
+class RegistroMetricas:
+    """Conjunto de métricas exportadas pelo endpoint."""
+    def __init__(self):
+        self._metricas = []
+
+    def registrar(self, metrica):
+        self._metricas.append(metrica)
+        return metrica
+
+    def formatar(self):
+        linhas = []
+        for metrica in self._metricas:
+            linhas.extend(metrica.formatar())
+        return '\n'.join(linhas) + '\n'
+
+
+REGISTRO = RegistroMetricas()
+
+LATENCIA_ESTAGIO = REGISTRO.registrar(Histograma(
+    'siac_latencia_estagio_segundos', 'Latência de cada estágio do processamento de um frame.', ('estagio',)))
+FRAMES_PROCESSADOS = REGISTRO.registrar(Contador(
+    'siac_frames_processados_total', 'Frames processados pelo SiacApp.'))
+FRAMES_DESCARTADOS = REGISTRO.registrar(Contador(
+    'siac_frames_descartados_total', 'Frames descartados antes do processamento.', ('motivo',)))
+INFERENCIAS = REGISTRO.registrar(Contador(
+    'siac_inferencias_total', 'Chamadas aos modelos de detecção.', ('modelo',)))
+DETECCOES_REUTILIZADAS = REGISTRO.registrar(Contador(
+    'siac_deteccoes_reutilizadas_total', 'Frames que reutilizaram a detecção anterior (cena sem movimento).'))
+TAXA_REUSO_DETECCOES = REGISTRO.registrar(Medidor(
+    'siac_taxa_reuso_deteccoes', 'Fração dos frames que reutilizaram a detecção anterior.'))
+ROI_RASTREADA = REGISTRO.registrar(Contador(
+    'siac_roi_rastreada_total', 'Frames em que a ROI veio do rastreador, sem inferência.'))
+NIVEL_DEGRADACAO = REGISTRO.registrar(Medidor(
+    'siac_nivel_degradacao', 'Nível de degradação do controle de carga (0 = normal).'))
+MUDANCAS_NIVEL_DEGRADACAO = REGISTRO.registrar(Contador(
+    'siac_mudancas_nivel_degradacao_total', 'Mudanças de nível do controle de carga.', ('direcao',)))
+ESTADO_ATUAL = REGISTRO.registrar(Medidor(
+    'siac_estado', 'Estado atual da máquina de estados de cada câmera (1 para o estado ativo).', ('origem', 'estado')))
+TEMPO_NO_ESTADO = REGISTRO.registrar(Contador(
+    'siac_tempo_no_estado_segundos_total', 'Tempo acumulado em cada estado da máquina de estados de cada câmera.', ('origem', 'estado')))
+CAMADA_ATUAL = REGISTRO.registrar(Medidor(
+    'siac_camada_atual', 'Camada atual da caixa em verificação em cada câmera.', ('origem',)))
+PUBLICACAO_EVENTOS = REGISTRO.registrar(Contador(
+    'siac_publicacao_eventos_total', 'Eventos do publicador de alarmes por resultado (enviado, transbordado, falha_envio).', ('resultado',)))
+
+
+class _HandlerMetricas(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0] != '/metrics':
+            self.send_error(404)
+            return
+        corpo = REGISTRO.formatar().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def log_message(self, formato, *args):
+        # Sem log por requisição: o Prometheus consulta o endpoint a cada poucos segundos
+        pass
+
+
+_servidor = None
+_lock_servidor = threading.Lock()
+
+
+def iniciar_servidor_metricas(host, porta):
+    """
+    Inicia (uma única vez por processo) o servidor HTTP de métricas em uma
+    thread daemon. Falhas ao abrir a porta são registradas e não interrompem
+    o sistema.
+
+    Returns:
+        O servidor HTTP, ou None se não foi possível iniciá-lo.
+    """
+    global _servidor
+    logger = get_siac_logger("METRICAS")
+    with _lock_servidor:
+        if _servidor is not None:
+            return _servidor
+        try:
+            _servidor = ThreadingHTTPServer((host, porta), _HandlerMetricas)
+        except OSError as e:
+            logger.error(f"Não foi possível iniciar o endpoint de métricas em {host}:{porta}: {e}")
+            return None
+        _servidor.daemon_threads = True
+        threading.Thread(target=_servidor.serve_forever, name="siac-metricas", daemon=True).start()
+        logger.info(f"Endpoint de métricas disponível em http://{host}:{porta}/metrics")
+        return _servidor
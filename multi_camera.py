@@ -0,0 +1,185 @@
+import argparse
+import os
+import time
+from collections import deque
+import cv2
+import numpy as np
+
+# Desabilita o sync da ultralytics para evitar downloads
+os.environ['ULTRALYTICS_SYNC'] = 'False'
+
+from config import (
+    TAMANHO_MAXIMO_LOTE, AUDITORIA_HABILITADA, PUBLICACAO_ALARMES, METRICAS_HABILITADAS, HOST_METRICAS, PORTA_METRICAS
+)
+from auditoria import RegistroAuditoria
+from publicador_alarmes import PublicadorAlarmes, criar_transporte
+from detector import Detector
+from fonte_video import FonteVideo
+from logger_config import init_siac_logging, get_siac_logger, SiacLogger
+from main import SiacApp
+import metricas
+
+
+class CanalCamera:
+    """
+    Uma fonte de vídeo do orquestrador, com seu próprio SiacApp
+    (StateManager e Visualizer próprios) e suas métricas de FPS e latência.
+    """
+    def __init__(self, indice, fonte, detector, janela_latencias=300):
+        self.indice = indice
+        self.fonte = fonte
+        self.nome = f"CAMERA_{indice}"
+        self.logger = get_siac_logger(self.nome)
+        # Um registro de auditoria por câmera, todos no mesmo banco
+        self.auditoria = RegistroAuditoria(origem=self.nome) if AUDITORIA_HABILITADA else None
+        self.publicador = PublicadorAlarmes(criar_transporte(), origem=self.nome) if PUBLICACAO_ALARMES else None
+        self.app = SiacApp(detector=detector, auditoria=self.auditoria, publicador=self.publicador, origem=self.nome)
+        self.cap = FonteVideo(fonte)
+        self.ativo = self.cap.isOpened()
+
+        # Métricas
+        self.frames_processados = 0
+        self.inicio = time.time()
+        self.latencias_ms = deque(maxlen=janela_latencias)
+
+        if self.ativo:
+            self.logger.info(f"Fonte aberta: {fonte}")
+        else:
+            self.logger.error(f"Falha ao abrir a fonte de vídeo: {fonte}")
+
+    def ler(self):
+        """Lê o próximo frame; desativa o canal no fim do vídeo ou em falha."""
+        if not self.ativo:
+            return None
+        ret, frame = self.cap.read()
+        if not ret:
+            self.logger.warning("Falha ao capturar frame ou fim do vídeo")
+            self.encerrar()
+            return None
+        return frame
+
+    def registrar_frame(self, latencia_ms):
+        """Atualiza as métricas do canal após processar um frame."""
+        self.frames_processados += 1
+        self.latencias_ms.append(latencia_ms)
+        self.app._update_fps_metrics()
+
+    def resumo(self):
+        """Retorna FPS médio e latências (média e p95, em ms) do canal."""
+        duracao = time.time() - self.inicio
+        latencias = np.array(self.latencias_ms) if self.latencias_ms else np.zeros(1)
+        return {
+            'frames': self.frames_processados,
+            'fps_medio': self.frames_processados / duracao if duracao > 0 else 0.0,
+            'latencia_media_ms': float(latencias.mean()),
+            'latencia_p95_ms': float(np.percentile(latencias, 95))
+        }
+
+    def encerrar(self):
+        if self.ativo:
+            self.cap.release()
+            self.ativo = False
+        if self.auditoria is not None:
+            self.auditoria.fechar()
+            self.auditoria = None
+        if self.publicador is not None:
+            self.publicador.fechar()
+            self.publicador = None
+
+
+class SiacMultiCamera:
+    """
+    Executa o SIAC sobre várias fontes de vídeo em um único processo.
+    Um único Detector é compartilhado e os frames de todas as câmeras são
+    inferidos juntos em um lote por iteração; cada câmera mantém seu próprio
+    StateManager e Visualizer.
+    """
+    def __init__(self, fontes, tamanho_maximo_lote=None, intervalo_log_metricas=60):
+        """
+        Args:
+            fontes: Lista de fontes de vídeo (índices de câmera ou caminhos).
+            tamanho_maximo_lote: Máximo de frames por chamada aos modelos.
+                Se None, usa o maior entre o número de fontes e TAMANHO_MAXIMO_LOTE.
+            intervalo_log_metricas: Intervalo (em frames por câmera) entre logs de métricas.
+        """
+        init_siac_logging(log_level="INFO", enable_file_logging=True)
+        self.logger = get_siac_logger("SIAC_MULTI")
+        self.intervalo_log_metricas = intervalo_log_metricas
+
+        if tamanho_maximo_lote is None:
+            tamanho_maximo_lote = max(len(fontes), TAMANHO_MAXIMO_LOTE)
+
+        self.logger.info(f"Iniciando orquestrador com {len(fontes)} fonte(s) e um Detector compartilhado")
+        self.detector = Detector(tamanho_maximo_lote=tamanho_maximo_lote)
+        self.canais = [CanalCamera(i, fonte, self.detector) for i, fonte in enumerate(fontes)]
+
+    def run(self):
+        """Loop principal: captura de todas as câmeras, inferência em lote e processamento por câmera."""
+        self.logger.info("Pressione 'q' para encerrar o sistema")
+        if METRICAS_HABILITADAS:
+            metricas.iniciar_servidor_metricas(HOST_METRICAS, PORTA_METRICAS)
+
+        try:
+            while True:
+                capturas = []
+                for canal in self.canais:
+                    instante_captura = time.time()
+                    frame = canal.ler()
+                    if frame is not None:
+                        capturas.append((canal, instante_captura, frame))
+
+                if not capturas:
+                    self.logger.info("Todas as fontes de vídeo foram encerradas")
+                    break
+
+                resultados = self.detector.detectar_lote([frame for _, _, frame in capturas])
+
+                for (canal, instante_captura, frame), resultado in zip(capturas, resultados):
+                    frame_processado = canal.app.processar_frame(frame, resultado)
+                    if frame_processado is not None:
+                        cv2.imshow(f'SIAC - {canal.nome}', frame_processado)
+
+                    canal.registrar_frame((time.time() - instante_captura) * 1000)
+                    if canal.frames_processados % self.intervalo_log_metricas == 0:
+                        SiacLogger.log_performance_metrics(canal.logger, canal.app.current_fps, canal.latencias_ms[-1])
+
+                if cv2.waitKey(1) & 0xFF == ord('q'):
+                    self.logger.info("Comando de saída recebido pelo usuário")
+                    break
+
+        except Exception as e:
+            SiacLogger.log_error_with_context(self.logger, e, "Loop principal multi-câmera")
+        finally:
+            for canal in self.canais:
+                canal.encerrar()
+            cv2.destroyAllWindows()
+            self._log_resumo()
+
+    def _log_resumo(self):
+        for canal in self.canais:
+            resumo = canal.resumo()
+            canal.logger.info(
+                f"Resumo {canal.nome} ({canal.fonte}): {resumo['frames']} frames, "
+                f"FPS médio: {resumo['fps_medio']:.1f}, "
+                f"Latência média: {resumo['latencia_media_ms']:.1f}ms, p95: {resumo['latencia_p95_ms']:.1f}ms"
+            )
+
+
+def _converter_fonte(fonte):
+    """Converte '0', '1', ... em índice de câmera; mantém caminhos como texto."""
+    return int(fonte) if fonte.isdigit() else fonte
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Executa o SIAC em várias câmeras com um único Detector compartilhado.")
+    parser.add_argument('--fontes', type=str, nargs='+', required=True, help="Índices de câmera e/ou caminhos de vídeo.")
+    parser.add_argument('--lote', type=int, default=None, help="Tamanho máximo do lote de inferência.")
+
+    args = parser.parse_args()
+
+    try:
+        SiacMultiCamera([_converter_fonte(f) for f in args.fontes], tamanho_maximo_lote=args.lote).run()
+    except KeyboardInterrupt:
+        print("\nSistema interrompido pelo usuário")
+    except Exception as e:
+        print(f"Erro fatal no sistema: {e}")
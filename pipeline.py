@@ -0,0 +1,275 @@
+import queue
+import threading
+import time
+import cv2
+
+from config import TAMANHO_FILA_PIPELINE, POLITICA_DESCARTE_PIPELINE
+from logger_config import get_siac_logger, SiacLogger
+import metricas
+
+POLITICA_DESCARTAR_ANTIGO = 'descartar_antigo'
+POLITICA_BLOQUEAR = 'bloquear'
+POLITICAS_DESCARTE = (POLITICA_DESCARTAR_ANTIGO, POLITICA_BLOQUEAR)
+
+# Marcador de fim de fluxo propagado entre os estágios
+FIM_DO_FLUXO = object()
+
+
+class FilaLimitada:
+    """
+    Fila limitada que liga dois estágios do pipeline, com política de
+    descarte configurável e métricas de profundidade.
+    """
+    def __init__(self, nome, tamanho_maximo, politica=POLITICA_BLOQUEAR):
+        """
+        Args:
+            nome: Nome da fila (usado nas métricas).
+            tamanho_maximo: Número máximo de elementos na fila.
+            politica: 'descartar_antigo' (descarta o elemento mais antigo
+                quando cheia) ou 'bloquear' (produtor espera por espaço).
+        """
+        if politica not in POLITICAS_DESCARTE:
+            raise ValueError(f"Política de descarte inválida: {politica}")
+
+        self.nome = nome
+        self.politica = politica
+        self._fila = queue.Queue(maxsize=max(1, int(tamanho_maximo)))
+        self._lock = threading.Lock()
+
+        # Métricas
+        self.total_inseridos = 0
+        self.total_descartados = 0
+        self.profundidade_maxima = 0
+
+    def colocar(self, item, evento_parada=None):
+        """
+        Insere um elemento na fila segundo a política configurada.
+
+        Returns:
+            False se a inserção foi abandonada porque o pipeline está parando.
+        """
+        if self.politica == POLITICA_DESCARTAR_ANTIGO:
+            while True:
+                try:
+                    self._fila.put_nowait(item)
+                    break
+                except queue.Full:
+                    try:
+                        self._fila.get_nowait()
+                        with self._lock:
+                            self.total_descartados += 1
+                        metricas.FRAMES_DESCARTADOS.incrementar(f"fila_{self.nome}")
+                    except queue.Empty:
+                        pass
+        else:
+            while True:
+                try:
+                    self._fila.put(item, timeout=0.1)
+                    break
+                except queue.Full:
+                    if evento_parada is not None and evento_parada.is_set():
+                        return False
+
+        with self._lock:
+            self.total_inseridos += 1
+            self.profundidade_maxima = max(self.profundidade_maxima, self._fila.qsize())
+        return True
+
+    def retirar(self, timeout=0.1):
+        """
+        Retira o próximo elemento da fila.
+
+        Returns:
+            O elemento, ou None se nada chegou dentro do timeout.
+        """
+        try:
+            return self._fila.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def metricas(self):
+        """Retorna as métricas atuais da fila."""
+        with self._lock:
+            return {
+                'profundidade': self._fila.qsize(),
+                'profundidade_maxima': self.profundidade_maxima,
+                'inseridos': self.total_inseridos,
+                'descartados': self.total_descartados
+            }
+
+
+class PipelineSiac:
+    """
+    Executa o SIAC em estágios paralelos (captura, detecção, atualização de
+    estado e renderização) ligados por filas limitadas.
+
+    A detecção e a atualização de estado rodam cada uma em uma única thread,
+    então a máquina de estados recebe as detecções em ordem estrita de frame.
+    A fila de estado sempre bloqueia; a política configurada vale para a fila
+    de frames capturados e a renderização sempre descarta frames antigos.
+    """
+    def __init__(self, app, tamanho_fila=TAMANHO_FILA_PIPELINE, politica=POLITICA_DESCARTE_PIPELINE,
+                 intervalo_log_metricas=60):
+        """
+        Args:
+            app: Instância de SiacApp cujos módulos serão usados nos estágios.
+            tamanho_fila: Tamanho máximo de cada fila entre estágios.
+            politica: Política de descarte da fila de frames capturados.
+            intervalo_log_metricas: Intervalo (em frames renderizados) entre logs de métricas.
+        """
+        self.app = app
+        self.logger = get_siac_logger("PIPELINE")
+        self.intervalo_log_metricas = intervalo_log_metricas
+
+        self.fila_frames = FilaLimitada('captura→detecção', tamanho_fila, politica)
+        self.fila_deteccoes = FilaLimitada('detecção→estado', tamanho_fila, POLITICA_BLOQUEAR)
+        self.fila_render = FilaLimitada('estado→render', tamanho_fila, POLITICA_DESCARTAR_ANTIGO)
+
+        self.evento_parada = threading.Event()
+        self.ultimo_indice_estado = -1
+
+        self.logger.info(f"Pipeline configurado: filas de {tamanho_fila} elementos, política de captura '{politica}'")
+
+    def executar(self, cap):
+        """
+        Executa o pipeline até o fim do vídeo, até o usuário pressionar 'q' ou,
+        no modo headless, até um sinal de parada. A renderização roda na
+        thread principal (exigência do cv2.imshow); no modo headless ela
+        apenas consome os resultados, sem desenhar, e com a renderização
+        assíncrona entrega-os ao `RenderizadorAssincrono`.
+
+        Returns:
+            Número de frames que passaram pela máquina de estados.
+        """
+        threads = [
+            threading.Thread(target=self._estagio_captura, args=(cap,), name="siac-captura", daemon=True),
+            threading.Thread(target=self._estagio_deteccao, name="siac-deteccao", daemon=True),
+            threading.Thread(target=self._estagio_estado, name="siac-estado", daemon=True)
+        ]
+        for thread in threads:
+            thread.start()
+
+        try:
+            self._estagio_render()
+        finally:
+            self.evento_parada.set()
+            for thread in threads:
+                thread.join(timeout=2.0)
+            self._log_metricas()
+
+        return self.ultimo_indice_estado + 1
+
+    def metricas_filas(self):
+        """Retorna as métricas de todas as filas do pipeline."""
+        return {fila.nome: fila.metricas() for fila in (self.fila_frames, self.fila_deteccoes, self.fila_render)}
+
+    def _estagio_captura(self, cap):
+        indice = 0
+        reutilizados = getattr(cap, 'frames_reutilizados', False)
+        try:
+            while not self.evento_parada.is_set():
+                ret, frame = cap.read()
+                if not ret:
+                    self.logger.warning("Falha ao capturar frame ou fim do vídeo")
+                    break
+                if reutilizados:
+                    # O frame segue pelas filas enquanto a fonte já decodifica no mesmo array
+                    frame = frame.copy()
+                if not self.fila_frames.colocar((indice, time.time(), frame), self.evento_parada):
+                    return
+                indice += 1
+        except Exception as e:
+            SiacLogger.log_error_with_context(self.logger, e, "Estágio de captura")
+        self.fila_frames.colocar(FIM_DO_FLUXO, self.evento_parada)
+
+    def _estagio_deteccao(self):
+        while not self.evento_parada.is_set():
+            elemento = self.fila_frames.retirar()
+            if elemento is None:
+                continue
+            if elemento is FIM_DO_FLUXO:
+                break
+
+            indice, instante_captura, frame = elemento
+            try:
+                roi_ativa, itens_na_roi, divisores_na_roi = self.app._detectar_na_roi(frame)
+            except Exception as e:
+                SiacLogger.log_error_with_context(self.logger, e, "Estágio de detecção")
+                roi_ativa, itens_na_roi, divisores_na_roi = None, [], []
+
+            if not self.fila_deteccoes.colocar(
+                (indice, instante_captura, frame, roi_ativa, itens_na_roi, divisores_na_roi), self.evento_parada
+            ):
+                return
+        self.fila_deteccoes.colocar(FIM_DO_FLUXO, self.evento_parada)
+
+    def _estagio_estado(self):
+        while not self.evento_parada.is_set():
+            elemento = self.fila_deteccoes.retirar()
+            if elemento is None:
+                continue
+            if elemento is FIM_DO_FLUXO:
+                break
+
+            indice, instante_captura, frame, roi_ativa, itens_na_roi, divisores_na_roi = elemento
+            if indice <= self.ultimo_indice_estado:
+                # Nunca deve acontecer: detecção e estado rodam em threads únicas
+                self.logger.error(f"Frame fora de ordem descartado: {indice} após {self.ultimo_indice_estado}")
+                continue
+            self.ultimo_indice_estado = indice
+
+            try:
+                self.app.state_manager.atualizar_estado(roi_ativa, itens_na_roi, divisores_na_roi)
+                status_visual = self.app.state_manager.get_status_visual()
+            except Exception as e:
+                SiacLogger.log_error_with_context(self.logger, e, "Estágio de estado")
+                continue
+
+            self.fila_render.colocar(
+                (indice, instante_captura, frame, roi_ativa, itens_na_roi, divisores_na_roi, status_visual)
+            )
+        self.fila_render.colocar(FIM_DO_FLUXO)
+
+    def _estagio_render(self):
+        headless = self.app.headless
+        renderizador = self.app.renderizador
+        if headless:
+            self.logger.info("Modo headless: envie SIGINT/SIGTERM para encerrar o sistema")
+        else:
+            self.logger.info("Pressione 'q' para encerrar o sistema")
+        frames_renderizados = 0
+
+        while not self.app.evento_parada.is_set():
+            elemento = self.fila_render.retirar()
+            if elemento is FIM_DO_FLUXO:
+                break
+            if elemento is not None:
+                indice, instante_captura, frame, roi_ativa, itens_na_roi, divisores_na_roi, status_visual = elemento
+
+                if renderizador is not None:
+                    renderizador.publicar(frame, roi_ativa, itens_na_roi, divisores_na_roi, status_visual)
+                elif not headless:
+                    # O frame pertence ao pipeline a partir daqui, então é desenhado sem cópia
+                    self.app.visualizer.desenhar_visualizacoes(frame, roi_ativa, itens_na_roi, divisores_na_roi, status_visual)
+                    cv2.imshow('SIAC - Verificador de Caixas', frame)
+
+                frames_renderizados += 1
+                self.app._update_fps_metrics()
+                if frames_renderizados % self.intervalo_log_metricas == 0:
+                    latencia = (time.time() - instante_captura) * 1000  # em ms
+                    SiacLogger.log_performance_metrics(self.logger, self.app.current_fps, latencia)
+                    self._log_metricas()
+
+            if headless:
+                continue
+            if renderizador is not None:
+                # A exibição e a tecla 'q' ficam na thread de renderização
+                if renderizador.saida_solicitada.is_set():
+                    break
+                continue
+            if cv2.waitKey(1) & 0xFF == ord('q'):
+                self.logger.info("Comando de saída recebido pelo usuário")
+                break
+
+    def _log_metricas(self):
+        SiacLogger.log_pipeline_metrics(self.logger, self.metricas_filas())
@@ -0,0 +1,94 @@
+import cv2
+
+from config import ESCALA_PORTAO_MOVIMENTO, LIMIAR_PIXEL_MOVIMENTO, LIMIAR_MOVIMENTO, IDADE_MAXIMA_REUSO
+from detector import roi_maior_area
+from logger_config import get_siac_logger
+import metricas
+
+
+class PortaoMovimento:
+    """
+    Decide, antes da inferência, se o resultado anterior de
+    `Detector.detectar_objetos` ainda vale para o frame atual.
+
+    Compara a região da última ROI (ou o frame inteiro, se não havia ROI),
+    reduzida e em tons de cinza, com a mesma região no frame da última
+    inferência. Se a fração de pixels alterados ficar abaixo de `limiar`, o
+    resultado é reutilizado, no máximo por `idade_maxima` frames seguidos.
+    """
+    def __init__(self, limiar=LIMIAR_MOVIMENTO, limiar_pixel=LIMIAR_PIXEL_MOVIMENTO,
+                 idade_maxima=IDADE_MAXIMA_REUSO, escala=ESCALA_PORTAO_MOVIMENTO):
+        """
+        Args:
+            limiar: Fração de pixels alterados a partir da qual a inferência roda.
+            limiar_pixel: Diferença de intensidade (0-255) para um pixel contar como alterado.
+            idade_maxima: Máximo de frames consecutivos reutilizando o mesmo resultado.
+            escala: Fator de redução da região comparada.
+        """
+        self.logger = get_siac_logger("PORTAO_MOVIMENTO")
+        self.limiar = limiar
+        self.limiar_pixel = limiar_pixel
+        self.idade_maxima = max(0, int(idade_maxima))
+        self.escala = escala
+
+        self.resultados = None
+        self.regiao = None
+        self.referencia = None
+        self.idade = 0
+        self.ultima_fracao_alterada = 0.0
+
+        # Métricas
+        self.total_frames = 0
+        self.total_reutilizados = 0
+
+    def reutilizar(self, frame):
+        """
+        Retorna o resultado anterior se a região não mudou desde a última
+        inferência; caso contrário, None (a inferência deve rodar e o
+        resultado ser entregue em `atualizar`).
+        """
+        self.total_frames += 1
+        reutilizado = None
+        if self.resultados is not None and self.idade < self.idade_maxima:
+            self.ultima_fracao_alterada = self._fracao_alterada(self._reduzir(frame, self.regiao), self.referencia)
+            if self.ultima_fracao_alterada < self.limiar:
+                self.idade += 1
+                self.total_reutilizados += 1
+                metricas.DETECCOES_REUTILIZADAS.incrementar()
+                reutilizado = self.resultados
+
+        metricas.TAXA_REUSO_DETECCOES.definir(self.total_reutilizados / self.total_frames)
+        return reutilizado
+
+    def atualizar(self, frame, resultados):
+        """Guarda o resultado de uma inferência e a região de referência correspondente."""
+        roi = roi_maior_area(resultados['caixas'])
+        self.regiao = None if roi is None else tuple(map(int, roi[:4]))
+        self.referencia = self._reduzir(frame, self.regiao)
+        self.resultados = resultados
+        self.idade = 0
+
+    def metricas(self):
+        """Retorna as métricas acumuladas do portão."""
+        return {
+            'frames': self.total_frames,
+            'reutilizados': self.total_reutilizados,
+            'taxa_reuso': self.total_reutilizados / self.total_frames if self.total_frames else 0.0
+        }
+
+    def _reduzir(self, frame, regiao):
+        if regiao is not None:
+            altura, largura = frame.shape[:2]
+            x1, y1, x2, y2 = regiao
+            x1, y1 = max(0, x1), max(0, y1)
+            x2, y2 = min(largura, x2), min(altura, y2)
+            if x2 > x1 and y2 > y1:
+                frame = frame[y1:y2, x1:x2]
+        cinza = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+        return cv2.resize(cinza, None, fx=self.escala, fy=self.escala, interpolation=cv2.INTER_AREA)
+
+    def _fracao_alterada(self, atual, referencia):
+        if referencia is None or atual.shape != referencia.shape:
+            return 1.0
+        _, alterados = cv2.threshold(cv2.absdiff(atual, referencia), self.limiar_pixel, 255, cv2.THRESH_BINARY)
+        return cv2.countNonZero(alterados) / alterados.size
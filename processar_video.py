@@ -0,0 +1,145 @@
+import argparse
+import json
+import os
+import time
+import cv2
+
+# Desabilita o sync da ultralytics para evitar downloads
+os.environ['ULTRALYTICS_SYNC'] = 'False'
+
+from config import ESTADOS
+from fonte_video import FonteVideo
+from gravacao import GravadorDeteccoes
+from main import SiacApp
+from relogio import RelogioQuadros, timestamp_do_frame
+
+
+class RegistroResultados:
+    """
+    Acompanha o estado do StateManager frame a frame e monta o resultado de
+    cada caixa (ciclo que começa ao sair de AGUARDANDO_CAIXA e termina ao
+    voltar para ele).
+    """
+    def __init__(self, state_manager):
+        self.state_manager = state_manager
+        self.estado_anterior = state_manager.status_sistema
+        self.caixa_atual = None
+        self.caixas = []
+
+    def registrar(self, indice, timestamp):
+        sm = self.state_manager
+        estado = sm.status_sistema
+        if estado == self.estado_anterior:
+            return
+
+        if self.caixa_atual is None and estado != ESTADOS['AGUARDANDO_CAIXA']:
+            self.caixa_atual = {
+                'caixa': len(self.caixas) + 1,
+                'inicio_s': round(timestamp, 3),
+                'frame_inicio': indice,
+                'alertas': [],
+                'transicoes': []
+            }
+
+        if self.caixa_atual is not None:
+            self.caixa_atual['transicoes'].append({
+                't_s': round(timestamp, 3), 'de': self.estado_anterior, 'para': estado,
+                'camada': sm.camada_atual, 'contagem': sm.contagem_estabilizada
+            })
+            if estado in (ESTADOS['CAIXA_AUSENTE'], ESTADOS['ALERTA_DIVISOR_AUSENTE'], ESTADOS['ERRO_DIVISOR_PRECOCE']):
+                self.caixa_atual['alertas'].append({'t_s': round(timestamp, 3), 'alerta': estado})
+
+            if estado == ESTADOS['AGUARDANDO_CAIXA']:
+                completa = self.estado_anterior == ESTADOS['CAIXA_COMPLETA']
+                self._finalizar(indice, timestamp, 'completa' if completa else 'incompleta')
+
+        self.estado_anterior = estado
+
+    def finalizar_video(self, indice, timestamp):
+        """Fecha a caixa em andamento no fim do vídeo."""
+        if self.caixa_atual is not None:
+            self._finalizar(indice, timestamp, 'em_andamento')
+
+    def _finalizar(self, indice, timestamp, resultado):
+        sm = self.state_manager
+        self.caixa_atual.update({
+            'fim_s': round(timestamp, 3),
+            'frame_fim': indice,
+            'resultado': resultado,
+            'ultima_camada': sm.camada_atual,
+            'contagens_por_camada': dict(sm.contagens_por_camada)
+        })
+        self.caixas.append(self.caixa_atual)
+        self.caixa_atual = None
+
+
+def processar_video(caminho_video, usar_pts=True, diretorio_gravacao=None):
+    """
+    Processa um arquivo de vídeo tão rápido quanto a CPU permitir, sem janela.
+    A máquina de estados usa o timestamp de cada frame como relógio, então o
+    resultado não depende da velocidade de processamento. Com
+    `diretorio_gravacao`, as detecções de cada frame também são gravadas
+    para reprodução sem inferência (replay_deteccoes.py).
+
+    Returns:
+        Dicionário com o resumo do processamento e os resultados por caixa.
+    """
+    cap = FonteVideo(caminho_video)
+    if not cap.isOpened():
+        raise FileNotFoundError(f"Não foi possível abrir o vídeo: {caminho_video}")
+    fps_video = cap.get(cv2.CAP_PROP_FPS) or 30.0
+
+    relogio = RelogioQuadros()
+    gravador = GravadorDeteccoes(diretorio_gravacao) if diretorio_gravacao else None
+    app = SiacApp(headless=True, relogio=relogio, gravador=gravador)
+    registro = RegistroResultados(app.state_manager)
+
+    indice = 0
+    timestamp = 0.0
+    inicio = time.perf_counter()
+    try:
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                break
+
+            timestamp = timestamp_do_frame(cap, indice, fps_video) if usar_pts else indice / fps_video
+            relogio.avancar_para(timestamp)
+            app.processar_frame(frame)
+            registro.registrar(indice, timestamp)
+            indice += 1
+    finally:
+        cap.release()
+        if gravador is not None:
+            gravador.fechar()
+
+    registro.finalizar_video(indice - 1, timestamp)
+    duracao_processamento = time.perf_counter() - inicio
+
+    return {
+        'video': os.path.basename(caminho_video),
+        'frames': indice,
+        'duracao_video_s': round(timestamp, 3),
+        'duracao_processamento_s': round(duracao_processamento, 3),
+        'velocidade_x_tempo_real': round(timestamp / duracao_processamento, 2) if duracao_processamento > 0 else 0.0,
+        'caixas': registro.caixas
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Processa um vídeo offline, tão rápido quanto possível, e lista o resultado de cada caixa.")
+    parser.add_argument('video', type=str, help="Caminho do arquivo de vídeo.")
+    parser.add_argument('--relogio', type=str, default='pts', choices=['pts', 'indice'], help="Fonte do timestamp: PTS do vídeo ou índice/FPS.")
+    parser.add_argument('--saida', type=str, default=None, help="Arquivo JSON de saída (padrão: imprime na tela).")
+    parser.add_argument('--gravar', type=str, default=None, help="Diretório para gravar as detecções de cada frame.")
+
+    args = parser.parse_args()
+
+    resultado = processar_video(args.video, usar_pts=args.relogio == 'pts', diretorio_gravacao=args.gravar)
+    texto = json.dumps(resultado, indent=2, ensure_ascii=False)
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as arquivo:
+            arquivo.write(texto)
+        print(f"[INFO] Resultados salvos em: {args.saida}")
+    else:
+        print(texto)
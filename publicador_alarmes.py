@@ -0,0 +1,344 @@
+"""
+Publicação de alarmes e eventos de caixa para o gateway da linha (CLP/MES).
+
+O StateManager entrega os eventos ao `PublicadorAlarmes` pela mesma
+interface do registro de auditoria (`registrar`). O publicador só coloca o
+evento em uma fila limitada em memória; uma thread de fundo envia lotes pelo
+transporte configurado (HTTP POST, MQTT ou UDP), com novas tentativas e
+espera exponencial. Se a fila encher (gateway lento ou fora do ar), os
+eventos vão para um arquivo JSONL de transbordo e são reenviados quando o
+gateway voltar a aceitar envios. Toda a escrita e leitura desse arquivo
+fica na thread de envio; quem publica nunca faz E/S. A entrega é "pelo
+menos uma vez": um envio que expira no cliente mas foi processado pelo
+gateway é repetido.
+"""
+
+import json
+import os
+import queue
+import socket
+import threading
+import time
+import urllib.request
+from collections import deque
+
+from config import (
+    TRANSPORTE_ALARMES, URL_ALARMES_HTTP, HOST_ALARMES, PORTA_ALARMES_UDP, PORTA_ALARMES_MQTT,
+    TOPICO_ALARMES_MQTT, TIMEOUT_ALARMES, TAMANHO_FILA_ALARMES, TAMANHO_LOTE_ALARMES,
+    INTERVALO_LOTE_ALARMES, TENTATIVAS_ALARMES, BACKOFF_INICIAL_ALARMES, BACKOFF_MAXIMO_ALARMES,
+    DIRETORIO_TRANSBORDO_ALARMES, EVENTOS_PUBLICADOS
+)
+from auditoria import converter_para_json
+from logger_config import get_siac_logger
+import metricas
+
+TRANSPORTES_ALARMES = ('http', 'mqtt', 'udp')
+
+
+def _para_json(dados):
+    return json.dumps(dados, ensure_ascii=False, default=converter_para_json)
+
+
+class TransporteHttp:
+    """Envia cada lote como um array JSON no corpo de um POST."""
+    def __init__(self, url=URL_ALARMES_HTTP, timeout=TIMEOUT_ALARMES):
+        self.url = url
+        self.timeout = timeout
+
+    def enviar(self, eventos):
+        requisicao = urllib.request.Request(
+            self.url, data=_para_json(eventos).encode('utf-8'),
+            headers={'Content-Type': 'application/json'}, method='POST'
+        )
+        # Respostas 4xx/5xx levantam HTTPError e o lote é reenviado
+        with urllib.request.urlopen(requisicao, timeout=self.timeout) as resposta:
+            resposta.read()
+
+    def fechar(self):
+        pass
+
+    def __str__(self):
+        return f"HTTP {self.url}"
+
+
+class TransporteUdp:
+    """Envia um datagrama JSON por evento (sem confirmação de recebimento)."""
+    def __init__(self, host=HOST_ALARMES, porta=PORTA_ALARMES_UDP):
+        self.destino = (host, porta)
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+    def enviar(self, eventos):
+        for evento in eventos:
+            self.socket.sendto(_para_json(evento).encode('utf-8'), self.destino)
+
+    def fechar(self):
+        self.socket.close()
+
+    def __str__(self):
+        return f"UDP {self.destino[0]}:{self.destino[1]}"
+
+
+class TransporteMqtt:
+    """Publica um evento por mensagem (QoS 1) em um tópico MQTT. Requer `paho-mqtt`."""
+    def __init__(self, host=HOST_ALARMES, porta=PORTA_ALARMES_MQTT, topico=TOPICO_ALARMES_MQTT, timeout=TIMEOUT_ALARMES):
+        import paho.mqtt.client as mqtt
+
+        self.mqtt = mqtt
+        self.host = host
+        self.porta = porta
+        self.topico = topico
+        self.timeout = timeout
+        versao_api = getattr(mqtt, 'CallbackAPIVersion', None)  # paho-mqtt >= 2.0
+        self.cliente = mqtt.Client(versao_api.VERSION2) if versao_api else mqtt.Client()
+        # Conexão e reconexão ficam na thread de rede do cliente
+        self.cliente.connect_async(host, porta)
+        self.cliente.loop_start()
+
+    def enviar(self, eventos):
+        for evento in eventos:
+            info = self.cliente.publish(self.topico, _para_json(evento), qos=1)
+            if info.rc != self.mqtt.MQTT_ERR_SUCCESS:
+                raise ConnectionError(f"Falha ao publicar no broker MQTT (rc={info.rc})")
+            info.wait_for_publish(timeout=self.timeout)
+            if not info.is_published():
+                raise TimeoutError(f"Broker MQTT não confirmou a publicação em {self.timeout}s")
+
+    def fechar(self):
+        self.cliente.loop_stop()
+        self.cliente.disconnect()
+
+    def __str__(self):
+        return f"MQTT {self.host}:{self.porta}/{self.topico}"
+
+
+def criar_transporte(tipo=TRANSPORTE_ALARMES):
+    """Cria o transporte de alarmes configurado ('http', 'mqtt' ou 'udp')."""
+    if tipo == 'http':
+        return TransporteHttp()
+    if tipo == 'udp':
+        return TransporteUdp()
+    if tipo == 'mqtt':
+        return TransporteMqtt()
+    raise ValueError(f"Transporte de alarmes inválido: {tipo}. Opções: {', '.join(TRANSPORTES_ALARMES)}")
+
+
+class PublicadorAlarmes:
+    """
+    Fila limitada de eventos com uma thread de envio em lotes.
+
+    `registrar`/`publicar` nunca esperam pelo gateway nem pelo disco: com a
+    fila cheia, o evento vai para uma lista em memória que a thread de envio
+    grava no arquivo de transbordo. Um lote que falha é reenviado com espera
+    exponencial (até `tentativas` vezes) e, se ainda falhar, também vai para
+    o transbordo. O transbordo é reenviado quando a fila está vazia,
+    respeitando a mesma espera exponencial enquanto o gateway falhar.
+    """
+    def __init__(self, transporte, origem='principal', tamanho_fila=TAMANHO_FILA_ALARMES,
+                 tamanho_lote=TAMANHO_LOTE_ALARMES, intervalo_lote=INTERVALO_LOTE_ALARMES,
+                 tentativas=TENTATIVAS_ALARMES, backoff_inicial=BACKOFF_INICIAL_ALARMES,
+                 backoff_maximo=BACKOFF_MAXIMO_ALARMES, diretorio_transbordo=DIRETORIO_TRANSBORDO_ALARMES,
+                 tipos=EVENTOS_PUBLICADOS):
+        """
+        Args:
+            transporte: Objeto com `enviar(eventos)` (levanta exceção em caso de
+                falha) e `fechar()`; ver TransporteHttp, TransporteMqtt e TransporteUdp.
+            origem: Identificação da câmera/instância incluída em cada evento.
+            tamanho_fila: Máximo de eventos aguardando envio em memória.
+            tamanho_lote: Máximo de eventos por envio.
+            intervalo_lote: Espera máxima (s) por eventos quando a fila está vazia.
+            tentativas: Tentativas de envio de um lote antes do transbordo.
+            backoff_inicial, backoff_maximo: Limites (s) da espera exponencial entre tentativas.
+            diretorio_transbordo: Diretório do arquivo `<origem>.jsonl` de transbordo.
+            tipos: Tipos de evento publicados (os demais são ignorados).
+        """
+        self.logger = get_siac_logger("PUBLICADOR_ALARMES")
+        self.transporte = transporte
+        self.origem = origem
+        self.tamanho_lote = max(1, int(tamanho_lote))
+        self.intervalo_lote = intervalo_lote
+        self.tentativas = max(1, int(tentativas))
+        self.backoff_inicial = backoff_inicial
+        self.backoff_maximo = backoff_maximo
+        self.tipos = frozenset(tipos)
+        self.caminho_transbordo = os.path.join(diretorio_transbordo, f"{origem}.jsonl")
+
+        self._fila = queue.Queue(maxsize=max(1, int(tamanho_fila)))
+        self._parar = threading.Event()
+        self._espera = backoff_inicial
+        self._proximo_reenvio = 0.0  # time.monotonic() a partir do qual o transbordo pode ser reenviado
+        # Eventos que não couberam na fila, aguardando a thread de envio gravá-los no transbordo
+        self._excedentes = deque()
+        self._lock_transbordo = threading.Lock()
+        self._arquivo_transbordo = None
+        # Eventos de uma execução anterior que não chegaram ao gateway
+        self._transbordo_pendente = os.path.exists(self.caminho_transbordo)
+
+        # Métricas
+        self.total_publicados = 0
+        self.total_enviados = 0
+        self.total_transbordados = 0
+        self.total_falhas_envio = 0
+
+        self._thread = threading.Thread(target=self._enviar_continuamente, name=f"siac-alarmes-{origem}", daemon=True)
+        self._thread.start()
+        self.logger.info(f"Publicando alarmes via {transporte} (origem: {origem})")
+
+    def registrar(self, tipo, caixa_id, timestamp, camada=None, dados=None):
+        """Mesma interface de `RegistroAuditoria.registrar`; publica apenas os tipos configurados."""
+        if tipo not in self.tipos:
+            return
+        self.publicar({
+            'tipo': tipo, 'caixa_id': caixa_id, 'timestamp': timestamp,
+            'camada': camada, 'origem': self.origem, 'dados': dados or {}
+        })
+
+    def publicar(self, evento):
+        """Enfileira um evento (dicionário serializável em JSON) sem bloquear e sem E/S."""
+        self.total_publicados += 1
+        try:
+            self._fila.put_nowait(evento)
+        except queue.Full:
+            self._excedentes.append(evento)
+
+    def metricas(self):
+        """Retorna as métricas acumuladas do publicador."""
+        return {
+            'publicados': self.total_publicados,
+            'enviados': self.total_enviados,
+            'transbordados': self.total_transbordados,
+            'falhas_envio': self.total_falhas_envio,
+            'na_fila': self._fila.qsize(),
+            'aguardando_transbordo': len(self._excedentes)
+        }
+
+    def fechar(self, timeout=10.0):
+        """
+        Envia o que estiver na fila (uma tentativa por lote) e encerra a thread
+        de envio. O que falhar ou não for enviado em `timeout` segundos vai
+        para o transbordo.
+        """
+        if self._thread.is_alive():
+            self._parar.set()
+            self._thread.join(timeout)
+        pendentes = []
+        while True:
+            try:
+                pendentes.append(self._fila.get_nowait())
+            except queue.Empty:
+                break
+        if pendentes:
+            self._transbordar(pendentes)
+        self._descarregar_transbordo()
+        with self._lock_transbordo:
+            if self._arquivo_transbordo is not None:
+                self._arquivo_transbordo.close()
+                self._arquivo_transbordo = None
+        self.transporte.fechar()
+        self.logger.info(f"Publicador de alarmes encerrado: {self.metricas()}")
+
+    def _enviar_continuamente(self):
+        while True:
+            lote = self._coletar_lote()
+            if lote:
+                if not self._enviar_com_tentativas(lote):
+                    self._transbordar(lote)
+            elif self._parar.is_set():
+                break
+
+            self._descarregar_transbordo()
+            if self._transbordo_pendente and self._fila.empty() and not self._parar.is_set() \
+                    and time.monotonic() >= self._proximo_reenvio:
+                self._reenviar_transbordo()
+
+    def _coletar_lote(self):
+        try:
+            lote = [self._fila.get(timeout=0 if self._parar.is_set() else self.intervalo_lote)]
+        except queue.Empty:
+            return []
+        while len(lote) < self.tamanho_lote:
+            try:
+                lote.append(self._fila.get_nowait())
+            except queue.Empty:
+                break
+        return lote
+
+    def _enviar_com_tentativas(self, lote):
+        for _ in range(self.tentativas):
+            if self._tentar_enviar(lote):
+                return True
+            if self._parar.is_set():
+                break
+            # Espera interrompível; cresce a cada falha e só volta ao início após um sucesso
+            self._parar.wait(self._espera)
+            self._espera = min(self.backoff_maximo, self._espera * 2)
+        return False
+
+    def _tentar_enviar(self, lote):
+        try:
+            self.transporte.enviar(lote)
+        except Exception as e:
+            self.total_falhas_envio += 1
+            metricas.PUBLICACAO_EVENTOS.incrementar('falha_envio', valor=len(lote))
+            self.logger.warning(f"Falha ao enviar {len(lote)} eventos via {self.transporte}: {e}")
+            self._proximo_reenvio = time.monotonic() + self._espera
+            return False
+        self._espera = self.backoff_inicial
+        self._proximo_reenvio = 0.0
+        self.total_enviados += len(lote)
+        metricas.PUBLICACAO_EVENTOS.incrementar('enviado', valor=len(lote))
+        return True
+
+    def _transbordar(self, eventos, reenvio=False):
+        linhas = ''.join(_para_json(evento) + '\n' for evento in eventos)
+        with self._lock_transbordo:
+            try:
+                if self._arquivo_transbordo is None:
+                    os.makedirs(os.path.dirname(self.caminho_transbordo) or '.', exist_ok=True)
+                    self._arquivo_transbordo = open(self.caminho_transbordo, 'a', encoding='utf-8')
+                self._arquivo_transbordo.write(linhas)
+            except OSError as e:
+                self.logger.error(f"Falha ao gravar {len(eventos)} eventos no transbordo: {e}")
+                return
+            self._transbordo_pendente = True
+        if reenvio:
+            return
+        self.total_transbordados += len(eventos)
+        metricas.PUBLICACAO_EVENTOS.incrementar('transbordado', valor=len(eventos))
+
+    def _descarregar_transbordo(self):
+        # Grava os eventos que não couberam na fila, na ordem em que foram publicados
+        excedentes = []
+        while True:
+            try:
+                excedentes.append(self._excedentes.popleft())
+            except IndexError:
+                break
+        if excedentes:
+            self._transbordar(excedentes)
+        with self._lock_transbordo:
+            if self._arquivo_transbordo is not None:
+                self._arquivo_transbordo.flush()
+
+    def _reenviar_transbordo(self):
+        with self._lock_transbordo:
+            if self._arquivo_transbordo is not None:
+                self._arquivo_transbordo.close()
+                self._arquivo_transbordo = None
+            self._transbordo_pendente = False
+            try:
+                with open(self.caminho_transbordo, encoding='utf-8') as arquivo:
+                    eventos = [json.loads(linha) for linha in arquivo if linha.strip()]
+                os.remove(self.caminho_transbordo)
+            except FileNotFoundError:
+                return
+            except (OSError, ValueError) as e:
+                self.logger.error(f"Falha ao ler o transbordo {self.caminho_transbordo}: {e}")
+                return
+
+        self.logger.info(f"Reenviando {len(eventos)} eventos do transbordo")
+        for inicio in range(0, len(eventos), self.tamanho_lote):
+            if self._parar.is_set() or not self._tentar_enviar(eventos[inicio:inicio + self.tamanho_lote]):
+                # Os eventos restantes voltam para o transbordo (cada evento tem o seu timestamp)
+                self._espera = min(self.backoff_maximo, self._espera * 2)
+                self._transbordar(eventos[inicio:], reenvio=True)
+                return
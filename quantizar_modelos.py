@@ -0,0 +1,173 @@
+import argparse
+import json
+import os
+import time
+import numpy as np
+
+# Desabilita o sync da ultralytics para evitar downloads
+os.environ['ULTRALYTICS_SYNC'] = 'False'
+
+from backends import ModeloExportado, ModeloOnnxRuntime, VARIANTE_INT8, caminho_artefato, exportar_modelo
+from config import MODELOS, TAMANHO_IMAGEM_INFERENCIA, CONFIDENCIA_LIMITE, CLASSE_ITEM, CLASSE_DIVISOR
+from detector import roi_maior_area
+from logger_config import init_siac_logging
+from utils.videos_teste import DIRETORIO_VIDEOS_TESTE, listar_videos, amostrar_frames
+
+
+class LeitorCalibracao:
+    """Fornece ao quantizador do ONNX Runtime os frames de calibração já pré-processados."""
+    def __init__(self, frames, nome_entrada, imgsz):
+        self._entradas = iter(
+            {nome_entrada: ModeloExportado.preparar_entrada([frame], imgsz, minimo=False)} for frame in frames
+        )
+
+    def get_next(self):
+        return next(self._entradas, None)
+
+
+def quantizar(caminho_pesos, frames_calibracao, imgsz):
+    """
+    Gera a variante INT8 (QDQ, pesos por canal) de um modelo, calibrada nos frames fornecidos.
+
+    Returns:
+        Tupla (caminho do ONNX FP32, caminho do ONNX INT8).
+    """
+    import onnxruntime as ort
+    from onnxruntime.quantization import CalibrationMethod, QuantFormat, QuantType, quantize_static
+    from onnxruntime.quantization.shape_inference import quant_pre_process
+
+    caminho_fp32 = exportar_modelo(caminho_pesos, 'onnx', imgsz)
+    caminho_int8 = caminho_artefato(caminho_pesos, 'onnx', VARIANTE_INT8)
+    caminho_preparado = caminho_int8.replace('.onnx', '.pre.onnx')
+
+    nome_entrada = ort.InferenceSession(caminho_fp32, providers=['CPUExecutionProvider']).get_inputs()[0].name
+    quant_pre_process(caminho_fp32, caminho_preparado)
+    try:
+        quantize_static(
+            caminho_preparado,
+            caminho_int8,
+            LeitorCalibracao(frames_calibracao, nome_entrada, imgsz),
+            quant_format=QuantFormat.QDQ,
+            per_channel=True,
+            activation_type=QuantType.QUInt8,
+            weight_type=QuantType.QInt8,
+            calibrate_method=CalibrationMethod.MinMax
+        )
+    finally:
+        if os.path.exists(caminho_preparado):
+            os.remove(caminho_preparado)
+
+    print(f"[INFO] Variante INT8 salva em: {caminho_int8}")
+    return caminho_fp32, caminho_int8
+
+
+def resumir_deteccoes(resultado, nome_modelo):
+    """Resume as detecções de um frame nos indicadores comparados no relatório."""
+    dados = resultado.boxes.data
+    confiaveis = dados[dados[:, 4] > CONFIDENCIA_LIMITE]
+    if nome_modelo == 'roi_detector':
+        return {'roi': roi_maior_area(confiaveis)}
+    return {
+        'itens': int(np.sum(confiaveis[:, 5] == CLASSE_ITEM)),
+        'divisor': bool(np.any(confiaveis[:, 5] == CLASSE_DIVISOR))
+    }
+
+
+def _iou(a, b):
+    if a is None or b is None:
+        return float(a is None and b is None)
+    ix1, iy1, ix2, iy2 = max(a[0], b[0]), max(a[1], b[1]), min(a[2], b[2]), min(a[3], b[3])
+    intersecao = max(0, ix2 - ix1) * max(0, iy2 - iy1)
+    uniao = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - intersecao
+    return intersecao / uniao if uniao > 0 else 0.0
+
+
+def avaliar(modelo, frames, nome_modelo):
+    """Executa o modelo nos frames e retorna (latências em ms, resumos por frame)."""
+    modelo.predict(frames[0], conf=CONFIDENCIA_LIMITE)  # Aquecimento
+    latencias, resumos = [], []
+    for frame in frames:
+        inicio = time.perf_counter()
+        resultado = modelo.predict(frame, conf=CONFIDENCIA_LIMITE)[0]
+        latencias.append((time.perf_counter() - inicio) * 1000)
+        resumos.append(resumir_deteccoes(resultado, nome_modelo))
+    return np.array(latencias), resumos
+
+
+def comparar(nome_modelo, caminho_fp32, caminho_int8, frames, imgsz):
+    """Compara latência e concordância das detecções entre as variantes FP32 e INT8."""
+    lat_fp32, res_fp32 = avaliar(ModeloOnnxRuntime(caminho_fp32, imgsz), frames, nome_modelo)
+    lat_int8, res_int8 = avaliar(ModeloOnnxRuntime(caminho_int8, imgsz), frames, nome_modelo)
+
+    relatorio = {
+        'frames_avaliados': len(frames),
+        'latencia_fp32_ms': {'media': float(lat_fp32.mean()), 'p95': float(np.percentile(lat_fp32, 95))},
+        'latencia_int8_ms': {'media': float(lat_int8.mean()), 'p95': float(np.percentile(lat_int8, 95))},
+        'aceleracao': float(lat_fp32.mean() / lat_int8.mean())
+    }
+    if nome_modelo == 'roi_detector':
+        presenca = [(a['roi'] is None) == (b['roi'] is None) for a, b in zip(res_fp32, res_int8)]
+        relatorio['concordancia_presenca_roi'] = float(np.mean(presenca))
+        relatorio['iou_medio_roi'] = float(np.mean([_iou(a['roi'], b['roi']) for a, b in zip(res_fp32, res_int8)]))
+    else:
+        diferencas = np.array([abs(a['itens'] - b['itens']) for a, b in zip(res_fp32, res_int8)])
+        relatorio['concordancia_contagem_itens'] = float(np.mean(diferencas == 0))
+        relatorio['diferenca_media_itens'] = float(diferencas.mean())
+        relatorio['concordancia_presenca_divisor'] = float(
+            np.mean([a['divisor'] == b['divisor'] for a, b in zip(res_fp32, res_int8)])
+        )
+    return relatorio
+
+
+def imprimir_relatorio(relatorio):
+    for nome_modelo, dados in relatorio['modelos'].items():
+        print(f"\n[MODELO] {nome_modelo} ({dados['frames_avaliados']} frames)")
+        print(f"  Latência FP32: {dados['latencia_fp32_ms']['media']:.1f}ms (p95 {dados['latencia_fp32_ms']['p95']:.1f}ms)")
+        print(f"  Latência INT8: {dados['latencia_int8_ms']['media']:.1f}ms (p95 {dados['latencia_int8_ms']['p95']:.1f}ms)")
+        print(f"  Aceleração: {dados['aceleracao']:.2f}x")
+        for chave in ('concordancia_presenca_roi', 'concordancia_contagem_itens', 'concordancia_presenca_divisor'):
+            if chave in dados:
+                print(f"  {chave}: {dados[chave]:.1%}")
+        for chave in ('iou_medio_roi', 'diferenca_media_itens'):
+            if chave in dados:
+                print(f"  {chave}: {dados[chave]:.3f}")
+
+
+def executar(diretorio, frames_calibracao, frames_avaliacao, imgsz, saida):
+    """Quantiza os modelos de produção e gera o relatório de latência e concordância."""
+    videos = listar_videos(diretorio)
+    if not videos:
+        print(f"[ERRO] Nenhum vídeo encontrado em: {diretorio}")
+        return
+
+    # Amostras disjuntas para calibração e avaliação
+    por_video_cal = max(1, frames_calibracao // len(videos))
+    por_video_aval = max(1, frames_avaliacao // len(videos))
+    calibracao = [f for v in videos for f in amostrar_frames(v, por_video_cal)]
+    avaliacao = [f for v in videos for f in amostrar_frames(v, por_video_aval, deslocamento=0.5)]
+    print(f"-- Quantização INT8: {len(calibracao)} frames de calibração, {len(avaliacao)} de avaliação --")
+
+    relatorio = {'imgsz': imgsz, 'videos': [os.path.basename(v) for v in videos], 'modelos': {}}
+    for nome_modelo, caminho_pesos in MODELOS.items():
+        caminho_fp32, caminho_int8 = quantizar(caminho_pesos, calibracao, imgsz)
+        relatorio['modelos'][nome_modelo] = comparar(nome_modelo, caminho_fp32, caminho_int8, avaliacao, imgsz)
+        relatorio['modelos'][nome_modelo]['artefato_int8'] = caminho_int8
+
+    imprimir_relatorio(relatorio)
+    with open(saida, 'w', encoding='utf-8') as arquivo:
+        json.dump(relatorio, arquivo, indent=2, ensure_ascii=False)
+    print(f"\n[INFO] Relatório salvo em: {saida}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Gera variantes INT8 dos modelos de produção e compara com FP32.")
+    parser.add_argument('--videos', type=str, default=DIRETORIO_VIDEOS_TESTE, help="Diretório com os vídeos de calibração/avaliação.")
+    parser.add_argument('--calibracao', type=int, default=200, help="Número de frames de calibração.")
+    parser.add_argument('--avaliacao', type=int, default=100, help="Número de frames de avaliação.")
+    parser.add_argument('--imgsz', type=int, default=TAMANHO_IMAGEM_INFERENCIA, help="Tamanho da imagem de entrada.")
+    parser.add_argument('--saida', type=str, default='relatorio_quantizacao.json', help="Arquivo JSON do relatório.")
+
+    args = parser.parse_args()
+
+    init_siac_logging(log_level="WARNING", enable_file_logging=False)
+    executar(args.videos, args.calibracao, args.avaliacao, args.imgsz, args.saida)
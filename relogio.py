@@ -0,0 +1,38 @@
+"""
+Relógios usados pela máquina de estados.
+
+Em produção o StateManager usa o tempo de parede (`time.time`). No
+processamento offline ele usa o timestamp de cada frame, de modo que as
+carências e timeouts dependem apenas do vídeo, e não da velocidade de
+processamento.
+"""
+
+
+class RelogioQuadros:
+    """
+    Relógio que informa o timestamp (em segundos) do frame em processamento.
+    Deve ser avançado a cada frame antes de `StateManager.atualizar_estado`.
+    """
+    def __init__(self, inicio=0.0):
+        self.tempo = float(inicio)
+
+    def avancar_para(self, timestamp):
+        """Define o timestamp do frame atual (nunca volta no tempo)."""
+        self.tempo = max(self.tempo, float(timestamp))
+
+    def __call__(self):
+        return self.tempo
+
+
+def timestamp_do_frame(cap, indice, fps):
+    """
+    Timestamp (em segundos) do frame recém-lido de um cv2.VideoCapture ou
+    FonteVideo: usa o PTS do vídeo quando disponível e, caso contrário,
+    índice / FPS.
+    """
+    import cv2
+
+    posicao_ms = cap.get(cv2.CAP_PROP_POS_MSEC)
+    if posicao_ms > 0 or indice == 0:
+        return posicao_ms / 1000.0
+    return indice / fps if fps > 0 else 0.0
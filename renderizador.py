@@ -0,0 +1,125 @@
+import threading
+import time
+import cv2
+
+from config import FPS_RENDERIZACAO
+from logger_config import get_siac_logger
+import metricas
+
+
+class RenderizadorAssincrono:
+    """
+    Exibe o último resultado publicado em uma thread própria, a no máximo
+    `fps` quadros por segundo.
+
+    `publicar` apenas troca a referência do último resultado (frame,
+    detecções e status) sob um lock, então a detecção e a máquina de estados
+    nunca esperam pelo desenho nem pela janela. Resultados publicados entre
+    dois quadros exibidos são simplesmente substituídos. O desenho é feito no
+    buffer reutilizado do Visualizer (ou direto na cópia feita por `publicar`).
+
+    Todas as chamadas de janela do OpenCV (imshow, waitKey, destroyWindow)
+    ficam nesta thread. Em plataformas que exigem a interface gráfica na
+    thread principal (ex.: macOS), use a renderização síncrona.
+    """
+    def __init__(self, visualizer, fps=FPS_RENDERIZACAO, titulo='SIAC - Verificador de Caixas'):
+        """
+        Args:
+            visualizer: Visualizer usado exclusivamente por esta thread.
+            fps: Taxa máxima de exibição.
+            titulo: Título da janela.
+        """
+        self.logger = get_siac_logger("RENDERIZADOR")
+        self.visualizer = visualizer
+        self.intervalo = 1.0 / max(0.1, float(fps))
+        self.titulo = titulo
+
+        self._lock = threading.Lock()
+        self._ultimo = None
+        self._versao = 0
+        self._proxima_copia = 0.0
+        self._parar = threading.Event()
+        # Sinalizado quando o usuário pressiona 'q' na janela
+        self.saida_solicitada = threading.Event()
+
+        # Métricas
+        self.total_publicados = 0
+        self.total_exibidos = 0
+
+        self._thread = threading.Thread(target=self._renderizar_continuamente, name="siac-renderizacao", daemon=True)
+        self._thread.start()
+        self.logger.info(f"Renderização assíncrona a até {fps} FPS")
+
+    def publicar(self, frame, roi, itens, divisores, status_visual, nivel_degradacao=None, copiar=False):
+        """
+        Entrega o resultado mais recente para exibição. Sem `copiar`, o frame
+        não é copiado: quem publica não deve modificá-lo depois.
+
+        Com `copiar` (frames reutilizados pela fonte, ver FonteVideo), o frame
+        é copiado, mas só um resultado por intervalo de exibição: os publicados
+        antes do próximo intervalo são ignorados, já que não seriam exibidos.
+        """
+        proprio = False
+        if copiar:
+            agora = time.perf_counter()
+            if agora < self._proxima_copia:
+                return
+            self._proxima_copia = agora + self.intervalo
+            frame, proprio = frame.copy(), True
+        with self._lock:
+            self._ultimo = (frame, proprio, roi, itens, divisores, status_visual, nivel_degradacao)
+            self._versao += 1
+            self.total_publicados += 1
+
+    def fechar(self):
+        """Encerra a thread de renderização e fecha a janela."""
+        if self._thread.is_alive():
+            self._parar.set()
+            self._thread.join(timeout=2.0)
+        self.logger.info(f"Renderização encerrada: {self.total_exibidos} de {self.total_publicados} resultados exibidos")
+
+    def _renderizar_continuamente(self):
+        versao_exibida = 0
+        proximo_quadro = time.perf_counter()
+        try:
+            while not self._parar.is_set():
+                with self._lock:
+                    versao, ultimo = self._versao, self._ultimo
+                if versao != versao_exibida:
+                    self._exibir(*ultimo)
+                    versao_exibida = versao
+
+                proximo_quadro += self.intervalo
+                agora = time.perf_counter()
+                if proximo_quadro < agora:
+                    # Desenho mais lento que o intervalo: recomeça a contagem em vez de acumular atraso
+                    proximo_quadro = agora
+                if self.total_exibidos == 0:
+                    # Sem janela aberta o waitKey retorna na hora; espera pelo primeiro resultado
+                    self._parar.wait(self.intervalo)
+                    continue
+                # O waitKey processa os eventos da janela e faz a espera até o próximo quadro
+                if cv2.waitKey(max(1, int((proximo_quadro - agora) * 1000))) & 0xFF == ord('q'):
+                    self.logger.info("Comando de saída recebido pelo usuário")
+                    self.saida_solicitada.set()
+        except Exception as e:
+            self.logger.error(f"Falha na renderização: {e}")
+            self.saida_solicitada.set()
+        finally:
+            if self.total_exibidos:
+                cv2.destroyWindow(self.titulo)
+                cv2.waitKey(1)
+
+    def _exibir(self, frame, proprio, roi, itens, divisores, status_visual, nivel_degradacao):
+        inicio = time.perf_counter()
+        # A cópia feita em `publicar` já pertence ao renderizador e pode receber o desenho
+        quadro = frame if proprio else self.visualizer.copiar_para_buffer(frame)
+        self.visualizer.desenhar_visualizacoes(quadro, roi, itens, divisores, status_visual)
+        if nivel_degradacao is not None:
+            self.visualizer.desenhar_nivel_degradacao(quadro, nivel_degradacao)
+        metricas.LATENCIA_ESTAGIO.observar(time.perf_counter() - inicio, 'desenho')
+
+        inicio = time.perf_counter()
+        cv2.imshow(self.titulo, quadro)
+        metricas.LATENCIA_ESTAGIO.observar(time.perf_counter() - inicio, 'exibicao')
+        self.total_exibidos += 1
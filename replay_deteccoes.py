@@ -0,0 +1,63 @@
+import argparse
+import json
+import time
+
+from gravacao import ReprodutorDeteccoes
+from main import SiacApp
+from processar_video import RegistroResultados
+from relogio import RelogioQuadros
+
+
+def reproduzir(diretorio, parametros_estado=None):
+    """
+    Reproduz uma gravação de detecções pela filtragem de ROI do SiacApp e
+    pelo StateManager, sem inferência e sem janela. O relógio da máquina de
+    estados segue os timestamps gravados.
+
+    Args:
+        diretorio: Diretório da gravação.
+        parametros_estado: Constantes da máquina de estados a sobrescrever
+            (ver `state_manager.PARAMETROS_PADRAO`).
+
+    Returns:
+        Dicionário com o resumo da reprodução e os resultados por caixa.
+    """
+    reprodutor = ReprodutorDeteccoes(diretorio)
+    relogio = RelogioQuadros()
+    # O reprodutor ocupa o lugar do Detector, então nenhum modelo é carregado
+    app = SiacApp(detector=reprodutor, headless=True, relogio=relogio, parametros_estado=parametros_estado)
+    registro = RegistroResultados(app.state_manager)
+
+    indice = -1
+    timestamp = 0.0
+    inicio = time.perf_counter()
+    for indice, (timestamp, resultados) in enumerate(reprodutor):
+        relogio.avancar_para(timestamp)
+        app.processar_frame(None, resultados)
+        registro.registrar(indice, timestamp)
+    registro.finalizar_video(indice, timestamp)
+    duracao = time.perf_counter() - inicio
+
+    return {
+        'gravacao': diretorio,
+        'frames': indice + 1,
+        'duracao_reproducao_s': round(duracao, 3),
+        'caixas': registro.caixas
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Reproduz detecções gravadas pela máquina de estados, sem inferência.")
+    parser.add_argument('gravacao', type=str, help="Diretório da gravação (gerado com --gravar).")
+    parser.add_argument('--saida', type=str, default=None, help="Arquivo JSON de saída (padrão: imprime na tela).")
+
+    args = parser.parse_args()
+
+    resultado = reproduzir(args.gravacao)
+    texto = json.dumps(resultado, indent=2, ensure_ascii=False)
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as arquivo:
+            arquivo.write(texto)
+        print(f"[INFO] Resultados salvos em: {args.saida}")
+    else:
+        print(texto)
@@ -0,0 +1,139 @@
+import cv2
+
+from config import (
+    INTERVALO_DETECCAO_ROI, CONFIANCA_MINIMA_RASTREAMENTO, ESCALA_RASTREAMENTO_ROI, MARGEM_BUSCA_RASTREAMENTO
+)
+from logger_config import get_siac_logger
+
+
+class RastreadorROI:
+    """
+    Propaga a ROI (caixa) entre execuções do modelo de ROI usando template
+    matching em uma versão reduzida e em tons de cinza do frame.
+
+    O modelo completo volta a rodar a cada `intervalo_deteccao` frames ou
+    quando a correlação do template cai abaixo de `confianca_minima`.
+    """
+    def __init__(self, intervalo_deteccao=INTERVALO_DETECCAO_ROI, confianca_minima=CONFIANCA_MINIMA_RASTREAMENTO,
+                 escala=ESCALA_RASTREAMENTO_ROI, margem_busca=MARGEM_BUSCA_RASTREAMENTO):
+        """
+        Args:
+            intervalo_deteccao: Máximo de frames rastreados entre duas detecções completas.
+            confianca_minima: Correlação mínima (TM_CCOEFF_NORMED) para aceitar o rastreamento.
+            escala: Fator de redução do frame usado no template matching.
+            margem_busca: Margem da janela de busca, como fração do tamanho da ROI.
+        """
+        self.logger = get_siac_logger("ROI_TRACKER")
+        self.intervalo_deteccao = max(1, int(intervalo_deteccao))
+        self.confianca_minima = confianca_minima
+        self.escala = escala
+        self.margem_busca = margem_busca
+
+        self.roi = None
+        self.template = None
+        self.frames_desde_deteccao = 0
+        self.ultima_confianca = 0.0
+
+        # Métricas
+        self.total_deteccoes = 0
+        self.total_rastreados = 0
+        self.total_falhas = 0
+
+    def precisa_detectar(self):
+        """Indica se o modelo de ROI deve rodar no próximo frame."""
+        return self.roi is None or self.frames_desde_deteccao >= self.intervalo_deteccao
+
+    def reiniciar(self, frame, roi):
+        """
+        Reinicia o rastreamento a partir de uma detecção completa.
+
+        Args:
+            frame: Frame em que a ROI foi detectada.
+            roi: ROI detectada [x1, y1, x2, y2], ou None se não houve detecção.
+        """
+        self.total_deteccoes += 1
+        self.frames_desde_deteccao = 0
+        self.roi = None
+        self.template = None
+
+        if roi is None:
+            return
+
+        x1, y1, x2, y2 = self._para_escala_reduzida(roi)
+        cinza = self._reduzir(frame)
+        template = cinza[y1:y2, x1:x2]
+        if template.shape[0] < 4 or template.shape[1] < 4:
+            return
+
+        self.roi = list(roi)
+        self.template = template
+        self.ultima_confianca = 1.0
+
+    def rastrear(self, frame):
+        """
+        Propaga a última ROI para o frame atual.
+
+        Returns:
+            A nova ROI [x1, y1, x2, y2], ou None se o rastreamento falhou
+            (nesse caso o modelo de ROI deve rodar neste frame).
+        """
+        if self.roi is None:
+            return None
+
+        cinza = self._reduzir(frame)
+        altura, largura = cinza.shape[:2]
+        x1, y1, x2, y2 = self._para_escala_reduzida(self.roi)
+        alt_template, larg_template = self.template.shape[:2]
+
+        # Janela de busca ao redor da última posição
+        margem_x = int((x2 - x1) * self.margem_busca)
+        margem_y = int((y2 - y1) * self.margem_busca)
+        bx1, by1 = max(0, x1 - margem_x), max(0, y1 - margem_y)
+        bx2 = min(largura, max(x2 + margem_x, bx1 + larg_template))
+        by2 = min(altura, max(y2 + margem_y, by1 + alt_template))
+        janela = cinza[by1:by2, bx1:bx2]
+
+        if janela.shape[0] < alt_template or janela.shape[1] < larg_template:
+            self._falhar("janela de busca menor que o template")
+            return None
+
+        resposta = cv2.matchTemplate(janela, self.template, cv2.TM_CCOEFF_NORMED)
+        _, confianca, _, (mx, my) = cv2.minMaxLoc(resposta)
+        self.ultima_confianca = confianca
+
+        if confianca < self.confianca_minima:
+            self._falhar(f"confiança {confianca:.2f} < {self.confianca_minima}")
+            return None
+
+        # Converte o deslocamento encontrado de volta para o frame original
+        dx = int(round((bx1 + mx - x1) / self.escala))
+        dy = int(round((by1 + my - y1) / self.escala))
+        rx1, ry1, rx2, ry2 = self.roi
+        self.roi = [rx1 + dx, ry1 + dy, rx2 + dx, ry2 + dy]
+
+        self.frames_desde_deteccao += 1
+        self.total_rastreados += 1
+        return list(self.roi)
+
+    def metricas(self):
+        """Retorna as métricas acumuladas do rastreador."""
+        total = self.total_deteccoes + self.total_rastreados
+        return {
+            'deteccoes_completas': self.total_deteccoes,
+            'frames_rastreados': self.total_rastreados,
+            'falhas_rastreamento': self.total_falhas,
+            'percentual_rastreado': self.total_rastreados / total if total else 0.0
+        }
+
+    def _falhar(self, motivo):
+        self.total_falhas += 1
+        self.roi = None
+        self.template = None
+        self.logger.debug("Rastreamento da ROI perdido (%s); nova detecção necessária", motivo)
+
+    def _reduzir(self, frame):
+        cinza = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+        return cv2.resize(cinza, None, fx=self.escala, fy=self.escala, interpolation=cv2.INTER_AREA)
+
+    def _para_escala_reduzida(self, roi):
+        return [int(round(c * self.escala)) for c in roi]
@@ -1,6 +1,7 @@
 from collections import deque
 import time
-import math
+import uuid
+import numpy as np
 from config import (
     ESTADOS, PERFIL_CAIXA, TAMANHO_BUFFER_ESTABILIZACAO, TEMPO_LIMITE_CAIXA_AUSENTE,
     USAR_MEMORIA_ESPACIAL, DISTANCIA_MINIMA_ITEM_NOVO, PERCENTUAL_ITENS_NOVOS_MINIMO,
@@ -10,37 +11,110 @@ from config import (
     DEBUG_DIVISORES
 )
 from logger_config import get_siac_logger, SiacLogger
+from indice_espacial import IndiceGrade, centros_das_caixas
+from auditoria import (
+    EVENTO_CAIXA_INICIADA, EVENTO_CAMADA_COMPLETA, EVENTO_DIVISOR_VERIFICADO, EVENTO_ALARME,
+    EVENTO_CAIXA_COMPLETA, EVENTO_CAIXA_ABORTADA
+)
+import metricas
+
+# Constantes de config.py usadas pela máquina de estados. Podem ser sobrescritas
+# por instância (ex.: varredura de parâmetros em varredura_parametros.py).
+PARAMETROS_PADRAO = {
+    'PERFIL_CAIXA': PERFIL_CAIXA,
+    'TAMANHO_BUFFER_ESTABILIZACAO': TAMANHO_BUFFER_ESTABILIZACAO,
+    'TEMPO_LIMITE_CAIXA_AUSENTE': TEMPO_LIMITE_CAIXA_AUSENTE,
+    'USAR_MEMORIA_ESPACIAL': USAR_MEMORIA_ESPACIAL,
+    'DISTANCIA_MINIMA_ITEM_NOVO': DISTANCIA_MINIMA_ITEM_NOVO,
+    'PERCENTUAL_ITENS_NOVOS_MINIMO': PERCENTUAL_ITENS_NOVOS_MINIMO,
+    'ITENS_MINIMOS_CAMADA_2_ESTABELECIDA': ITENS_MINIMOS_CAMADA_2_ESTABELECIDA,
+    'TEMPO_CARENCIA_DIVISOR_AUSENTE': TEMPO_CARENCIA_DIVISOR_AUSENTE,
+    'TEMPO_CARENCIA_CONTAGEM_BAIXA': TEMPO_CARENCIA_CONTAGEM_BAIXA,
+    'SALTO_SUSPEITO_MINIMO': SALTO_SUSPEITO_MINIMO,
+    'TEMPO_MAXIMO_SALTO': TEMPO_MAXIMO_SALTO,
+    'TEMPO_CARENCIA_SALTO': TEMPO_CARENCIA_SALTO,
+    'PERCENTUAL_ITENS_NOVOS_SALTO': PERCENTUAL_ITENS_NOVOS_SALTO,
+    'TOLERANCIA_OCLUSAO_CAMADA_2': TOLERANCIA_OCLUSAO_CAMADA_2,
+    'SALTO_OCLUSAO_MAXIMO': SALTO_OCLUSAO_MAXIMO,
+    'TEMPO_CARENCIA_PERDA_CAIXA': TEMPO_CARENCIA_PERDA_CAIXA,
+}
+
+# Nome (chave de ESTADOS) usado como rótulo das métricas de cada estado
+_ROTULO_ESTADO = {valor: chave for chave, valor in ESTADOS.items()}
 
 class StateManager:
     """
     Gerencia o estado do sistema, a lógica de transição e as regras de negócio.
     """
-    def __init__(self):
+    def __init__(self, relogio=time.time, parametros=None, auditoria=None, publicador=None, origem='principal'):
         """
         Inicializa a máquina de estados e as variáveis de controle.
+
+        Args:
+            relogio: Função que retorna o tempo atual em segundos. Por padrão o
+                tempo de parede; no processamento offline, o timestamp do frame
+                (ver `relogio.RelogioQuadros`).
+            parametros: Dicionário opcional que sobrescreve, nesta instância,
+                constantes de PARAMETROS_PADRAO (mesmos nomes de config.py).
+            auditoria: RegistroAuditoria opcional que recebe os eventos de
+                cada caixa (ver auditoria.py).
+            publicador: PublicadorAlarmes opcional que envia os alarmes e o
+                resultado de cada caixa ao gateway da linha (ver publicador_alarmes.py).
+            origem: Nome da câmera, usado como rótulo das métricas de estado
+                (várias máquinas de estados no mesmo processo, ver multi_camera.py).
         """
         # Inicializar logger
         self.logger = get_siac_logger("STATE_MANAGER")
+        self.relogio = relogio
+        self.origem = origem
+        # Destinos dos eventos de caixa; todos só enfileiram (sem I/O neste thread)
+        self.destinos_eventos = [destino for destino in (auditoria, publicador) if destino is not None]
+
+        # --- Parâmetros da Máquina de Estados ---
+        desconhecidos = set(parametros or {}) - set(PARAMETROS_PADRAO)
+        if desconhecidos:
+            raise ValueError(f"Parâmetros desconhecidos do StateManager: {sorted(desconhecidos)}")
+        self.parametros = {**PARAMETROS_PADRAO, **(parametros or {})}
+        self.perfil_caixa = self.parametros['PERFIL_CAIXA']
+        self.tamanho_buffer_estabilizacao = self.parametros['TAMANHO_BUFFER_ESTABILIZACAO']
+        self.tempo_limite_caixa_ausente = self.parametros['TEMPO_LIMITE_CAIXA_AUSENTE']
+        self.usar_memoria_espacial = self.parametros['USAR_MEMORIA_ESPACIAL']
+        self.distancia_minima_item_novo = self.parametros['DISTANCIA_MINIMA_ITEM_NOVO']
+        self.percentual_itens_novos_minimo = self.parametros['PERCENTUAL_ITENS_NOVOS_MINIMO']
+        self.itens_minimos_camada_2_estabelecida = self.parametros['ITENS_MINIMOS_CAMADA_2_ESTABELECIDA']
+        self.tempo_carencia_divisor_ausente = self.parametros['TEMPO_CARENCIA_DIVISOR_AUSENTE']
+        self.tempo_carencia_contagem_baixa = self.parametros['TEMPO_CARENCIA_CONTAGEM_BAIXA']
+        self.salto_suspeito_minimo = self.parametros['SALTO_SUSPEITO_MINIMO']
+        self.tempo_maximo_salto = self.parametros['TEMPO_MAXIMO_SALTO']
+        self.tempo_carencia_salto = self.parametros['TEMPO_CARENCIA_SALTO']
+        self.percentual_itens_novos_salto = self.parametros['PERCENTUAL_ITENS_NOVOS_SALTO']
+        self.tolerancia_oclusao_camada_2 = self.parametros['TOLERANCIA_OCLUSAO_CAMADA_2']
+        self.salto_oclusao_maximo = self.parametros['SALTO_OCLUSAO_MAXIMO']
+        self.tempo_carencia_perda_caixa = self.parametros['TEMPO_CARENCIA_PERDA_CAIXA']
         
         # --- Máquina de Estados e Variáveis de Controle ---
         self.status_sistema = ESTADOS['AGUARDANDO_CAIXA']
         self.estado_anterior = None
         self.camada_atual = 1
-        self.contagens_por_camada = {i: 0 for i in range(1, PERFIL_CAIXA['total_camadas'] + 1)}
+        self.contagens_por_camada = {i: 0 for i in range(1, self.perfil_caixa['total_camadas'] + 1)}
         self.contagem_estabilizada = 0
+        self.caixa_id = None  # ID da caixa em verificação (eventos de auditoria e logs)
+        # Identificador desta execução e sequência das caixas, para IDs únicos entre execuções
+        self._execucao = uuid.uuid4().hex[:6]
+        self._sequencia_caixa = 0
 
         # --- Buffers para Estabilização de Detecção ---
-        self.buffer_roi = deque(maxlen=TAMANHO_BUFFER_ESTABILIZACAO)
-        self.buffer_contagem_itens = deque(maxlen=TAMANHO_BUFFER_ESTABILIZACAO)
-        self.buffer_divisor_presente = deque(maxlen=TAMANHO_BUFFER_ESTABILIZACAO)
+        self.buffer_roi = deque(maxlen=self.tamanho_buffer_estabilizacao)
+        self.buffer_contagem_itens = deque(maxlen=self.tamanho_buffer_estabilizacao)
+        self.buffer_divisor_presente = deque(maxlen=self.tamanho_buffer_estabilizacao)
 
         # --- Memória para Caixa Ausente ---
         self.caixa_ausente_desde = None
         self.ultima_roi_conhecida = None
         
         # --- Sistema de Memória Espacial para Prevenção de Falsos Positivos ---
-        self.posicoes_itens_por_camada = {}  # Armazena posições dos itens de cada camada
-        self.usar_memoria_espacial = USAR_MEMORIA_ESPACIAL
+        self.posicoes_itens_por_camada = {}  # Centros (Nx2) dos itens de cada camada
+        self.indices_itens_por_camada = {}   # Índice em grade desses centros, por camada
         
         # --- Controles Especiais ---
         # Controle de timing para divisores (evita contagem prematura)
@@ -70,27 +144,38 @@ class StateManager:
         # --- Controles de Debounce para Alertas ---
         self.ultimo_alerta_tempo = None  # Timestamp do último alerta
         self.ultimo_alerta_tipo = None   # Tipo do último alerta emitido
+
+        # --- Métricas ---
+        self._instante_metricas = None
+        self._estado_publicado = None
         
         self.logger.info("StateManager inicializado")
-        self.logger.info(f"Configuração: {PERFIL_CAIXA['total_camadas']} camadas, {PERFIL_CAIXA['itens_esperados']} itens por camada")
+        self.logger.info(f"Configuração: {self.perfil_caixa['total_camadas']} camadas, {self.perfil_caixa['itens_esperados']} itens por camada")
         self.logger.info(f"Memória espacial: {'Ativada' if self.usar_memoria_espacial else 'Desativada'}")
 
     def atualizar_estado(self, roi, itens_na_roi, divisores_na_roi):
         """
         O coração da máquina de estados. Processa as detecções atuais
         e decide se deve mudar o estado do sistema.
+
+        Args:
+            roi: Linha (x1, y1, x2, y2, ...) da ROI ativa, ou None.
+            itens_na_roi: Array Nx6 (ou lista de caixas) dos itens na ROI.
+            divisores_na_roi: Array Nx6 (ou lista de caixas) dos divisores na ROI.
         """
+        self._atualizar_metricas()
+
         # 1. Atualizar buffers com as detecções do frame atual
-        self.buffer_roi.append(1 if roi else 0)
+        self.buffer_roi.append(1 if roi is not None else 0)
         self.buffer_contagem_itens.append(len(itens_na_roi))
-        self.buffer_divisor_presente.append(1 if divisores_na_roi else 0)
+        self.buffer_divisor_presente.append(1 if len(divisores_na_roi) > 0 else 0)
 
         # 2. Obter valores estabilizados (só continua se os buffers estiverem cheios)
-        if len(self.buffer_roi) < TAMANHO_BUFFER_ESTABILIZACAO:
+        if len(self.buffer_roi) < self.tamanho_buffer_estabilizacao:
             return # Aguardando buffers encherem
 
         # A ROI é considerada estável se estiver presente na maioria dos frames do buffer.
-        roi_estavel = sum(self.buffer_roi) > (TAMANHO_BUFFER_ESTABILIZACAO / 2)
+        roi_estavel = sum(self.buffer_roi) > (self.tamanho_buffer_estabilizacao / 2)
         # Para contagem, usamos a moda (valor mais comum) para robustez
         self.contagem_estabilizada = max(set(self.buffer_contagem_itens), key=self.buffer_contagem_itens.count)
         divisor_estavel = sum(self.buffer_divisor_presente) > 0 # Presente se detectado em pelo menos 1 frame do buffer
@@ -106,13 +191,15 @@ class StateManager:
         elif estado_atual == ESTADOS['CONTANDO_ITENS']:
             # Defesa Nível 1: Se a caixa sumir, aplicar lógica inteligente
             if not roi_estavel:
-                tempo_atual = time.time()
+                tempo_atual = self.relogio()
                 
                 # ALERTA IMEDIATO para caixa incompleta (sem carência)
-                if self.contagem_estabilizada > 0 and self.contagem_estabilizada < PERFIL_CAIXA['itens_por_camada']:
+                if self.contagem_estabilizada > 0 and self.contagem_estabilizada < self.perfil_caixa['itens_esperados']:
                     if self._pode_alertar("caixa_incompleta", 3.0):
-                        self.logger.error(f"🚨 ALERTA IMEDIATO: Caixa removida INCOMPLETA! Camada {self.camada_atual}: {self.contagem_estabilizada}/{PERFIL_CAIXA['itens_por_camada']} itens")
+                        self.logger.error(f"🚨 ALERTA IMEDIATO: Caixa removida INCOMPLETA! Camada {self.camada_atual}: {self.contagem_estabilizada}/{self.perfil_caixa['itens_esperados']} itens")
                         self.logger.error(f"⚠️  Caixa retirada com contagem em andamento - SEM carência")
+                    self._registrar_evento(EVENTO_ALARME, alarme='caixa_removida_incompleta',
+                                           itens=self.contagem_estabilizada, esperados=self.perfil_caixa['itens_esperados'])
                     
                     # Ir direto para CAIXA_AUSENTE sem carência
                     self._transitar_para(ESTADOS['CAIXA_AUSENTE'], "ROI perdida - caixa incompleta")
@@ -125,13 +212,13 @@ class StateManager:
                     # Primeira detecção de perda, iniciar carência
                     self.tempo_perda_caixa = tempo_atual
                     self.estado_antes_perda_caixa = self.status_sistema
-                    self.logger.debug(f"Caixa perdida, iniciando carência de {TEMPO_CARENCIA_PERDA_CAIXA}s")
+                    self.logger.debug("Caixa perdida, iniciando carência de %ss", self.tempo_carencia_perda_caixa)
                     return
                 
                 tempo_carencia = tempo_atual - self.tempo_perda_caixa
-                if tempo_carencia < TEMPO_CARENCIA_PERDA_CAIXA:
+                if tempo_carencia < self.tempo_carencia_perda_caixa:
                     # Ainda em carência, aguardar
-                    self.logger.debug(f"Carência perda caixa: {tempo_carencia:.1f}/{TEMPO_CARENCIA_PERDA_CAIXA}s")
+                    self.logger.debug("Carência perda caixa: %.1f/%ss", tempo_carencia, self.tempo_carencia_perda_caixa)
                     return
                 
                 # Carência expirada para casos normais
@@ -145,8 +232,8 @@ class StateManager:
             else:
                 # Caixa presente, reset carência
                 if self.tempo_perda_caixa is not None:
-                    tempo_carencia = time.time() - self.tempo_perda_caixa
-                    self.logger.debug(f"Caixa recuperada após {tempo_carencia:.1f}s de carência")
+                    tempo_carencia = self.relogio() - self.tempo_perda_caixa
+                    self.logger.debug("Caixa recuperada após %.1fs de carência", tempo_carencia)
                     self.tempo_perda_caixa = None
                     self.estado_antes_perda_caixa = None
 
@@ -165,26 +252,28 @@ class StateManager:
                     return
 
             # Somente se as condições acima forem atendidas, prosseguimos para a lógica de conclusão.
-            camada_completa = self.contagem_estabilizada >= PERFIL_CAIXA['itens_esperados']
+            camada_completa = self.contagem_estabilizada >= self.perfil_caixa['itens_esperados']
 
             if camada_completa:
                 SiacLogger.log_layer_completion(
                     self.logger, 
                     self.camada_atual, 
                     self.contagem_estabilizada, 
-                    PERFIL_CAIXA['itens_esperados']
+                    self.perfil_caixa['itens_esperados']
                 )
+                self._registrar_evento(EVENTO_CAMADA_COMPLETA, itens=self.contagem_estabilizada,
+                                       esperados=self.perfil_caixa['itens_esperados'])
                 
                 # Armazenar posições dos itens da camada completa
                 if self.usar_memoria_espacial:
-                    self.posicoes_itens_por_camada[self.camada_atual] = itens_na_roi.copy()
+                    self._memorizar_itens_camada(itens_na_roi)
                     self.logger.info(f"Posições da camada {self.camada_atual} armazenadas: {len(itens_na_roi)} itens")
                 
                 # Lógica diferenciada por camada
                 if self.camada_atual == 1:
                     # Camada 1: Aguardar divisor obrigatório
                     self._transitar_para(ESTADOS['AGUARDANDO_DIVISOR'], f"Camada {self.camada_atual} completa - aguardando divisor")
-                elif self.camada_atual == PERFIL_CAIXA['total_camadas']:
+                elif self.camada_atual == self.perfil_caixa['total_camadas']:
                     # Última camada: Finalizar direto, sem procurar divisor
                     self.contagens_por_camada[self.camada_atual] = self.contagem_estabilizada
                     total_itens = sum(self.contagens_por_camada.values())
@@ -208,7 +297,7 @@ class StateManager:
             if len(divisores_na_roi) > 0:
                 self.divisor_detectado_frames += 1
                 if self.divisor_detectado_frames < self.frames_minimos_divisor:
-                    self.logger.debug(f"Divisor detectado, aguardando estabilização ({self.divisor_detectado_frames}/{self.frames_minimos_divisor})")
+                    self.logger.debug("Divisor detectado, aguardando estabilização (%s/%s)", self.divisor_detectado_frames, self.frames_minimos_divisor)
                     return
             else:
                 self.divisor_detectado_frames = 0
@@ -216,15 +305,16 @@ class StateManager:
             if divisor_estavel:
                 # SUCESSO: Contagem máxima e divisor presente.
                 self.logger.info(f"Verificação da camada {self.camada_atual} bem-sucedida (Divisor presente)")
+                self._registrar_evento(EVENTO_DIVISOR_VERIFICADO, metodo='divisor_presente')
                 
                 # Armazenar posições dos itens da camada atual
                 if self.usar_memoria_espacial:
-                    self.posicoes_itens_por_camada[self.camada_atual] = itens_na_roi.copy()
+                    self._memorizar_itens_camada(itens_na_roi)
                     self.logger.info(f"Posições da camada {self.camada_atual} armazenadas: {len(itens_na_roi)} itens")
                 
                 self.contagens_por_camada[self.camada_atual] = self.contagem_estabilizada
 
-                if self.camada_atual < PERFIL_CAIXA['total_camadas']:
+                if self.camada_atual < self.perfil_caixa['total_camadas']:
                     # Avança para a próxima camada
                     self.camada_atual += 1
                     self.logger.info(f"Iniciando contagem para a camada {self.camada_atual}")
@@ -245,7 +335,7 @@ class StateManager:
                     
                     # Armazenar posições e avançar para próxima camada
                     if self.usar_memoria_espacial:
-                        self.posicoes_itens_por_camada[self.camada_atual] = itens_na_roi.copy()
+                        self._memorizar_itens_camada(itens_na_roi)
                         self.logger.info(f"Posições da camada {self.camada_atual} armazenadas: {len(itens_na_roi)} itens")
                     
                     self.contagens_por_camada[self.camada_atual] = self.contagem_estabilizada
@@ -258,19 +348,19 @@ class StateManager:
                 if self.usar_memoria_espacial and self.camada_atual > 1:
                     # Usar memória espacial para validar se os itens são realmente novos
                     itens_novos = self._verificar_itens_novos(itens_na_roi)
-                    percentual_novos = len(itens_novos) / len(itens_na_roi) if itens_na_roi else 0
+                    percentual_novos = len(itens_novos) / len(itens_na_roi) if len(itens_na_roi) > 0 else 0
                     
                     self.logger.info(f"Análise espacial - Itens novos: {len(itens_novos)}/{len(itens_na_roi)} ({percentual_novos:.1%})")
                     
-                    if percentual_novos >= PERCENTUAL_ITENS_NOVOS_MINIMO:
+                    if percentual_novos >= self.percentual_itens_novos_minimo:
                         # Maioria dos itens são novos, pode ser uma camada válida mesmo sem divisor
                         self.logger.warning(f"Divisor ausente, mas {percentual_novos:.1%} dos itens são novos. Considerando camada válida.")
                         
                         # Armazenar posições e avançar
-                        self.posicoes_itens_por_camada[self.camada_atual] = itens_na_roi.copy()
+                        self._memorizar_itens_camada(itens_na_roi)
                         self.contagens_por_camada[self.camada_atual] = self.contagem_estabilizada
                         
-                        if self.camada_atual < PERFIL_CAIXA['total_camadas']:
+                        if self.camada_atual < self.perfil_caixa['total_camadas']:
                             self.camada_atual += 1
                             self.logger.info(f"Avançando para camada {self.camada_atual} (validação espacial)")
                             self.buffer_contagem_itens.clear()
@@ -285,6 +375,7 @@ class StateManager:
                 else:
                     self.logger.warning(f"Verificação falhou. Divisor ausente na camada {self.camada_atual}. Falso positivo detectado")
                 
+                self._registrar_evento(EVENTO_ALARME, alarme='divisor_ausente', itens=self.contagem_estabilizada)
                 self._transitar_para(ESTADOS['ALERTA_DIVISOR_AUSENTE'], "Falso positivo detectado")
 
         elif estado_atual == ESTADOS['AGUARDANDO_DIVISOR']:
@@ -293,7 +384,8 @@ class StateManager:
                 # Alerta específico: caixa removida após completar camada mas antes do divisor
                 if self._pode_alertar("caixa_pos_camada_completa", 5.0):
                     self.logger.error(f"🚨 ALERTA: Caixa removida após completar camada {self.camada_atual-1}!")
-                    self.logger.error(f"⚠️  Camada {self.camada_atual-1} estava completa ({PERFIL_CAIXA['itens_por_camada']} itens), aguardando divisor")
+                    self.logger.error(f"⚠️  Camada {self.camada_atual-1} estava completa ({self.perfil_caixa['itens_esperados']} itens), aguardando divisor")
+                self._registrar_evento(EVENTO_ALARME, alarme='caixa_removida_aguardando_divisor')
                 self._transitar_para(ESTADOS['AGUARDANDO_CAIXA'], "ROI perdida aguardando divisor")
                 return
             
@@ -306,6 +398,7 @@ class StateManager:
                     if not self.divisor_cobrindo_itens:
                         self.logger.info(f"Divisor cobrindo todos os itens da camada {self.camada_atual}. Preparando para avançar.")
                         self.divisor_cobrindo_itens = True
+                        self._registrar_evento(EVENTO_DIVISOR_VERIFICADO, metodo='divisor_cobrindo_itens')
                         
                         # Posições já foram armazenadas quando a camada foi completada
                         
@@ -317,11 +410,11 @@ class StateManager:
                         self._transitar_para(ESTADOS['CONTANDO_ITENS'], f"Avançando para camada {self.camada_atual}")
                 else:
                     # Divisor presente mas ainda não cobriu todos os itens
-                    self.logger.debug(f"Divisor presente, mas ainda vendo {contagem_atual} itens. Aguardando cobertura completa.")
+                    self.logger.debug("Divisor presente, mas ainda vendo %s itens. Aguardando cobertura completa.", contagem_atual)
                     self.divisor_cobrindo_itens = False
             else:
                 # Ainda aguardando divisor - manter estado
-                self.logger.debug(f"Aguardando divisor após completar camada {self.camada_atual}")
+                self.logger.debug("Aguardando divisor após completar camada %s", self.camada_atual)
 
         elif estado_atual == ESTADOS['ALERTA_DIVISOR_AUSENTE']:
             if divisor_estavel:
@@ -330,49 +423,51 @@ class StateManager:
             elif not roi_estavel:
                 self.logger.warning("Caixa removida durante o alerta de divisor")
                 self._transitar_para(ESTADOS['CAIXA_AUSENTE'], "ROI perdida durante alerta")
-                self.caixa_ausente_desde = time.time()
+                self.caixa_ausente_desde = self.relogio()
 
         elif estado_atual == ESTADOS['CAIXA_COMPLETA']:
             # O sistema aguarda a caixa ser removida para reiniciar o ciclo.
             if not roi_estavel:
                 self.logger.info("Caixa completa removida. Reiniciando o ciclo para a próxima caixa")
-                self._resetar_sistema()
+                self._resetar_sistema("Caixa completa removida")
 
         elif estado_atual == ESTADOS['CAIXA_AUSENTE']:
             if roi_estavel:
-                tempo_ausente = time.time() - self.caixa_ausente_desde if self.caixa_ausente_desde else 0
+                tempo_ausente = self.relogio() - self.caixa_ausente_desde if self.caixa_ausente_desde else 0
                 self.logger.info(f"Caixa reapareceu após {tempo_ausente:.1f}s. Retomando contagem")
                 self._transitar_para(self.estado_anterior, "ROI reapareceu") # Volta para o estado que estava antes da ausência
                 self.caixa_ausente_desde = None
             
-            elif self.caixa_ausente_desde and (time.time() - self.caixa_ausente_desde > TEMPO_LIMITE_CAIXA_AUSENTE):
+            elif self.caixa_ausente_desde and (self.relogio() - self.caixa_ausente_desde > self.tempo_limite_caixa_ausente):
                 # Alerta detalhado sobre progresso perdido
                 total_itens_perdidos = sum(self.contagens_por_camada.values()) + self.contagem_estabilizada
-                self.logger.error(f"🚨 TIMEOUT: Caixa ausente por {TEMPO_LIMITE_CAIXA_AUSENTE}s - RESETANDO SISTEMA")
+                self.logger.error(f"🚨 TIMEOUT: Caixa ausente por {self.tempo_limite_caixa_ausente}s - RESETANDO SISTEMA")
                 self.logger.error(f"📋 PROGRESSO PERDIDO:")
                 self.logger.error(f"   - Camada atual: {self.camada_atual}")
-                self.logger.error(f"   - Itens na camada atual: {self.contagem_estabilizada}/{PERFIL_CAIXA['itens_por_camada']}")
+                self.logger.error(f"   - Itens na camada atual: {self.contagem_estabilizada}/{self.perfil_caixa['itens_esperados']}")
                 self.logger.error(f"   - Total de itens perdidos: {total_itens_perdidos}")
                 for camada, contagem in self.contagens_por_camada.items():
                     if contagem > 0:
                         self.logger.error(f"   - Camada {camada}: {contagem} itens")
-                self._resetar_sistema()
+                self._registrar_evento(EVENTO_ALARME, alarme='timeout_caixa_ausente', itens_perdidos=total_itens_perdidos)
+                self._resetar_sistema("Timeout de caixa ausente")
 
-    def _resetar_sistema(self):
+    def _resetar_sistema(self, motivo="Reset do sistema"):
         """Reseta o estado do sistema para o inicial."""
         self.logger.info("Sistema resetado - reiniciando ciclo completo")
-        self._transitar_para(ESTADOS['AGUARDANDO_CAIXA'], "Reset do sistema")
+        self._transitar_para(ESTADOS['AGUARDANDO_CAIXA'], motivo)
         self.camada_atual = 1
-        self.contagens_por_camada = {i: 0 for i in range(1, PERFIL_CAIXA['total_camadas'] + 1)}
+        self.contagens_por_camada = {i: 0 for i in range(1, self.perfil_caixa['total_camadas'] + 1)}
         self.contagem_estabilizada = 0
         self.caixa_ausente_desde = None
         self.ultima_roi_conhecida = None
         # Limpa a memória espacial
         self.posicoes_itens_por_camada.clear()
+        self.indices_itens_por_camada.clear()
         # Limpa os buffers
-        self.buffer_roi = []
-        self.buffer_contagem_itens = []
-        self.buffer_divisor_presente = []
+        self.buffer_roi.clear()
+        self.buffer_contagem_itens.clear()
+        self.buffer_divisor_presente.clear()
         
         # Controle de estabilização
         self.divisor_detectado_frames = 0
@@ -402,7 +497,7 @@ class StateManager:
 
     def _pode_alertar(self, tipo_alerta, intervalo_minimo=3.0):
         """Verifica se pode emitir um alerta baseado no debounce."""
-        tempo_atual = time.time()
+        tempo_atual = self.relogio()
         
         if (self.ultimo_alerta_tipo == tipo_alerta and 
             self.ultimo_alerta_tempo and 
@@ -420,55 +515,80 @@ class StateManager:
             self.logger.info(f"TRANSIÇÃO DE ESTADO: {self.status_sistema} → {novo_estado} - {motivo}")
             self.status_sistema = novo_estado
 
+            # Ciclo de vida da caixa para a auditoria: começa ao iniciar a contagem e
+            # termina completa ou, se voltar a aguardar caixa antes disso, abortada.
+            if novo_estado == ESTADOS['CONTANDO_ITENS'] and self.caixa_id is None:
+                self._iniciar_caixa()
+            elif novo_estado == ESTADOS['CAIXA_COMPLETA']:
+                self._encerrar_caixa(EVENTO_CAIXA_COMPLETA, motivo)
+            elif novo_estado == ESTADOS['AGUARDANDO_CAIXA']:
+                self._encerrar_caixa(EVENTO_CAIXA_ABORTADA, motivo)
+
+    def _iniciar_caixa(self):
+        """
+        Atribui um ID à nova caixa e registra o início. O ID usa o tempo de
+        parede (não o relógio injetado, que no processamento offline começa
+        em 0), o identificador da execução e a sequência da caixa nela.
+        """
+        self._sequencia_caixa += 1
+        self.caixa_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{self._execucao}-{self._sequencia_caixa:04d}"
+        self.logger.info(f"Caixa {self.caixa_id} iniciada")
+        self._registrar_evento(EVENTO_CAIXA_INICIADA)
+
+    def _encerrar_caixa(self, tipo, motivo):
+        """Registra o fim da caixa atual (completa ou abortada), se houver uma em andamento."""
+        if self.caixa_id is None:
+            return
+        self._registrar_evento(
+            tipo, motivo=motivo,
+            total_itens=sum(self.contagens_por_camada.values()),
+            contagens_por_camada=dict(self.contagens_por_camada),
+            contagem_camada_atual=self.contagem_estabilizada
+        )
+        self.caixa_id = None
+
+    def _registrar_evento(self, tipo, **dados):
+        """Envia um evento da caixa atual à auditoria e ao publicador de alarmes, se configurados."""
+        if self.destinos_eventos:
+            agora = self.relogio()
+            for destino in self.destinos_eventos:
+                destino.registrar(tipo, self.caixa_id, agora, self.camada_atual, dados)
+
+    def _memorizar_itens_camada(self, itens):
+        """Guarda os centros dos itens da camada atual e indexa-os para consultas em lote."""
+        centros = centros_das_caixas(itens)
+        self.posicoes_itens_por_camada[self.camada_atual] = centros
+        self.indices_itens_por_camada[self.camada_atual] = IndiceGrade(centros, self.distancia_minima_item_novo)
+
     def _verificar_itens_novos(self, itens_atuais):
         """
         Verifica quais itens da lista atual são realmente novos comparando
         com as posições dos itens das camadas anteriores.
+
+        Um item não é novo se o seu centro estiver a menos de
+        DISTANCIA_MINIMA_ITEM_NOVO pixels do centro de algum item de uma
+        camada anterior. A consulta é feita em lote nos índices em grade.
         
         Args:
-            itens_atuais: Lista de coordenadas dos itens detectados atualmente
+            itens_atuais: Array Nx6 (ou lista de caixas) dos itens detectados atualmente
             
         Returns:
-            Lista de itens que são considerados "novos" (não presentes nas camadas anteriores)
+            Array dos itens que são considerados "novos" (não presentes nas camadas anteriores)
         """
-        if not self.usar_memoria_espacial or not itens_atuais:
+        if not self.usar_memoria_espacial or len(itens_atuais) == 0:
             return itens_atuais
-        
-        itens_novos = []
-        
-        for item_atual in itens_atuais:
-            eh_novo = True
-            x1_atual, y1_atual, x2_atual, y2_atual = item_atual
-            centro_atual = ((x1_atual + x2_atual) / 2, (y1_atual + y2_atual) / 2)
-            
-            # Verificar contra todas as camadas anteriores
-            for camada_anterior in range(1, self.camada_atual):
-                if camada_anterior in self.posicoes_itens_por_camada:
-                    itens_camada_anterior = self.posicoes_itens_por_camada[camada_anterior]
-                    
-                    for item_anterior in itens_camada_anterior:
-                        x1_ant, y1_ant, x2_ant, y2_ant = item_anterior
-                        centro_anterior = ((x1_ant + x2_ant) / 2, (y1_ant + y2_ant) / 2)
-                        
-                        # Calcular distância euclidiana entre os centros
-                        distancia = math.sqrt(
-                            (centro_atual[0] - centro_anterior[0]) ** 2 + 
-                            (centro_atual[1] - centro_anterior[1]) ** 2
-                        )
-                        
-                        if distancia < DISTANCIA_MINIMA_ITEM_NOVO:
-                            # Item muito próximo de um item anterior, não é novo
-                            eh_novo = False
-                            self.logger.debug(f"Item descartado (distância {distancia:.1f}px da camada {camada_anterior})")
-                            break
-                    
-                    if not eh_novo:
-                        break
-            
-            if eh_novo:
-                itens_novos.append(item_atual)
-                self.logger.debug(f"Item novo confirmado: centro {centro_atual}")
-        
+
+        itens_atuais = np.asarray(itens_atuais)
+        centros = centros_das_caixas(itens_atuais)
+        eh_antigo = np.zeros(len(itens_atuais), dtype=bool)
+
+        # Verificar contra todas as camadas anteriores
+        for camada_anterior in range(1, self.camada_atual):
+            indice = self.indices_itens_por_camada.get(camada_anterior)
+            if indice is not None:
+                eh_antigo |= indice.possui_vizinho(centros)
+
+        itens_novos = itens_atuais[~eh_antigo]
         self.logger.info(f"Memória espacial: {len(itens_novos)}/{len(itens_atuais)} itens são novos")
         return itens_novos
     
@@ -482,7 +602,7 @@ class StateManager:
         
         Retorna True se a contagem é válida, False se deve pausar processamento
         """
-        tempo_atual = time.time()
+        tempo_atual = self.relogio()
         
         # Só aplicar para camada 2
         if self.camada_atual != 2:
@@ -499,11 +619,11 @@ class StateManager:
         tempo_decorrido = tempo_atual - self.tempo_ultima_contagem_camada_2
         
         # 1. DETECÇÃO DE SALTO SUSPEITO COM TOLERÂNCIA A OCLUSÕES
-        if salto > SALTO_SUSPEITO_MINIMO and tempo_decorrido < TEMPO_MAXIMO_SALTO:
+        if salto > self.salto_suspeito_minimo and tempo_decorrido < self.tempo_maximo_salto:
             # Verificar se é uma oclusão natural (salto pequeno) ou suspeito (salto grande)
-            if TOLERANCIA_OCLUSAO_CAMADA_2 and salto <= SALTO_OCLUSAO_MAXIMO:
+            if self.tolerancia_oclusao_camada_2 and salto <= self.salto_oclusao_maximo:
                 # Salto pequeno - provavelmente oclusão natural, aceitar
-                self.logger.debug(f"Salto pequeno tolerado (oclusão): {self.contagem_anterior_camada_2} → {contagem_atual} em {tempo_decorrido:.1f}s")
+                self.logger.debug("Salto pequeno tolerado (oclusão): %s → %s em %.1fs", self.contagem_anterior_camada_2, contagem_atual, tempo_decorrido)
                 self.contagem_anterior_camada_2 = contagem_atual
                 self.tempo_ultima_contagem_camada_2 = tempo_atual
                 return True
@@ -520,9 +640,9 @@ class StateManager:
         if self.salto_suspeito_detectado:
             tempo_carencia = tempo_atual - self.tempo_inicio_salto_suspeito
             
-            if tempo_carencia < TEMPO_CARENCIA_SALTO:
+            if tempo_carencia < self.tempo_carencia_salto:
                 # Ainda em carência, aguardar
-                self.logger.debug(f"Salto em validação: {tempo_carencia:.1f}/{TEMPO_CARENCIA_SALTO}s")
+                self.logger.debug("Salto em validação: %.1f/%ss", tempo_carencia, self.tempo_carencia_salto)
                 return False
             
             # Carência completa, fazer validação final
@@ -531,9 +651,9 @@ class StateManager:
             # 3. VALIDAÇÃO ESPACIAL
             if self.usar_memoria_espacial:
                 itens_novos = self._verificar_itens_novos(self.itens_salto_suspeito)
-                percentual_novos = len(itens_novos) / len(self.itens_salto_suspeito) if self.itens_salto_suspeito else 0
+                percentual_novos = len(itens_novos) / len(self.itens_salto_suspeito) if len(self.itens_salto_suspeito) > 0 else 0
                 
-                if percentual_novos >= PERCENTUAL_ITENS_NOVOS_SALTO:
+                if percentual_novos >= self.percentual_itens_novos_salto:
                     # SALTO VÁLIDO - Aceitar
                     self.logger.info(f"Salto validado: {percentual_novos:.1%} dos itens são novos. Aceitando contagem.")
                     self._reset_controles_salto()
@@ -584,11 +704,11 @@ class StateManager:
         - 5+ itens: Considera camada estabelecida, divisor pode ser ocultado
         - < 5 itens após estabelecida: Volta a exigir divisor com carência
         """
-        tempo_atual = time.time()
+        tempo_atual = self.relogio()
         
         # Se a camada 2 ainda não foi estabelecida (< 5 itens)
         if not self.camada_2_estabelecida:
-            if contagem_atual >= ITENS_MINIMOS_CAMADA_2_ESTABELECIDA:
+            if contagem_atual >= self.itens_minimos_camada_2_estabelecida:
                 # Camada 2 agora está estabelecida!
                 self.camada_2_estabelecida = True
                 self.logger.info(f"Camada 2 estabelecida com {contagem_atual} itens. Divisor não é mais obrigatório.")
@@ -599,31 +719,31 @@ class StateManager:
             if not divisor_estavel:
                 if self.tempo_ultimo_divisor_ausente is None:
                     self.tempo_ultimo_divisor_ausente = tempo_atual
-                    self.logger.debug(f"Divisor ausente na camada 2 (não estabelecida). Iniciando carência...")
+                    self.logger.debug("Divisor ausente na camada 2 (não estabelecida). Iniciando carência...")
                     return
                 
                 tempo_carencia = tempo_atual - self.tempo_ultimo_divisor_ausente
-                if tempo_carencia >= TEMPO_CARENCIA_DIVISOR_AUSENTE:
+                if tempo_carencia >= self.tempo_carencia_divisor_ausente:
                     self.logger.warning(f"Divisor ausente na camada {self.camada_atual} por {tempo_carencia:.1f}s. Voltando para camada 1.")
                     self._voltar_para_camada_1()
                     return
                 else:
-                    self.logger.debug(f"Carência divisor ausente: {tempo_carencia:.1f}/{TEMPO_CARENCIA_DIVISOR_AUSENTE}s")
+                    self.logger.debug("Carência divisor ausente: %.1f/%ss", tempo_carencia, self.tempo_carencia_divisor_ausente)
             else:
                 # Divisor presente, reset carência
                 self.tempo_ultimo_divisor_ausente = None
         
         else:
             # Camada 2 já estabelecida
-            if contagem_atual < ITENS_MINIMOS_CAMADA_2_ESTABELECIDA:
+            if contagem_atual < self.itens_minimos_camada_2_estabelecida:
                 # Contagem baixou, pode ter sido removido itens
                 if self.tempo_ultima_contagem_baixa is None:
                     self.tempo_ultima_contagem_baixa = tempo_atual
-                    self.logger.debug(f"Contagem baixa na camada 2 estabelecida ({contagem_atual}). Iniciando carência...")
+                    self.logger.debug("Contagem baixa na camada 2 estabelecida (%s). Iniciando carência...", contagem_atual)
                     return
                 
                 tempo_carencia = tempo_atual - self.tempo_ultima_contagem_baixa
-                if tempo_carencia >= TEMPO_CARENCIA_CONTAGEM_BAIXA:
+                if tempo_carencia >= self.tempo_carencia_contagem_baixa:
                     self.logger.warning(f"Contagem baixa por {tempo_carencia:.1f}s. Camada 2 não mais estabelecida.")
                     self.camada_2_estabelecida = False
                     self.tempo_ultima_contagem_baixa = None
@@ -633,7 +753,7 @@ class StateManager:
                         self._voltar_para_camada_1()
                         return
                 else:
-                    self.logger.debug(f"Carência contagem baixa: {tempo_carencia:.1f}/{TEMPO_CARENCIA_CONTAGEM_BAIXA}s")
+                    self.logger.debug("Carência contagem baixa: %.1f/%ss", tempo_carencia, self.tempo_carencia_contagem_baixa)
             else:
                 # Contagem OK, reset carência
                 self.tempo_ultima_contagem_baixa = None
@@ -648,6 +768,21 @@ class StateManager:
         self.buffer_contagem_itens.clear()
         self._transitar_para(ESTADOS['CONTANDO_ITENS'], "Retorno para camada 1")
     
+    def _atualizar_metricas(self):
+        """Acumula o tempo no estado vigente desde a última chamada e publica o estado atual."""
+        agora = self.relogio()
+        estado = _ROTULO_ESTADO.get(self.status_sistema, self.status_sistema)
+        if self._instante_metricas is not None:
+            metricas.TEMPO_NO_ESTADO.incrementar(self.origem, estado, valor=agora - self._instante_metricas)
+        self._instante_metricas = agora
+
+        if estado != self._estado_publicado:
+            if self._estado_publicado is not None:
+                metricas.ESTADO_ATUAL.definir(0, self.origem, self._estado_publicado)
+            metricas.ESTADO_ATUAL.definir(1, self.origem, estado)
+            self._estado_publicado = estado
+        metricas.CAMADA_ATUAL.definir(self.camada_atual, self.origem)
+
     def get_status_visual(self):
         """
         Retorna uma representação textual do estado atual para a visualização.
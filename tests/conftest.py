@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Os módulos do SIAC ficam na raiz do repositório (sem pacote)
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
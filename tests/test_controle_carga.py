@@ -0,0 +1,31 @@
+from controle_carga import ControladorCarga
+
+NIVEIS = [
+    {'nome': 'normal', 'imgsz': None, 'intervalo_roi': 1, 'pular_frames': 1},
+    {'nome': 'imgsz_reduzido', 'imgsz': 480, 'intervalo_roi': 1, 'pular_frames': 1},
+    {'nome': 'meio_quadro', 'imgsz': 480, 'intervalo_roi': 5, 'pular_frames': 2},
+    {'nome': 'minimo', 'imgsz': 320, 'intervalo_roi': 10, 'pular_frames': 3},
+]
+
+
+def _executar(controlador, tempo_ms, frames):
+    for _ in range(frames):
+        controlador.registrar(tempo_ms)
+    return controlador.nivel['nome']
+
+
+def test_custo_que_cabe_pulando_frames_estabiliza_no_nivel_de_salto():
+    # 100 ms por frame processado: não cabe em 66 ms, mas cabe em 2 x 66 ms
+    controlador = ControladorCarga(niveis=NIVEIS, orcamento_ms=66.0, janela=10, margem_retorno=0.6)
+    assert _executar(controlador, 100.0, 500) == 'meio_quadro'
+
+
+def test_custo_acima_de_todos_os_niveis_vai_ao_minimo():
+    controlador = ControladorCarga(niveis=NIVEIS, orcamento_ms=66.0, janela=10, margem_retorno=0.6)
+    assert _executar(controlador, 250.0, 500) == 'minimo'
+
+
+def test_restaura_quando_o_custo_cai():
+    controlador = ControladorCarga(niveis=NIVEIS, orcamento_ms=66.0, janela=10, margem_retorno=0.6)
+    _executar(controlador, 100.0, 500)
+    assert _executar(controlador, 20.0, 500) == 'normal'
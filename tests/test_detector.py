@@ -0,0 +1,87 @@
+import numpy as np
+import pytest
+
+from config import CONFIDENCIA_LIMITE, CONFIDENCIA_DIVISOR, CLASSE_ITEM, CLASSE_DIVISOR
+from detector import Detector
+from logger_config import get_siac_logger
+
+
+class _Caixas:
+    def __init__(self, dados):
+        self.data = dados
+
+
+class ResultadoFalso:
+    """Imita o resultado do ultralytics: só `boxes.data` (Nx6 float32) é usado."""
+    def __init__(self, dados):
+        self.boxes = _Caixas(np.asarray(dados, dtype=np.float32).reshape(-1, 6))
+
+
+def filtro_yolo(dados, conf):
+    """Filtro de confiança do predict do YOLO: estritamente maior, em float32."""
+    return dados[dados[:, 4] > np.float32(conf)]
+
+
+def duas_passagens(dados):
+    """Filtragem antiga: um predict em CONFIDENCIA_LIMITE e outro em CONFIDENCIA_DIVISOR."""
+    itens, divisores, baixa = [], [], []
+    for linha in filtro_yolo(dados, CONFIDENCIA_LIMITE):
+        coords = list(map(int, linha[:4].tolist()))
+        if int(linha[5]) == CLASSE_ITEM:
+            itens.append(coords)
+        elif int(linha[5]) == CLASSE_DIVISOR:
+            divisores.append(coords)
+    for linha in filtro_yolo(dados, CONFIDENCIA_DIVISOR):
+        confianca = float(linha[4])
+        if int(linha[5]) == CLASSE_DIVISOR and confianca < CONFIDENCIA_LIMITE:
+            baixa.append((list(map(int, linha[:4].tolist())), confianca))
+    return itens, divisores, baixa
+
+
+@pytest.fixture
+def detector():
+    # Sem carregar modelos: só o pós-processamento é testado
+    detector = Detector.__new__(Detector)
+    detector.logger = get_siac_logger("TESTE_DETECTOR")
+    return detector
+
+
+def _deteccoes_nos_limites():
+    confiancas = [0.05, CONFIDENCIA_DIVISOR - 1e-4, CONFIDENCIA_DIVISOR, CONFIDENCIA_DIVISOR + 1e-4,
+                  (CONFIDENCIA_DIVISOR + CONFIDENCIA_LIMITE) / 2, CONFIDENCIA_LIMITE - 1e-4,
+                  CONFIDENCIA_LIMITE, CONFIDENCIA_LIMITE + 1e-4, 0.95]
+    linhas = []
+    for classe in (CLASSE_ITEM, CLASSE_DIVISOR, 7):
+        for i, confianca in enumerate(confiancas):
+            x = 10.0 * i + 0.7
+            linhas.append([x, 5.2 + classe, x + 30.9, 60.5, confianca, classe])
+    return linhas
+
+
+def test_passagem_unica_igual_as_duas_passagens(detector):
+    dados = _deteccoes_nos_limites()
+    itens, divisores, baixa = detector._separar_por_classe(ResultadoFalso(dados))
+    itens_antigos, divisores_antigos, baixa_antiga = duas_passagens(ResultadoFalso(dados).boxes.data)
+
+    assert itens[:, :4].astype(int).tolist() == itens_antigos
+    assert divisores[:, :4].astype(int).tolist() == divisores_antigos
+    assert baixa[:, :4].astype(int).tolist() == [coords for coords, _ in baixa_antiga]
+    np.testing.assert_allclose(baixa[:, 4], [confianca for _, confianca in baixa_antiga])
+
+
+def test_limites_estritos(detector):
+    dados = [
+        [0, 0, 10, 10, CONFIDENCIA_LIMITE, CLASSE_ITEM],
+        [0, 0, 10, 10, CONFIDENCIA_LIMITE, CLASSE_DIVISOR],
+        [0, 0, 10, 10, CONFIDENCIA_DIVISOR, CLASSE_DIVISOR],
+    ]
+    itens, divisores, baixa = detector._separar_por_classe(ResultadoFalso(dados))
+
+    # Confiança igual ao limite não passa em nenhuma das passagens antigas
+    assert len(itens) == len(divisores) == len(baixa) == 0
+    assert duas_passagens(ResultadoFalso(dados).boxes.data) == ([], [], [])
+
+
+def test_resultado_vazio(detector):
+    itens, divisores, baixa = detector._separar_por_classe(ResultadoFalso(np.empty((0, 6))))
+    assert itens.shape == divisores.shape == baixa.shape == (0, 6)
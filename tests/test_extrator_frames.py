@@ -0,0 +1,39 @@
+import glob
+import os
+
+import cv2
+import numpy as np
+
+from extrator_frames import extrair_frames
+
+
+def _cenas(quantidade, semente):
+    # Cenas suaves e distintas entre si (dHash estável após a compressão do vídeo)
+    gerador = np.random.default_rng(semente)
+    return [cv2.resize(gerador.integers(0, 256, (6, 6, 3), dtype=np.uint8), (96, 96), interpolation=cv2.INTER_CUBIC)
+            for _ in range(quantidade)]
+
+
+def _gravar_video(caminho, cenas):
+    escritor = cv2.VideoWriter(caminho, cv2.VideoWriter_fourcc(*'MJPG'), 10, (96, 96))
+    for cena in cenas:
+        escritor.write(cena)
+    escritor.release()
+
+
+def test_duplicatas_entre_videos_e_do_diretorio_de_saida_sao_descartadas(tmp_path):
+    cenas = _cenas(6, semente=1)
+    videos = [str(tmp_path / "linha_a.avi"), str(tmp_path / "linha_b.avi")]
+    for video in videos:
+        _gravar_video(video, cenas)
+    saida = tmp_path / "imagens"
+    saida.mkdir()
+    # Imagem de uma extração anterior, igual à primeira cena
+    cv2.imwrite(str(saida / "anterior.jpg"), cenas[0])
+
+    resumos = extrair_frames(videos, str(saida), intervalo=1, processos=2, threads_escrita=1, distancia_dedup=10)
+
+    # As 5 cenas novas são salvas uma única vez, somando os dois vídeos
+    assert sum(resumo['salvos'] for resumo in resumos) == 5
+    assert sum(resumo['duplicatas'] for resumo in resumos) == 7
+    assert len(glob.glob(os.path.join(saida, "*.jpg"))) == 6
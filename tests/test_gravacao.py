@@ -0,0 +1,53 @@
+import json
+import os
+
+import numpy as np
+import pytest
+
+from gravacao import GravadorDeteccoes, ReprodutorDeteccoes, VERSAO_FORMATO
+
+
+def _gravar(diretorio):
+    gravador = GravadorDeteccoes(str(diretorio), frames_por_parte=2)
+    for indice in range(3):
+        gravador.registrar(indice * 0.5, {
+            'caixas': np.array([[0, 0, 100, 100, 0.9, 0]], dtype=np.float32),
+            'itens': np.array([[10, 10, 20, 20, 0.8, 0]] * indice, dtype=np.float32).reshape(-1, 6),
+        })
+    gravador.fechar()
+
+
+def test_reproduz_o_que_foi_gravado(tmp_path):
+    _gravar(tmp_path)
+    quadros = list(ReprodutorDeteccoes(str(tmp_path)))
+
+    assert [timestamp for timestamp, _ in quadros] == [0.0, 0.5, 1.0]
+    assert [len(resultados['itens']) for _, resultados in quadros] == [0, 1, 2]
+    assert all(len(resultados['caixas']) == 1 for _, resultados in quadros)
+
+
+def test_recusa_gravacao_sem_meta(tmp_path):
+    _gravar(tmp_path)
+    os.remove(tmp_path / 'meta.json')
+    with pytest.raises(ValueError, match='meta.json'):
+        ReprodutorDeteccoes(str(tmp_path))
+
+
+@pytest.mark.parametrize('meta', [{'frames': 3}, {'versao': VERSAO_FORMATO + 1}, {'versao': 1}])
+def test_recusa_versao_desconhecida(tmp_path, meta):
+    _gravar(tmp_path)
+    with open(tmp_path / 'meta.json', 'w', encoding='utf-8') as arquivo:
+        json.dump(meta, arquivo)
+    with pytest.raises(ValueError, match='Versão do formato'):
+        ReprodutorDeteccoes(str(tmp_path))
+
+
+def test_reproduz_gravacao_interrompida_ate_a_ultima_parte(tmp_path):
+    gravador = GravadorDeteccoes(str(tmp_path), frames_por_parte=2)
+    for indice in range(5):
+        gravador.registrar(indice * 0.5, {'caixas': np.array([[0, 0, 100, 100, 0.9, 0]], dtype=np.float32)})
+    # Sem fechar(): o processo foi morto com o quinto frame ainda em memória
+
+    reprodutor = ReprodutorDeteccoes(str(tmp_path))
+    assert reprodutor.meta['frames'] == 4 and not reprodutor.meta['finalizada']
+    assert [timestamp for timestamp, _ in reprodutor] == [0.0, 0.5, 1.0, 1.5]
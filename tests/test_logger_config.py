@@ -0,0 +1,43 @@
+import logging
+import queue
+
+from logger_config import _QueueHandlerSemFormatacao
+
+
+def _logger_com_fila():
+    fila = queue.SimpleQueue()
+    logger = logging.getLogger('teste_fila_sem_formatacao')
+    logger.handlers = [_QueueHandlerSemFormatacao(fila)]
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    return logger, fila
+
+
+def test_argumentos_mutaveis_sao_registrados_com_o_valor_da_chamada():
+    logger, fila = _logger_com_fila()
+    itens = [1, 2]
+    logger.info("Itens: %s", itens)
+    itens.append(3)
+
+    registro = fila.get_nowait()
+    assert registro.getMessage() == "Itens: [1, 2]"
+    assert registro.args is None
+
+
+def test_excecao_vira_texto_na_thread_que_registra():
+    logger, fila = _logger_com_fila()
+    try:
+        raise ValueError("falha de teste")
+    except ValueError:
+        logger.exception("Erro")
+
+    registro = fila.get_nowait()
+    assert registro.exc_info is None
+    assert "ValueError: falha de teste" in registro.exc_text
+    assert "ValueError: falha de teste" in logging.Formatter().format(registro)
+
+
+def test_nivel_desabilitado_nao_enfileira():
+    logger, fila = _logger_com_fila()
+    logger.debug("Nunca formatado: %s", object())
+    assert fila.empty()
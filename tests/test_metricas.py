@@ -0,0 +1,70 @@
+import numpy as np
+
+import metricas
+from detector import Detector
+from logger_config import get_siac_logger
+from state_manager import StateManager
+
+
+def _linhas(nome):
+    return [linha for linha in metricas.REGISTRO.formatar().splitlines() if linha.startswith(nome + '{')]
+
+
+def test_metricas_de_estado_separadas_por_camera():
+    agora = [100.0]
+    camera_0 = StateManager(relogio=lambda: agora[0], origem='TESTE_CAMERA_0')
+    camera_1 = StateManager(relogio=lambda: agora[0], origem='TESTE_CAMERA_1')
+
+    camera_0._atualizar_metricas()
+    camera_1._atualizar_metricas()
+    agora[0] += 2.0
+    camera_0._atualizar_metricas()
+    camera_1._atualizar_metricas()
+
+    for origem in ('TESTE_CAMERA_0', 'TESTE_CAMERA_1'):
+        # Cada câmera acumula apenas o próprio tempo, sem somar o da outra
+        assert f'siac_tempo_no_estado_segundos_total{{origem="{origem}",estado="AGUARDANDO_CAIXA"}} 2.0' \
+            in _linhas('siac_tempo_no_estado_segundos_total')
+        assert f'siac_estado{{origem="{origem}",estado="AGUARDANDO_CAIXA"}} 1' in _linhas('siac_estado')
+        assert f'siac_camada_atual{{origem="{origem}"}} 1' in _linhas('siac_camada_atual')
+
+
+class _Caixas:
+    def __init__(self, dados):
+        self.data = dados
+
+
+class _ModeloFalso:
+    """Devolve um resultado vazio por imagem, como o predict do ultralytics com uma lista."""
+    def predict(self, source, **opcoes):
+        return [type('Resultado', (), {'boxes': _Caixas(np.empty((0, 6), dtype=np.float32))})() for _ in source]
+
+
+def _valor(serie):
+    # Séries ainda não observadas valem 0
+    for linha in metricas.REGISTRO.formatar().splitlines():
+        if linha.startswith(serie + ' '):
+            return float(linha.rsplit(' ', 1)[1])
+    return 0.0
+
+
+def test_lote_conta_uma_inferencia_por_frame_e_observa_a_latencia():
+    detector = Detector.__new__(Detector)
+    detector.logger = get_siac_logger("TESTE_DETECTOR")
+    detector.roi_model = detector.item_model = _ModeloFalso()
+    detector.tamanho_maximo_lote = 8
+    detector.recorte_roi = False
+    detector.imgsz = None
+    detector.confianca_minima = 0.25
+
+    latencia = 'siac_latencia_estagio_segundos_count{estagio="predicao_roi"}'
+    roi_antes = _valor('siac_inferencias_total{modelo="roi"}')
+    itens_antes = _valor('siac_inferencias_total{modelo="itens"}')
+    latencia_antes = _valor(latencia)
+
+    frames = [np.zeros((32, 32, 3), dtype=np.uint8)] * 3
+    assert len(detector.detectar_lote(frames)) == 3
+
+    assert _valor('siac_inferencias_total{modelo="roi"}') == roi_antes + 3
+    assert _valor('siac_inferencias_total{modelo="itens"}') == itens_antes + 3
+    assert _valor(latencia) == latencia_antes + 1
@@ -0,0 +1,136 @@
+import json
+import os
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from publicador_alarmes import PublicadorAlarmes, TransporteHttp, TransporteUdp
+
+
+class TransporteTravado:
+    """Transporte cujo primeiro envio trava até `liberar` e então falha; os seguintes são entregues."""
+    def __init__(self):
+        self.em_envio = threading.Event()
+        self.liberar = threading.Event()
+        self.recebidos = []
+
+    def enviar(self, eventos):
+        if not self.liberar.is_set():
+            self.em_envio.set()
+            self.liberar.wait()
+            raise ConnectionError("gateway travado")
+        self.recebidos.extend(evento['dados']['sequencia'] for evento in eventos)
+
+    def fechar(self):
+        pass
+
+
+def _publicar(publicador, sequencia):
+    publicador.registrar('alarme', f"caixa-{sequencia}", time.time(), 1, {'alarme': 'teste', 'sequencia': sequencia})
+
+
+def _aguardar(condicao, limite_s=5.0):
+    fim = time.monotonic() + limite_s
+    while not condicao() and time.monotonic() < fim:
+        time.sleep(0.01)
+    return condicao()
+
+
+@pytest.fixture
+def gateway_http():
+    recebidos = []
+
+    class _Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            corpo = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+            recebidos.extend(evento['dados']['sequencia'] for evento in json.loads(corpo))
+            self.send_response(204)
+            self.end_headers()
+
+        def log_message(self, formato, *args):
+            pass
+
+    servidor = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{servidor.server_address[1]}/siac/eventos", recebidos
+    servidor.shutdown()
+    servidor.server_close()
+
+
+@pytest.fixture
+def receptor_udp():
+    receptor = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    receptor.bind(('127.0.0.1', 0))
+    receptor.settimeout(0.1)
+    recebidos = []
+    parar = threading.Event()
+
+    def receber():
+        while not parar.is_set():
+            try:
+                dados, _ = receptor.recvfrom(65536)
+            except socket.timeout:
+                continue
+            recebidos.append(json.loads(dados)['dados']['sequencia'])
+
+    thread = threading.Thread(target=receber, daemon=True)
+    thread.start()
+    yield receptor.getsockname()[1], recebidos
+    parar.set()
+    thread.join()
+    receptor.close()
+
+
+def test_entrega_via_http(gateway_http, tmp_path):
+    url, recebidos = gateway_http
+    publicador = PublicadorAlarmes(TransporteHttp(url, timeout=2.0), origem='teste_http',
+                                   intervalo_lote=0.05, diretorio_transbordo=str(tmp_path))
+    for sequencia in range(20):
+        _publicar(publicador, sequencia)
+    assert _aguardar(lambda: len(recebidos) == 20)
+    publicador.fechar()
+    assert recebidos == list(range(20))
+    assert publicador.metricas()['transbordados'] == 0
+
+
+def test_entrega_via_udp(receptor_udp, tmp_path):
+    porta, recebidos = receptor_udp
+    publicador = PublicadorAlarmes(TransporteUdp('127.0.0.1', porta), origem='teste_udp',
+                                   intervalo_lote=0.05, diretorio_transbordo=str(tmp_path))
+    for sequencia in range(20):
+        _publicar(publicador, sequencia)
+    assert _aguardar(lambda: len(recebidos) == 20)
+    publicador.fechar()
+    assert sorted(recebidos) == list(range(20))
+
+
+def test_publicar_nao_espera_gateway_travado_e_reenvia_transbordo_em_ordem(tmp_path):
+    transporte = TransporteTravado()
+    publicador = PublicadorAlarmes(transporte, origem='teste_travado', tamanho_fila=4, tamanho_lote=4,
+                                   intervalo_lote=0.05, tentativas=1, backoff_inicial=0.01,
+                                   backoff_maximo=0.05, diretorio_transbordo=str(tmp_path))
+    _publicar(publicador, 0)
+    assert transporte.em_envio.wait(5.0)
+
+    # Com a thread de envio travada: 1-4 enchem a fila e 5-39 excedem
+    latencias = []
+    for sequencia in range(1, 40):
+        inicio = time.perf_counter()
+        _publicar(publicador, sequencia)
+        latencias.append(time.perf_counter() - inicio)
+    assert max(latencias) < 0.05
+    assert publicador.metricas()['aguardando_transbordo'] == 35
+    # Quem publica não toca no arquivo de transbordo
+    assert not os.path.exists(publicador.caminho_transbordo)
+
+    transporte.liberar.set()
+    assert _aguardar(lambda: len(transporte.recebidos) == 40)
+    publicador.fechar()
+
+    # A fila é entregue primeiro; o transbordo (lote que falhou + excedentes) é reenviado em ordem
+    assert transporte.recebidos == [1, 2, 3, 4, 0] + list(range(5, 40))
+    assert publicador.metricas()['transbordados'] == 36
+    assert not os.path.exists(publicador.caminho_transbordo)
@@ -0,0 +1,18 @@
+import time
+
+from state_manager import StateManager
+
+
+def test_id_da_caixa_usa_tempo_de_parede_e_sequencia():
+    # Relógio injetado começando em 0, como no processamento offline
+    execucao_1 = StateManager(relogio=lambda: 0.0)
+    execucao_2 = StateManager(relogio=lambda: 0.0)
+
+    ids = []
+    for gerenciador in (execucao_1, execucao_1, execucao_2):
+        gerenciador._iniciar_caixa()
+        ids.append(gerenciador.caixa_id)
+
+    assert all(caixa_id.startswith(time.strftime('%Y')) for caixa_id in ids)
+    assert ids[0].endswith('-0001') and ids[1].endswith('-0002') and ids[2].endswith('-0001')
+    assert len(set(ids)) == 3
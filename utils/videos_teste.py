@@ -0,0 +1,70 @@
+import glob
+import os
+import cv2
+
+DIRETORIO_VIDEOS_TESTE = "videos_test"
+
+
+def listar_videos(diretorio=DIRETORIO_VIDEOS_TESTE):
+    """
+    Lista os vídeos (.mp4, .avi, .mov, .mkv) de um diretório, em ordem alfabética.
+    """
+    extensoes = ("*.mp4", "*.avi", "*.mov", "*.mkv")
+    videos = []
+    for extensao in extensoes:
+        videos.extend(glob.glob(os.path.join(diretorio, extensao)))
+    return sorted(videos)
+
+
+def carregar_frames(caminho_video, max_frames=None):
+    """
+    Decodifica os frames de um vídeo para a memória.
+
+    :param caminho_video: Caminho do arquivo de vídeo.
+    :param max_frames: Número máximo de frames a carregar (None para todos).
+    :return: Lista de frames (arrays BGR).
+    """
+    cap = cv2.VideoCapture(caminho_video)
+    if not cap.isOpened():
+        print(f"[ERRO] Não foi possível abrir o vídeo: {caminho_video}")
+        return []
+
+    frames = []
+    while max_frames is None or len(frames) < max_frames:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(frame)
+
+    cap.release()
+    return frames
+
+
+def amostrar_frames(caminho_video, quantidade, deslocamento=0.0):
+    """
+    Amostra frames espaçados uniformemente ao longo de um vídeo.
+
+    :param caminho_video: Caminho do arquivo de vídeo.
+    :param quantidade: Número de frames a amostrar.
+    :param deslocamento: Fração (0 a 1) do passo entre amostras usada como início,
+        para obter amostras disjuntas do mesmo vídeo (ex.: 0.5).
+    :return: Lista de frames (arrays BGR).
+    """
+    cap = cv2.VideoCapture(caminho_video)
+    if not cap.isOpened():
+        print(f"[ERRO] Não foi possível abrir o vídeo: {caminho_video}")
+        return []
+
+    total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    frames = []
+    if total > 0 and quantidade > 0:
+        passo = total / quantidade
+        for i in range(quantidade):
+            indice = min(total - 1, int((i + deslocamento) * passo))
+            cap.set(cv2.CAP_PROP_POS_FRAMES, indice)
+            ret, frame = cap.read()
+            if ret:
+                frames.append(frame)
+
+    cap.release()
+    return frames
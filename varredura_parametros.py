@@ -0,0 +1,140 @@
+import argparse
+import itertools
+import json
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+# Desabilita o sync da ultralytics para evitar downloads
+os.environ['ULTRALYTICS_SYNC'] = 'False'
+
+from logger_config import init_siac_logging
+from replay_deteccoes import reproduzir
+from state_manager import PARAMETROS_PADRAO
+
+
+def gerar_configuracoes(espaco, modo='grade', amostras=20, semente=0):
+    """
+    Gera as combinações de parâmetros a avaliar.
+
+    Args:
+        espaco: Dicionário {NOME_CONSTANTE: lista de valores | {'min': a, 'max': b}}.
+        modo: 'grade' (produto cartesiano das listas) ou 'aleatorio'
+            (sorteio de `amostras` combinações; intervalos min/max são
+            amostrados uniformemente, inteiros se ambos os limites forem inteiros).
+        amostras: Número de combinações no modo aleatório.
+        semente: Semente do sorteio, para repetir a varredura.
+
+    Returns:
+        Lista de dicionários de parâmetros.
+    """
+    desconhecidos = set(espaco) - set(PARAMETROS_PADRAO)
+    if desconhecidos:
+        raise ValueError(f"Parâmetros desconhecidos: {sorted(desconhecidos)}")
+
+    nomes = sorted(espaco)
+    if modo == 'grade':
+        for nome in nomes:
+            if not isinstance(espaco[nome], list):
+                raise ValueError(f"No modo 'grade', '{nome}' deve ser uma lista de valores")
+        return [dict(zip(nomes, valores)) for valores in itertools.product(*(espaco[n] for n in nomes))]
+
+    gerador = random.Random(semente)
+
+    def sortear(valores):
+        if isinstance(valores, list):
+            return gerador.choice(valores)
+        minimo, maximo = valores['min'], valores['max']
+        if isinstance(minimo, int) and isinstance(maximo, int):
+            return gerador.randint(minimo, maximo)
+        return round(gerador.uniform(minimo, maximo), 3)
+
+    return [{nome: sortear(espaco[nome]) for nome in nomes} for _ in range(amostras)]
+
+
+def _inicializar_trabalhador():
+    # Cada processo reproduz milhares de frames: só avisos e erros no console
+    init_siac_logging(log_level="WARNING", enable_file_logging=False)
+
+
+def _avaliar(indice, parametros, gravacao):
+    """Reproduz uma gravação com os parâmetros e conta caixas completas e alarmes."""
+    resultado = reproduzir(gravacao, parametros_estado=parametros)
+    caixas = resultado['caixas']
+    return indice, gravacao, {
+        'caixas_completas': sum(1 for c in caixas if c['resultado'] == 'completa'),
+        'alarmes': sum(len(c['alertas']) for c in caixas)
+    }
+
+
+def pontuar(obtido, esperado):
+    """Erro absoluto total de caixas completas e alarmes em relação ao rótulo."""
+    return (abs(obtido['caixas_completas'] - esperado['caixas_completas']) +
+            abs(obtido['alarmes'] - esperado['alarmes']))
+
+
+def varrer(gravacoes, esperado, configuracoes, processos=None):
+    """
+    Avalia cada configuração em todas as gravações, em paralelo, e ordena pelo
+    erro em relação ao resultado esperado (menor primeiro).
+
+    Args:
+        gravacoes: Diretórios de gravações de detecções (ver gravacao.py).
+        esperado: Dicionário {gravacao: {'caixas_completas': n, 'alarmes': m}}.
+        configuracoes: Lista de dicionários de parâmetros.
+        processos: Número de processos (padrão: número de CPUs).
+
+    Returns:
+        Lista de dicionários com parâmetros, erro e resultados por gravação.
+    """
+    ranking = [{'parametros': p, 'erro': 0, 'gravacoes': {}} for p in configuracoes]
+
+    with ProcessPoolExecutor(max_workers=processos, initializer=_inicializar_trabalhador) as executor:
+        futuros = [executor.submit(_avaliar, i, p, g) for i, p in enumerate(configuracoes) for g in gravacoes]
+        for concluidos, futuro in enumerate(as_completed(futuros), start=1):
+            indice, gravacao, obtido = futuro.result()
+            entrada = ranking[indice]
+            entrada['gravacoes'][gravacao] = obtido
+            entrada['erro'] += pontuar(obtido, esperado[gravacao])
+            if concluidos % 10 == 0 or concluidos == len(futuros):
+                print(f"[INFO] {concluidos}/{len(futuros)} reproduções concluídas")
+
+    return sorted(ranking, key=lambda entrada: entrada['erro'])
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Varredura de parâmetros da máquina de estados sobre detecções gravadas.")
+    parser.add_argument('espaco', type=str, help="JSON com o espaço de busca: {CONSTANTE: [valores] | {\"min\": a, \"max\": b}}.")
+    parser.add_argument('esperado', type=str, help="JSON com o resultado esperado: {gravacao: {\"caixas_completas\": n, \"alarmes\": m}}.")
+    parser.add_argument('--modo', type=str, default='grade', choices=['grade', 'aleatorio'], help="Grade completa ou sorteio aleatório.")
+    parser.add_argument('--amostras', type=int, default=20, help="Número de configurações no modo aleatório.")
+    parser.add_argument('--semente', type=int, default=0, help="Semente do modo aleatório.")
+    parser.add_argument('--processos', type=int, default=None, help="Número de processos (padrão: número de CPUs).")
+    parser.add_argument('--top', type=int, default=10, help="Número de configurações exibidas.")
+    parser.add_argument('--saida', type=str, default=None, help="Arquivo JSON com o ranking completo.")
+
+    args = parser.parse_args()
+
+    with open(args.espaco, encoding='utf-8') as arquivo:
+        espaco = json.load(arquivo)
+    with open(args.esperado, encoding='utf-8') as arquivo:
+        esperado = json.load(arquivo)
+
+    configuracoes = gerar_configuracoes(espaco, args.modo, args.amostras, args.semente)
+    gravacoes = sorted(esperado)
+    print(f"[INFO] {len(configuracoes)} configurações x {len(gravacoes)} gravações")
+
+    inicio = time.perf_counter()
+    ranking = varrer(gravacoes, esperado, configuracoes, args.processos)
+    print(f"[INFO] Varredura concluída em {time.perf_counter() - inicio:.1f}s\n")
+
+    for posicao, entrada in enumerate(ranking[:args.top], start=1):
+        completas = sum(r['caixas_completas'] for r in entrada['gravacoes'].values())
+        alarmes = sum(r['alarmes'] for r in entrada['gravacoes'].values())
+        print(f"{posicao:>3}. erro={entrada['erro']:<4} completas={completas:<4} alarmes={alarmes:<4} {entrada['parametros']}")
+
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as arquivo:
+            json.dump(ranking, arquivo, indent=2, ensure_ascii=False)
+        print(f"\n[INFO] Ranking salvo em: {args.saida}")
@@ -1,4 +1,5 @@
 import cv2
+import numpy as np
 from config import CORES, FONTE, ESPESSURA_LINHA
 
 class Visualizer:
@@ -13,36 +14,54 @@ class Visualizer:
         self.fonte = FONTE
         self.espessura = ESPESSURA_LINHA
 
+        # Buffer reutilizado para desenhar sem alocar um frame novo a cada chamada
+        self._buffer = None
+        # Textos de status já rasterizados, por posição na tela: {nome: (chave, origem, raster, mascara)}
+        self._textos_em_cache = {}
+
+    def copiar_para_buffer(self, frame):
+        """
+        Copia o frame para o buffer de desenho reutilizado (realocado apenas
+        quando a resolução muda) e retorna o buffer.
+
+        O conteúdo é sobrescrito na próxima chamada: quem precisar manter o
+        frame desenhado deve copiá-lo (cv2.imshow já copia).
+        """
+        if self._buffer is None or self._buffer.shape != frame.shape or self._buffer.dtype != frame.dtype:
+            self._buffer = np.empty_like(frame)
+        np.copyto(self._buffer, frame)
+        return self._buffer
+
     def desenhar_visualizacoes(self, frame, roi, itens, divisores, status_visual):
         """
         Desenha todos os elementos visuais no frame.
 
         Args:
             frame: A imagem onde os desenhos serão feitos.
-            roi: As coordenadas da região de interesse (caixa).
-            itens: Uma lista das coordenadas dos itens detectados.
-            divisores: Uma lista das coordenadas dos divisores detectados.
+            roi: A linha (x1, y1, x2, y2, ...) da região de interesse (caixa), ou None.
+            itens: Array Nx6 (ou lista de caixas) dos itens detectados.
+            divisores: Array Nx6 (ou lista de caixas) dos divisores detectados.
             status_visual: Um dicionário com as informações de status do sistema.
         """
         # Extrai informações do dicionário de status
         status_texto = status_visual.get('status_texto', 'ERRO')
         contagem = status_visual.get('contagem', 0)
-        camada_atual = status_visual.get('camada_atual', 1)  # Extrai a camada atual
+        camada_atual = status_visual.get('camada', 1)  # Extrai a camada atual
 
         # Desenha a ROI
-        if roi:
-            x1, y1, x2, y2 = roi
+        if roi is not None:
+            x1, y1, x2, y2 = map(int, roi[:4])
             cv2.rectangle(frame, (x1, y1), (x2, y2), self.cores['roi'], self.espessura)
             cv2.putText(frame, "Caixa", (x1, y1 - 10), self.fonte, 0.7, self.cores['roi'], self.espessura)
 
         # Desenha os itens
         for item in itens:
-            x1, y1, x2, y2 = item
+            x1, y1, x2, y2 = map(int, item[:4])
             cv2.rectangle(frame, (x1, y1), (x2, y2), self.cores['item_ok'], self.espessura)
 
         # Desenha os divisores
         for divisor in divisores:
-            x1, y1, x2, y2 = divisor
+            x1, y1, x2, y2 = map(int, divisor[:4])
             cv2.rectangle(frame, (x1, y1), (x2, y2), self.cores['divisor'], self.espessura)
             cv2.putText(frame, "Divisor", (x1, y1 - 10), self.fonte, 0.7, self.cores['divisor'], self.espessura)
 
@@ -50,10 +69,59 @@ class Visualizer:
         self.desenhar_info_tela(frame, contagem, status_texto, camada_atual)
 
 
+    def desenhar_nivel_degradacao(self, frame, nome_nivel):
+        """Avisa na tela que o controle de carga está operando em um nível degradado."""
+        self._desenhar_textos(frame, 'degradacao', nome_nivel, [
+            (f"Carga alta - modo degradado: {nome_nivel}", (10, 90), 0.7, self.cores['alerta'])
+        ])
+
     def desenhar_info_tela(self, frame, contagem, status_texto, camada_atual):
         """
         Desenha os textos de status e contagem no canto superior da tela.
         """
-        cv2.putText(frame, f"Status: {status_texto} | Camada: {camada_atual}", (10, 30), self.fonte, 0.8, self.cores['texto_status'], self.espessura)
+        self._desenhar_textos(frame, 'status', (status_texto, contagem, camada_atual), [
+            (f"Status: {status_texto} | Camada: {camada_atual}", (10, 30), 0.8, self.cores['texto_status']),
+            (f"Itens Contados: {contagem}", (10, 60), 0.8, self.cores['texto_contagem'])
+        ])
+
+    def _desenhar_textos(self, frame, nome, chave, linhas):
+        """
+        Copia para o frame os textos rasterizados da posição `nome`, refazendo
+        o raster (cv2.putText) só quando `chave` muda. A fonte é desenhada sem
+        antialiasing, então o resultado é idêntico ao putText direto no frame.
+
+        Args:
+            linhas: Lista de (texto, (x, y) da linha de base, escala, cor).
+        """
+        em_cache = self._textos_em_cache.get(nome)
+        if em_cache is None or em_cache[0] != chave:
+            em_cache = (chave,) + self._rasterizar_textos(linhas)
+            self._textos_em_cache[nome] = em_cache
+        _, (x0, y0), raster, mascara = em_cache
+
+        # Recorta o raster aos limites do frame
+        altura, largura = frame.shape[:2]
+        x1, y1 = min(largura, x0 + raster.shape[1]), min(altura, y0 + raster.shape[0])
+        if x1 <= x0 or y1 <= y0:
+            return
+        h, w = y1 - y0, x1 - x0
+        np.copyto(frame[y0:y1, x0:x1], raster[:h, :w], where=mascara[:h, :w, None])
+
+    def _rasterizar_textos(self, linhas):
+        # Retângulo que contém todas as linhas (a espessura do traço avança além do getTextSize)
+        caixas = []
+        for texto, (x, y), escala, _ in linhas:
+            (largura, altura), linha_base = cv2.getTextSize(texto, self.fonte, escala, self.espessura)
+            caixas.append((x - self.espessura, y - altura - self.espessura,
+                           x + largura + self.espessura, y + linha_base + self.espessura))
+        x0 = max(0, min(caixa[0] for caixa in caixas))
+        y0 = max(0, min(caixa[1] for caixa in caixas))
+        x1 = max(caixa[2] for caixa in caixas)
+        y1 = max(caixa[3] for caixa in caixas)
 
-        cv2.putText(frame, f"Itens Contados: {contagem}", (10, 60), self.fonte, 0.8, self.cores['texto_contagem'], self.espessura)
+        raster = np.zeros((y1 - y0, x1 - x0, 3), dtype=np.uint8)
+        mascara = np.zeros((y1 - y0, x1 - x0), dtype=np.uint8)
+        for texto, (x, y), escala, cor in linhas:
+            cv2.putText(raster, texto, (x - x0, y - y0), self.fonte, escala, cor, self.espessura)
+            cv2.putText(mascara, texto, (x - x0, y - y0), self.fonte, escala, 255, self.espessura)
+        return (x0, y0), raster, mascara.astype(bool)